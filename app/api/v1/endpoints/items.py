@@ -6,17 +6,23 @@
 - いいね・コメント
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
+from app.core.config import settings
+from app.core.responses import adapter_response, iter_batches, stream_json_array
 from app.db.database import get_db
 from app.db import models
 from app.schemas import item as item_schema
 from app.schemas import transaction as transaction_schema
 from app.schemas import comment as comment_schema
+from app.schemas import serializers
 from app.api.v1.endpoints.users import get_current_user
-from app.services import recommend_service
+from app.services import item_events, price_stats, neighbor_service
+from app.services.item_detail_cache import item_detail_cache
+from app.services.item_summary import summary_query, to_summaries
 from app.services.mission_service import (
     get_valid_coupon,
     use_coupon,
@@ -24,30 +30,127 @@ from app.services.mission_service import (
     get_user_persona_level,
 )
 from app.db.data.personas import SKILL_DEFINITIONS
+from app.utils.cursor import InvalidCursor, decode_cursor, encode_cursor
+from app.utils.http_cache import cache_headers, make_etag, not_modified
 
 
 router = APIRouter()
 
+# 商品一覧の次ページのカーソルを返すレスポンスヘッダー（main.py の CORS で公開する）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 # =============================================================================
 # 商品一覧・詳細
 # =============================================================================
 
-@router.get("", response_model=List[item_schema.Item], summary="商品一覧取得")
-def get_items(db: Session = Depends(get_db)):
-    """全商品一覧（販売中）を新着順で取得"""
-    return (
-        db.query(models.Item)
-        .options(joinedload(models.Item.seller))
-        .filter(models.Item.status == "on_sale")
-        .order_by(models.Item.created_at.desc())
+def _after_cursor(query, cursor: Optional[str]):
+    """カーソルがあれば、前のページの最後の行より後ろ（古い方）だけに絞る"""
+    if not cursor:
+        return query
+    try:
+        created_at, row_id = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    # 作成日時は DB に入っている値で比べる（SQLite の CURRENT_TIMESTAMP は書式が違い、
+    # Python の datetime と文字列比較すると同時刻が一致しない）。消えた行ならカーソルの値を使う
+    anchor = func.coalesce(
+        select(models.Item.created_at).where(models.Item.id == row_id).scalar_subquery(),
+        created_at,
+    )
+    # created_at <= anchor を別に書いて、インデックスの範囲検索にする（OR だけだと先頭から走査になる）
+    return query.filter(
+        models.Item.created_at <= anchor,
+        or_(models.Item.created_at < anchor, models.Item.id < row_id),
+    )
+
+
+@router.get("", response_model=List[item_schema.ItemSummary], summary="商品一覧取得")
+def get_items(
+    limit: int = Query(settings.ITEM_FEED_PAGE_SIZE, ge=1, le=settings.ITEM_FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor"),
+    stream: bool = Query(False, description="true ならカーソル以降の全件を1つの JSON 配列で少しずつ返す"),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """
+    販売中の商品一覧を新着順で取得（キーセットページング）
+    続きがあれば、次のページのカーソルを X-Next-Cursor ヘッダーで返す。
+    (status, created_at, id) のインデックスを前回の続きから読むので、深いページも先頭と同じコストで引ける
+    一覧のカラムと出品者名だけを読む（コメントは詳細画面で取得）
+    stream=true なら limit を無視して最後まで返す（エクスポート・同期用。ETag は付けない）
+    """
+    if stream:
+        query = (
+            _after_cursor(summary_query(db).filter(models.Item.status == "on_sale"), cursor)
+            .order_by(models.Item.created_at.desc(), models.Item.id.desc())
+        )
+        return stream_json_array(
+            iter_batches(query, settings.STREAM_BATCH_SIZE),
+            serializers.ITEM_SUMMARIES,
+            convert=to_summaries,
+        )
+
+    # 1. ページに載る商品の ID と版だけを読む（1件多く読んで、次のページがあるかを判定する）
+    page = (
+        _after_cursor(
+            db.query(models.Item.id, models.Item.created_at, models.Item.version).filter(
+                models.Item.status == "on_sale"
+            ),
+            cursor,
+        )
+        .order_by(models.Item.created_at.desc(), models.Item.id.desc())
+        .limit(limit + 1)
         .all()
     )
+    headers = {}
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+    # 2. 載る商品とその版が同じなら 304（一覧のカラムは読まない）
+    etag = make_etag("items", [(row.id, row.version) for row in page])
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        cached.headers.update(headers)
+        return cached
+
+    # 3. 一覧のカラムと出品者名を読む
+    rows = (
+        summary_query(db)
+        .filter(models.Item.id.in_([row.id for row in page]))
+        .order_by(models.Item.created_at.desc(), models.Item.id.desc())
+        .all()
+    ) if page else []
+    headers.update(cache_headers(etag))
+    return adapter_response(serializers.ITEM_SUMMARIES, to_summaries(rows), headers=headers)
 
 
 @router.get("/{item_id}", response_model=item_schema.Item)
-def get_item(item_id: str, db: Session = Depends(get_db)):
-    """商品詳細を取得"""
+def get_item(
+    item_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """商品詳細を取得（版が変わっていなければ 304）"""
+    # 1. キャッシュにあれば DB を読まずに返す（他ワーカーの無効化は数秒ごとに取り込む）
+    item_detail_cache.sync(db)
+    cached = item_detail_cache.get(item_id)
+    if cached is not None:
+        etag, body = cached
+        return not_modified(if_none_match, etag) or _json_response(body, etag)
+
+    # 2. 版だけを読んで ETag を作る
+    version = db.query(models.Item.version).filter(models.Item.item_id == item_id).scalar()
+    if version is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Item not found")
+    etag = make_etag("item", item_id, version)
+    response = not_modified(if_none_match, etag)
+    if response is not None:
+        return response
+
+    # 3. 出品者・コメントと一緒に読み、シリアライズしたものをキャッシュする
     item = (
         db.query(models.Item)
         .options(
@@ -59,7 +162,15 @@ def get_item(item_id: str, db: Session = Depends(get_db)):
     )
     if item is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Item not found")
-    return item
+    etag = make_etag("item", item_id, item.version)
+    body = serializers.ITEM.dump_json(serializers.ITEM.validate_python(item))
+    item_detail_cache.put(item_id, etag, body)
+    return _json_response(body, etag)
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    """シリアライズ済みの JSON を ETag・Cache-Control 付きで返す"""
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
 
 
 # =============================================================================
@@ -78,8 +189,14 @@ def create_item(
         seller_id=current_user.firebase_uid,
     )
     db.add(new_item)
+    # 相場の集計に足す（出品と同じトランザクション）
+    price_stats.item_listed(db, new_item)
     db.commit()
     db.refresh(new_item, attribute_names=["seller"])
+
+    # 類似商品・検索インデックスに差分反映
+    item_events.item_saved(new_item)
+
     return new_item
 
 
@@ -146,8 +263,10 @@ def buy_item(
             )
         use_coupon(coupon)
 
-    # 4. 購入処理
+    # 4. 購入処理（商品詳細の版を上げ、キャッシュを無効化する。自分のワーカーのキャッシュはコミット後に外す）
     item.status = "sold"
+    item.version = models.Item.version + 1
+    item_detail_cache.invalidate(db, item.item_id)
     
     transaction = models.Transaction(
         item_id=item.item_id,
@@ -161,9 +280,15 @@ def buy_item(
     current_user.gacha_points = (current_user.gacha_points or 0) + reward
 
     db.add(transaction)
+    # 相場の集計を売却済みへ移す（購入と同じトランザクション）
+    price_stats.item_sold(db, item)
     db.commit()
+    item_detail_cache.evict(item.item_id)
     db.refresh(transaction)
 
+    # 類似商品・検索インデックスから売り切れ商品を外す
+    item_events.item_removed(item.item_id)
+
     # 6. 出品者に購入通知を送信
     if item.seller:
         notification = models.Notification(
@@ -211,10 +336,35 @@ def _calculate_purchase_reward(db: Session, user: models.User, item: models.Item
 
 from app.core.config import settings
 
+@router.post(
+    "/recommend/batch",
+    response_model=item_schema.ItemRecommendBatchResponse,
+    summary="複数商品のおすすめ一括取得",
+)
+def get_recommend_items_batch(
+    request: item_schema.ItemRecommendBatchRequest, db: Session = Depends(get_db)
+):
+    """
+    複数の商品それぞれに類似したおすすめ商品をまとめて取得（ホーム・商品ページのカルーセル用）
+    GET /{item_id}/recommend と同じ事前計算済みの item_neighbors を1クエリで読み、商品同士で重複しないように割り当てる
+    """
+    results = neighbor_service.get_batch_neighbor_items(
+        db,
+        request.item_ids,
+        limit=request.limit,
+        exclude=request.exclude_item_ids,
+    )
+    return {
+        "results": [
+            {"item_id": item_id, "items": items} for item_id, items in results.items()
+        ]
+    }
+
+
 @router.get("/{item_id}/recommend", response_model=List[item_schema.Item], summary="おすすめ商品の取得")
 def get_recommend_items(item_id: str, db: Session = Depends(get_db)):
-    """指定された商品に類似したおすすめ商品を取得"""
-    return recommend_service.get_recommendations(db, item_id, limit=settings.RECOMMEND_ITEM_COUNT)
+    """指定された商品に類似したおすすめ商品を取得（バッチで事前計算した item_neighbors から読む）"""
+    return neighbor_service.get_neighbor_items(db, item_id, limit=settings.RECOMMEND_ITEM_COUNT)
 
 
 # =============================================================================
@@ -235,14 +385,39 @@ def toggle_like(
 
     if existing_like:
         db.delete(existing_like)
+        _add_to_counter(db, item_id, models.Item.like_count, -1)
         db.commit()
+        item_detail_cache.evict(item_id)
         return {"status": "unliked"}
     else:
         db.add(models.Like(item_id=item_id, user_id=current_user.firebase_uid))
+        _add_to_counter(db, item_id, models.Item.like_count, 1)
         db.commit()
+        item_detail_cache.evict(item_id)
         return {"status": "liked"}
 
 
+def _add_to_counter(db: Session, item_id: str, column, delta: int) -> None:
+    """
+    商品のいいね数・コメント数を DB 上で加減算する（UPDATE ... SET n = n + delta）
+    読んでから書かないので、同時に更新されても数がずれない
+    updated_at は検索・類似商品インデックスの版に使うため変えない（商品詳細の版 version は上げ、キャッシュを無効化する。
+    自分のワーカーのキャッシュはコミットした後で呼び出し側が外す）
+    """
+    query = db.query(models.Item).filter(models.Item.item_id == item_id)
+    if delta < 0:
+        query = query.filter(column >= -delta)
+    query.update(
+        {
+            column: column + delta,
+            models.Item.version: models.Item.version + 1,
+            models.Item.updated_at: models.Item.updated_at,
+        },
+        synchronize_session=False,
+    )
+    item_detail_cache.invalidate(db, item_id)
+
+
 # =============================================================================
 # コメント
 # =============================================================================
@@ -265,7 +440,9 @@ def create_comment(
         content=comment_in.content,
     )
     db.add(new_comment)
+    _add_to_counter(db, item_id, models.Item.comment_count, 1)
     db.commit()
+    item_detail_cache.evict(item_id)
     db.refresh(new_comment)
 
     # 自分の商品でなければ出品者に通知を送信
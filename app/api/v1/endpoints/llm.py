@@ -6,11 +6,13 @@ LLM関連エンドポイント
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Any, Dict, List
+from typing import Any, Dict
 
 from app.db.database import get_db
 from app.db import models
+from app.services import price_stats
 from app.services.llm_service import get_llm_service
+from app.services.search_service import search_service
 from app.schemas.context import ContextRequest, PageContext, build_context_text
 
 import re
@@ -457,6 +459,16 @@ def _fallback_response(path: str) -> Dict[str, Any]:
     }
 
 
+def _int_arg(args: Dict[str, Any], key: str, default, minimum: int, maximum: int = None):
+    """args の数値を int にして範囲に収める（未指定・不正なら default）"""
+    try:
+        value = int(args[key])
+    except (KeyError, TypeError, ValueError):
+        return default
+    value = max(minimum, value)
+    return min(maximum, value) if maximum is not None else value
+
+
 @router.post("/func")
 def call_llm_function(payload: Dict[str, Any], db: Session = Depends(get_db)):
     """
@@ -477,22 +489,39 @@ def call_llm_function(payload: Dict[str, Any], db: Session = Depends(get_db)):
                 detail="args.item_name is required",
             )
 
-        q = db.query(models.Item).filter(models.Item.status == "on_sale")
-        q = q.filter(models.Item.name.ilike(f"%{item_name}%"))
-        items: List[models.Item] = q.all()
-
-        count = len(items)
-        avg = (sum(it.price for it in items) / count) if count > 0 else None
+        # 相場は price_stats の集計から引き、サンプルだけ検索で5件読む（該当商品を全件は読まない）
+        market = price_stats.market_price(
+            db,
+            item_name,
+            category=args.get("category"),
+            condition=args.get("condition"),
+            brand=args.get("brand"),
+        )
         sample = [
             {"item_id": it.item_id, "name": it.name, "price": it.price}
-            for it in items[:5]
+            for it in search_service.search(db, item_name, limit=5).items
         ]
+        if not market:
+            return {
+                "result": {
+                    "status": "no_data",
+                    "query": item_name,
+                    "count": 0,
+                    "average_price": None,
+                    "samples": sample,
+                }
+            }
         return {
             "result": {
-                "status": "ok" if count > 0 else "no_data",
+                "status": "ok",
                 "query": item_name,
-                "count": count,
-                "average_price": avg,
+                "count": market["count"],
+                "average_price": market["mean"],
+                "suggested_price": market["suggested_price"],
+                "price_range": market["price_range"],
+                "percentiles": market["percentiles"],
+                "histogram": market["histogram"],
+                "basis": market["basis"],
                 "samples": sample,
             }
         }
@@ -502,18 +531,16 @@ def call_llm_function(payload: Dict[str, Any], db: Session = Depends(get_db)):
         if not qstr:
             raise HTTPException(status_code=400, detail="args.q is required")
 
-        q_lower = qstr.lower()
-        items: List[models.Item] = (
-            db.query(models.Item).filter(models.Item.status == "on_sale").all()
+        # /search/items と同じ SearchService で1ページ分だけ読む（全商品は読まない）
+        page = search_service.search(
+            db,
+            qstr,
+            offset=_int_arg(args, "offset", 0, 0, 1000),
+            limit=_int_arg(args, "limit", 20, 1, 20),
+            category=args.get("category"),
+            min_price=_int_arg(args, "min_price", None, 0),
+            max_price=_int_arg(args, "max_price", None, 0),
         )
-
-        def match(it: models.Item) -> bool:
-            return (
-                q_lower in (it.name or "").lower()
-                or q_lower in (it.description or "").lower()
-                or q_lower in (it.category or "").lower()
-            )
-
         results = [
             {
                 "item_id": it.item_id,
@@ -522,13 +549,12 @@ def call_llm_function(payload: Dict[str, Any], db: Session = Depends(get_db)):
                 "image_url": it.image_url,
                 "category": it.category,
                 "seller": {"username": getattr(it.seller, "username", "")},
-                "like_count": getattr(it, "like_count", 0),
-                "comment_count": getattr(it, "comments_count", 0),
+                "like_count": it.like_count,
+                "comment_count": it.comment_count,
             }
-            for it in items
-            if match(it)
-        ][:20]
+            for it in page.items
+        ]
 
-        return {"result": {"items": results, "query": qstr}}
+        return {"result": {"items": results, "query": qstr, "has_more": page.has_more}}
 
     return {"result": {"ok": True}}
@@ -9,10 +9,11 @@ from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisco
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, and_, desc, func
 from typing import List, Optional, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 import json
 
+from app.core.responses import adapter_response
 from app.db.database import get_db
 from app.db import models
 from app.api.v1.endpoints.users import get_current_user
@@ -53,6 +54,10 @@ class ConversationPreview(BaseModel):
         from_attributes = True
 
 
+# 会話一覧の事前コンパイル済みシリアライザ（app/schemas/serializers.py と同じ使い方）
+CONVERSATION_PREVIEWS = TypeAdapter(List[ConversationPreview])
+
+
 # --- WebSocket Connection Manager ---
 class ConnectionManager:
     def __init__(self):
@@ -142,7 +147,7 @@ def get_conversations(
             item_name=conv.item.name if conv.item else None,
         ))
 
-    return result
+    return adapter_response(CONVERSATION_PREVIEWS, result)
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
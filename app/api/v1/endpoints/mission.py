@@ -16,6 +16,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.core.responses import FastJSONResponse
 from app.db.database import get_db
 from app.db import models
 from app.api.v1.endpoints.users import get_current_user
@@ -347,7 +348,7 @@ def get_my_coupons(
         models.UserCoupon.expires_at > now_jst,
     ).order_by(models.UserCoupon.expires_at.asc()).all()
     
-    return {
+    return FastJSONResponse({
         "coupons": [
             {
                 "id": c.id,
@@ -357,7 +358,7 @@ def get_my_coupons(
             }
             for c in coupons
         ]
-    }
+    })
 
 
 # =============================================================================
@@ -501,11 +502,11 @@ def get_missions(
         "progress": {"current": min(likes_this_week, 5), "target": 5},
     })
     
-    return {
+    return FastJSONResponse({
         "missions": missions,
         "equipped_persona": equipped_persona,
         "memory_fragments": current_user.memory_fragments or 0,
         "gacha_points": current_user.gacha_points or 0,
         "login_streak": current_user.login_streak or 0,
         "total_login_days": current_user.total_login_days or 0,
-    }
+    })
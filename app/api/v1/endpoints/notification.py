@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.core.responses import adapter_response
 from app.db.database import get_db
 from app.db import models
 from app.api.v1.endpoints.users import get_current_user
@@ -15,6 +16,7 @@ from app.schemas.notification import (
     NotificationListResponse,
     UnreadCountResponse,
 )
+from app.schemas import serializers
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -45,9 +47,12 @@ def get_notifications(
         models.Notification.is_read == False
     ).count()
     
-    return NotificationListResponse(
-        notifications=notifications,
-        unread_count=unread_count
+    return adapter_response(
+        serializers.NOTIFICATION_LIST,
+        NotificationListResponse(
+            notifications=notifications,
+            unread_count=unread_count
+        ),
     )
 
 
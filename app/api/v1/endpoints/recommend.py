@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 
+from app.core.responses import adapter_response
 from app.db.database import get_db
 from app.db import models
 from app.services.llm_service import get_llm_service
@@ -11,6 +12,7 @@ from app.schemas.recommend import (
     RecommendItem,
     RecommendHistoryItem,
 )
+from app.schemas import serializers
 
 
 router = APIRouter()
@@ -118,7 +120,7 @@ def get_recommend_history(
                     recommended_at=rec.recommended_at.isoformat() if rec.recommended_at else "",
                 )
             )
-    return result
+    return adapter_response(serializers.RECOMMEND_HISTORY, result)
 
 
 @router.put("/{recommendation_id}/interest")
@@ -1,16 +1,18 @@
 """
 検索エンドポイント
-シンプルなテキストマッチ検索機能を提供
+SearchService（起動時に選んだ検索バックエンド + 結果・商品キャッシュ）で商品を検索する
 """
 
 from fastapi import APIRouter, Query, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from typing import List
+from typing import List, Optional, Union
 
+from app.core.responses import adapter_response
 from app.db.database import SessionLocal
-from app.db.models import Item
-from app.schemas.item import SearchItemResponse
+from app.schemas import serializers
+from app.schemas.item import SearchItemResponse, SearchItemsWithFacetsResponse, SearchSuggestion
+from app.services.search_service import SearchItem, search_service
+from app.services.suggest_index import MAX_SUGGESTIONS, suggest_index
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -23,45 +25,10 @@ def get_db():
         db.close()
 
 
-@router.get("/items", response_model=List[SearchItemResponse])
-async def search_items(
-    query: str = Query(..., min_length=1, max_length=100),
-    limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    """
-    シンプルなテキストマッチ検索
-    
-    商品名、説明文、カテゴリに対して部分一致検索を行います。
-    例: "赤いドレス" -> 名前や説明に「赤」「ドレス」を含む商品を返す
-    """
-    
-    print(f"[search] start query={query}")
-    
-    # クエリをスペースで分割して複数キーワードに対応
-    keywords = query.lower().split()
-    
-    # ベースクエリ: 販売中の商品のみ
-    base_query = db.query(Item).filter(Item.status == "on_sale")
-    
-    # 各キーワードについて、名前・説明・カテゴリのいずれかに含まれるか確認
-    for keyword in keywords:
-        search_pattern = f"%{keyword}%"
-        base_query = base_query.filter(
-            or_(
-                func.lower(Item.name).like(search_pattern),
-                func.lower(Item.description).like(search_pattern),
-                func.lower(Item.category).like(search_pattern),
-            )
-        )
-    
-    # 結果を取得（上限付き）
-    results = base_query.limit(limit).all()
-    print(f"[search] found {len(results)} items")
-    
-    # SearchItemResponseに整形して返す
+def to_search_responses(items: List[SearchItem]) -> List[SearchItemResponse]:
+    """SearchItemResponseに整形する"""
     response_items: List[SearchItemResponse] = []
-    for item in results:
+    for item in items:
         response_items.append(
             SearchItemResponse(
                 item_id=item.item_id,
@@ -70,10 +37,94 @@ async def search_items(
                 image_url=item.image_url,
                 category=item.category,
                 seller=item.seller,
-                like_count=getattr(item, "like_count", 0),
-                comment_count=getattr(item, "comments_count", 0),
+                like_count=item.like_count,
+                comment_count=item.comment_count,
             )
         )
+    return response_items
+
+
+@router.get("/items", response_model=Union[List[SearchItemResponse], SearchItemsWithFacetsResponse])
+def search_items(
+    query: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    category: Optional[str] = Query(None, max_length=100),
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    condition: Optional[str] = Query(None, max_length=100),
+    brand: Optional[str] = Query(None, max_length=100),
+    with_facets: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """
+    商品検索（関連度順）
+
+    商品名、説明文、カテゴリ（転置インデックスではブランドも）を検索します。
+    スペース区切りのキーワードはすべてを含む商品（AND）に絞り込み、同じ関連度なら新しい商品が先です。
+    category（部分一致）・min_price / max_price・condition / brand（完全一致）で絞り込み、offset でページ送りできます。
+    with_facets=true なら {items, facets, offset, limit, has_more} を返します。facets はカテゴリ・状態・ブランド・
+    価格帯ごとの件数で、各フィールドはそのフィールド自身の絞り込みを外して数えます（選び直したときの件数）。
+    使う実装は SEARCH_BACKEND（auto なら起動時に FULLTEXT インデックスの有無で決定）。
+    例: "赤いドレス" -> 名前や説明に「赤いドレス」を含む商品を返す
+    """
+    
+    print(f"[search] start query={query}")
+
+    page = search_service.search(
+        db,
+        query,
+        offset=offset,
+        limit=limit,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        condition=condition,
+        brand=brand,
+        with_facets=with_facets,
+    )
+    print(f"[search] found {len(page.items)} items")
+    
+    response_items = to_search_responses(page.items)
     
     print(f"[search] returning {len(response_items)} items")
-    return response_items
+    # 作り終えたスキーマをそのまま JSON にする（Union の response_model による検証のやり直しを省く）
+    if with_facets:
+        return adapter_response(
+            serializers.SEARCH_ITEMS_WITH_FACETS,
+            SearchItemsWithFacetsResponse(
+                items=response_items,
+                facets=page.facets,
+                offset=page.offset,
+                limit=page.limit,
+                has_more=page.has_more,
+            ),
+        )
+    return adapter_response(serializers.SEARCH_ITEMS, response_items)
+
+
+@router.get("/suggest", response_model=List[SearchSuggestion])
+def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    db: Session = Depends(get_db),
+):
+    """
+    検索窓の入力補完
+
+    入力途中の文字列で始まる商品名・ブランド・カテゴリを、人気度（販売中の商品数 + いいね数）の高い順に返します。
+    プロセス内の前方一致インデックスから返すため、1打鍵ごとに呼び出せます。
+    """
+    suggest_index.sync(db)
+    return suggest_index.suggest(prefix, limit)
+
+
+@router.get("/metrics")
+def search_metrics():
+    """
+    検索キャッシュの統計（このワーカー分）
+
+    結果キャッシュ・商品キャッシュのサイズ / ヒット率 / 破棄件数と、
+    キャッシュのヒット・ミス別の検索レイテンシ（直近の分位点）を返します。
+    """
+    return search_service.metrics()
@@ -4,8 +4,10 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Response,
     status,
     Header,  # ↓↓↓ 追加: ヘッダーを取得するために必要
+    Query,
 )
 from sqlalchemy.orm import Session  # Sessionは必須
 
@@ -14,8 +16,21 @@ from app.db import models
 from app.schemas import user as user_schema
 
 from typing import List
+from sqlalchemy import func
 from sqlalchemy.orm import joinedload
 from app.schemas import item as item_schema
+from app.schemas import serializers
+from app.services.item_summary import summary_query, to_summaries
+from app.db.data.personas import PERSONAS_DATA, SKILL_DEFINITIONS
+from app.utils.http_cache import (
+    PRIVATE_CACHE_CONTROL,
+    cache_headers,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, adapter_response, iter_batches, stream_json_array
 from app.schemas import transaction as transaction_schema
 
 router = APIRouter()
@@ -56,12 +71,29 @@ def get_current_user(
     return user
 
 
+# キャラクターの定義（説明文・スキル）の版。DB の行は PERSONAS_DATA から作られるので、定義が変われば ETag も変わる
+PERSONAS_DATA_VERSION = make_etag(PERSONAS_DATA, SKILL_DEFINITIONS)
+
+
 @router.get("/personas", response_model=List[user_schema.PersonaBase])
-def read_all_personas(db: Session = Depends(get_db)):
+def read_all_personas(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
     """
-    全キャラクターのリストを取得します。
+    全キャラクターのリストを取得します。（変わっていなければ 304）
     """
+    count, max_id = db.query(
+        func.count(models.AgentPersona.id), func.max(models.AgentPersona.id)
+    ).one()
+    etag = make_etag("personas", PERSONAS_DATA_VERSION, count, max_id)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+
     personas = db.query(models.AgentPersona).all()
+    set_cache_headers(response, etag)
     return [user_schema.PersonaBase.model_validate(p) for p in personas]
 
 
@@ -120,74 +152,89 @@ def create_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
     return new_user
 
 
-@router.get("/me/items", response_model=List[item_schema.Item])
+@router.get("/me/items", response_model=List[item_schema.ItemSummary])
 def read_own_items(
     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
 ):
     """
     自分が「出品」した商品の一覧を取得
     """
-    items = (
-        db.query(models.Item)
-        .options(joinedload(models.Item.seller))  # N+1対策
+    # 一覧のカラムと出品者名だけを1回のクエリで読む（コメントは読まない）
+    rows = (
+        summary_query(db)
         .filter(models.Item.seller_id == current_user.firebase_uid)
         .order_by(models.Item.created_at.desc())
         .all()
     )
-    return items
+    return adapter_response(serializers.ITEM_SUMMARIES, to_summaries(rows))
 
 
 @router.get("/me/transactions", response_model=List[transaction_schema.Transaction])
 def read_own_transactions(
-    db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    stream: bool = Query(False, description="true なら JSON 配列を少しずつ返す"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     自分が「購入」した履歴を取得（商品情報付き）
+    stream=true なら yield_per で少しずつ読みながら返す（件数が多くてもメモリ使用量が一定）
     """
-    transactions = (
+    query = (
         db.query(models.Transaction)
         .options(joinedload(models.Transaction.item))  # 商品情報も一緒に取得
         .filter(models.Transaction.buyer_id == current_user.firebase_uid)
         .order_by(models.Transaction.created_at.desc())
-        .all()
     )
-    return transactions
+    if stream:
+        return stream_json_array(
+            iter_batches(query, settings.STREAM_BATCH_SIZE),
+            serializers.TRANSACTIONS,
+            convert=serializers.TRANSACTIONS.validate_python,
+        )
+    return query.all()
 
 
-@router.get("/me/likes", response_model=List[item_schema.Item])
+@router.get("/me/likes", response_model=List[item_schema.ItemSummary])
 def read_own_likes(
     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
 ):
     """
     自分が「いいね」した商品の一覧を取得
     """
-    liked_items = (
-        db.query(models.Item)
+    rows = (
+        summary_query(db)
         .join(models.Like, models.Item.item_id == models.Like.item_id)
-        .options(joinedload(models.Item.seller))  # N+1対策
         .filter(models.Like.user_id == current_user.firebase_uid)
         .order_by(models.Like.created_at.desc())
         .all()
     )
-    return liked_items
+    return adapter_response(serializers.ITEM_SUMMARIES, to_summaries(rows))
 
 
-@router.get("/me/comments", response_model=List[item_schema.Item])
+@router.get("/me/comments", response_model=List[item_schema.ItemSummary])
 def read_own_commented_items(
     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
 ):
     """
     自分が「コメント」した商品の一覧を取得
     """
-    commented_items = (
-        db.query(models.Item)
-        .join(models.Comment, models.Item.item_id == models.Comment.item_id)
-        .options(joinedload(models.Item.seller))  # N+1対策
+    # 同じ商品に何度コメントしても1件にまとめ、最後にコメントした順に並べる
+    commented = (
+        db.query(
+            models.Comment.item_id,
+            func.max(models.Comment.created_at).label("commented_at"),
+        )
         .filter(models.Comment.user_id == current_user.firebase_uid)
-        .order_by(models.Comment.created_at.desc())
+        .group_by(models.Comment.item_id)
+        .subquery()
+    )
+    rows = (
+        summary_query(db)
+        .join(commented, models.Item.item_id == commented.c.item_id)
+        .order_by(commented.c.commented_at.desc())
         .all()
     )
-    return commented_items
+    return adapter_response(serializers.ITEM_SUMMARIES, to_summaries(rows))
 
 
 # app/api/v1/endpoints/users.py に以下を追加
@@ -228,13 +275,33 @@ def update_user_persona(
 
 @router.get("/me/personas")
 def read_own_personas(
-    db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     自分が所持しているAIアシスタントキャラクターの一覧を取得（レベル情報付き）
+    所持・レベルが変わっていなければ 304（ユーザーごとのレスポンスなので CDN には置かない）
     """
     from app.db.data.personas import get_dynamic_skill_text
-    
+
+    # 所持キャラの ID・レベル・重なり数だけで ETag を作る
+    owned = (
+        db.query(
+            models.UserPersona.persona_id,
+            models.UserPersona.level,
+            models.UserPersona.stack_count,
+        )
+        .filter(models.UserPersona.user_id == current_user.id)
+        .order_by(models.UserPersona.persona_id)
+        .all()
+    )
+    etag = make_etag("me/personas", PERSONAS_DATA_VERSION, current_user.id, [tuple(row) for row in owned])
+    cache_options = {"cache_control": PRIVATE_CACHE_CONTROL, "vary": "X-Firebase-Uid"}
+    cached = not_modified(if_none_match, etag, **cache_options)
+    if cached is not None:
+        return cached
+
     # 中間テーブル経由でPersonaとレベル情報を取得
     user_personas = (
         db.query(models.UserPersona, models.AgentPersona)
@@ -252,7 +319,7 @@ def read_own_personas(
         persona_dict["skill_effect"] = get_dynamic_skill_text(persona.id, user_persona.level)
         results.append(persona_dict)
     
-    return results
+    return FastJSONResponse(results, headers=cache_headers(etag, **cache_options))
 
 
 # レアリティ別レベルアップコスト（記憶のかけら）
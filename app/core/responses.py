@@ -0,0 +1,87 @@
+# hackathon-backend/app/core/responses.py
+"""
+JSON レスポンスを速く作るためのレスポンスクラス
+
+response_model のあるエンドポイントは、FastAPI が pydantic-core で直接 JSON にするのでそのままでよい。
+ここにあるのは、それ以外の2つの経路用:
+- FastJSONResponse: 手で組み立てた dict / list を返すエンドポイント用。jsonable_encoder で
+  全体を作り直さず、orjson でそのまま JSON にする
+- adapter_response: エンドポイント内で既に作ったスキーマ・dataclass を、事前に作った
+  TypeAdapter（app/schemas/serializers.py）で JSON にして返す。FastAPI の response_model による
+  検証のやり直しを省く（response_model はドキュメント用にそのまま残す）
+- stream_json_array: 件数の多い一覧（stream=true）を、クエリを yield_per で少しずつ読みながら
+  JSON 配列として送る。行も JSON も1バッチ分しかメモリに載らない
+"""
+
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Query
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    # orjson が知らない型（pydantic モデル、Decimal など）は FastAPI と同じ変換に任せる
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson で JSON にする JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def adapter_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+) -> Response:
+    """TypeAdapter で JSON にしたレスポンス（value は adapter の型のインスタンスであること）"""
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def iter_batches(query: Query, size: int) -> Iterator[List[Any]]:
+    """query を yield_per で size 件ずつ読み、リストにして返す（全件をメモリに載せない）"""
+    rows = iter(query.yield_per(size))
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def stream_json_array(
+    batches: Iterable[List[Any]],
+    adapter: TypeAdapter,
+    convert: Optional[Callable[[List[Any]], Any]] = None,
+    headers: Optional[dict] = None,
+) -> StreamingResponse:
+    """
+    バッチごとに JSON にして、1つの JSON 配列として少しずつ送る
+    adapter は List[...] の TypeAdapter。convert があれば、各バッチを convert に通してから JSON にする
+    """
+
+    def body() -> Iterator[bytes]:
+        yield b"["
+        first = True
+        for batch in batches:
+            # List の TypeAdapter の出力は "[...]" なので、括弧を外して要素だけをつなぐ
+            chunk = adapter.dump_json(convert(batch) if convert else batch)[1:-1]
+            if not chunk:
+                continue
+            if not first:
+                yield b","
+            yield chunk
+            first = False
+        yield b"]"
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
@@ -4,7 +4,9 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings  # ★修正: configから設定を読み込む
 
 # Cloud SQL Connectorの初期化
-connector = Connector()
+# 認証情報のない環境（ローカルでのベンチマーク実行など）でも import できるよう、
+# 最初の接続時に生成する
+connector = None
 
 
 def getconnection():
@@ -12,6 +14,10 @@ def getconnection():
     Cloud SQL への接続を確立する関数.
     config.py (settings) の値を使用します。
     """
+    global connector
+    if connector is None:
+        connector = Connector()
+
     # settings.DB_HOST には INSTANCE_CONNECTION_NAME が入っています
     conn = connector.connect(
         settings.DB_HOST,
@@ -27,10 +33,19 @@ def getconnection():
 # エンジンの作成
 # ローカル実行時など、接続情報がない場合にクラッシュしないよう保護
 try:
-    engine = sqlalchemy.create_engine(
-        "mysql+pymysql://",
-        creator=getconnection,
-    )
+    if settings.DATABASE_URL:
+        # ローカルの SQLite / MySQL に直接つなぐ
+        connect_args = (
+            {"check_same_thread": False}
+            if settings.DATABASE_URL.startswith("sqlite")
+            else {}
+        )
+        engine = sqlalchemy.create_engine(settings.DATABASE_URL, connect_args=connect_args)
+    else:
+        engine = sqlalchemy.create_engine(
+            "mysql+pymysql://",
+            creator=getconnection,
+        )
 except Exception as e:
     print(f"Warning: Could not create database engine. {e}")
     engine = None
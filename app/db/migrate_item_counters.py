@@ -0,0 +1,63 @@
+# hackathon-backend/app/db/migrate_item_counters.py
+"""
+items テーブルに like_count / comment_count カラムを追加するマイグレーションスクリプト
+既存データを保持したままカラムを追加し、likes / comments から件数をバックフィルします
+（バックフィルは items.version も上げるので、先に migrate_item_version.py の version カラムを追加します）
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import inspect, text
+from app.db.database import SessionLocal, engine
+from app.db.migrate_item_version import add_item_version_column
+from app.jobs.repair_item_counters import repair_counters
+
+COUNTER_COLUMNS = ("like_count", "comment_count")
+
+
+def add_item_counter_columns():
+    """items にカウンタのカラムを追加（存在しない場合のみ）し、件数を埋める"""
+
+    # バックフィルの UPDATE が version を上げるので、先に version カラムを用意する
+    add_item_version_column()
+
+    existing = {column["name"] for column in inspect(engine).get_columns("items")}
+
+    with engine.connect() as connection:
+        trans = connection.begin()
+        try:
+            for column in COUNTER_COLUMNS:
+                if column in existing:
+                    print(f"ℹ️ items.{column} already exists.")
+                    continue
+                print(f"Adding items.{column}...")
+                connection.execute(
+                    text(f"ALTER TABLE items ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+                )
+            trans.commit()
+            print("✅ item counter columns ready!")
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Error: {e}")
+            return
+
+    db = SessionLocal()
+    try:
+        print("Backfilling item counters...")
+        fixed = repair_counters(db)
+        print(f"✅ backfilled {fixed} items!")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    add_item_counter_columns()
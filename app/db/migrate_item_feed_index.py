@@ -0,0 +1,43 @@
+# hackathon-backend/app/db/migrate_item_feed_index.py
+"""
+items テーブルに商品一覧（新着順のキーセットページング）用の複合インデックスを追加するマイグレーションスクリプト
+既存データを保持したままインデックスだけを作成します（新規DBは create_all で作られます）
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import inspect
+from app.db.database import engine
+from app.db.models import Item
+
+FEED_INDEX_NAME = "ix_items_status_created_id"
+
+
+def create_item_feed_index():
+    """items に (status, created_at, id) のインデックスを作成（存在しない場合のみ）"""
+
+    existing = {index["name"] for index in inspect(engine).get_indexes("items")}
+    if FEED_INDEX_NAME in existing:
+        print(f"✅ {FEED_INDEX_NAME} already exists.")
+        return
+
+    index = next(index for index in Item.__table__.indexes if index.name == FEED_INDEX_NAME)
+    try:
+        print(f"Creating {FEED_INDEX_NAME} on items...")
+        index.create(bind=engine)
+        print(f"✅ {FEED_INDEX_NAME} created successfully!")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    create_item_feed_index()
@@ -0,0 +1,45 @@
+# hackathon-backend/app/db/migrate_item_version.py
+"""
+items テーブルに version カラム（商品詳細の版。HTTP の ETag に使う）を追加するマイグレーションスクリプト
+既存データを保持したままカラムを追加します（既存の商品は版 1 から始まります）
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import inspect, text
+from app.db.database import engine
+
+
+def add_item_version_column():
+    """items に version カラムを追加（存在しない場合のみ）"""
+
+    existing = {column["name"] for column in inspect(engine).get_columns("items")}
+    if "version" in existing:
+        print("ℹ️ items.version already exists.")
+        return
+
+    with engine.connect() as connection:
+        trans = connection.begin()
+        try:
+            print("Adding items.version...")
+            connection.execute(
+                text("ALTER TABLE items ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            )
+            trans.commit()
+            print("✅ items.version ready!")
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    add_item_version_column()
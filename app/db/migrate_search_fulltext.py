@@ -0,0 +1,53 @@
+# hackathon-backend/app/db/migrate_search_fulltext.py
+"""
+items テーブルに検索用の FULLTEXT インデックス（ngram パーサー）を追加するマイグレーションスクリプト
+既存データを保持したままインデックスだけを作成します（MySQL 専用）
+作成後にサーバーを再起動すると、SEARCH_BACKEND=auto なら FULLTEXT 検索に切り替わります
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import text
+from app.db.database import engine
+from app.services.search_backend import FULLTEXT_COLUMNS, FULLTEXT_INDEX_NAME, has_fulltext_index
+
+
+def create_search_fulltext_index():
+    """items に FULLTEXT インデックスを作成（存在しない場合のみ）"""
+
+    if engine.dialect.name != "mysql":
+        print(f"⚠️ FULLTEXT index is only supported on MySQL (current: {engine.dialect.name})")
+        return
+    if has_fulltext_index(engine):
+        print(f"✅ {FULLTEXT_INDEX_NAME} already exists.")
+        return
+
+    create_sql = f"""
+    ALTER TABLE items
+        ADD FULLTEXT INDEX {FULLTEXT_INDEX_NAME} ({", ".join(FULLTEXT_COLUMNS)})
+        WITH PARSER ngram;
+    """
+
+    with engine.connect() as connection:
+        trans = connection.begin()
+        try:
+            print(f"Creating {FULLTEXT_INDEX_NAME} on items...")
+            connection.execute(text(create_sql))
+            trans.commit()
+            print(f"✅ {FULLTEXT_INDEX_NAME} created successfully!")
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    create_search_fulltext_index()
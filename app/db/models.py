@@ -1,5 +1,6 @@
 import uuid
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Float,
@@ -7,6 +8,7 @@ from sqlalchemy import (
     String,
     ForeignKey,
     DateTime,
+    Index,
     Table,
     Text,
 )
@@ -126,9 +128,23 @@ class Item(Base):
     # 外部キーの型も参照先(User.firebase_uid)と合わせる
     seller_id = Column(String(255), ForeignKey("users.firebase_uid"))
 
+    # いいね数・コメント数（一覧表示で likes / comments を読まないための非正規化カラム）
+    # toggle_like / create_comment で同じトランザクション内に加減算し、
+    # ずれた場合は app/jobs/repair_item_counters.py で数え直す
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # 商品詳細の版（HTTP の ETag に使う）。商品詳細のレスポンスが変わる書き込み
+    # （購入・いいね・コメント・カウンタの修正）で同じトランザクション内に +1 する
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # 商品一覧の新着順キーセットページング（status で絞って (created_at, id) の降順に読む）
+        Index("ix_items_status_created_id", "status", "created_at", "id"),
+    )
+
     # リレーション
     seller = relationship("User", back_populates="items")
     transaction = relationship("Transaction", back_populates="item", uselist=False)
@@ -136,14 +152,9 @@ class Item(Base):
     comments = relationship("Comment", back_populates="item")
 
     @property
-    def like_count(self) -> int:
-        """この商品に付いたいいねの数を返す"""
-        return len(self.likes)
-
-    @property
-    def comments_count(self):
-        """この商品に付いたコメントの数を返す"""
-        return len(self.comments)
+    def comments_count(self) -> int:
+        """この商品に付いたコメントの数を返す（comment_count の旧名）"""
+        return self.comment_count or 0
 
 
 # --- 3. Transaction Model (取引) ---
@@ -416,3 +427,92 @@ class DirectMessage(Base):
     # リレーション
     conversation = relationship("Conversation", back_populates="messages")
     sender = relationship("User")
+
+
+# --- 15. ItemNeighbor Model (類似商品の事前計算結果) ---
+class ItemNeighbor(Base):
+    __tablename__ = "item_neighbors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(String(255), ForeignKey("items.item_id"))
+    neighbor_item_id = Column(String(255), ForeignKey("items.item_id"))
+    score = Column(Float)  # ランキングスコア（RECOMMEND_RANKER、similarity ならコサイン類似度）
+    rank = Column(Integer)  # 1始まりの順位
+
+    # 計算時点の商品の版（updated_at、未更新なら created_at）。テキスト変更の検出に使う
+    item_version = Column(DateTime(timezone=True), nullable=True)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # おすすめ取得は item_id で絞って rank 順に読むだけ
+        Index("ix_item_neighbors_item_rank", "item_id", "rank"),
+        Index("ix_item_neighbors_neighbor", "neighbor_item_id"),
+    )
+
+    # リレーション
+    neighbor = relationship("Item", foreign_keys=[neighbor_item_id])
+
+
+# --- 16. ItemTokenCache Model (商品テキストのトークナイズ結果キャッシュ) ---
+class ItemTokenCache(Base):
+    __tablename__ = "item_token_cache"
+
+    item_id = Column(String(255), ForeignKey("items.item_id"), primary_key=True)
+    # トークナイズした時点の商品の版（updated_at、未更新なら created_at）
+    item_version = Column(DateTime(timezone=True), nullable=True)
+    # 単語カウントの作り方のバージョン（変わったらキャッシュを使わない）
+    tokenizer_version = Column(Integer, default=1)
+    # 単語 -> 出現回数 のJSON
+    term_counts = Column(Text)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# --- 17. UserRecommendation Model (協調フィルタリングによるユーザー別おすすめ) ---
+class UserRecommendation(Base):
+    __tablename__ = "user_recommendations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(255), ForeignKey("users.firebase_uid"))
+    item_id = Column(String(255), ForeignKey("items.item_id"))
+    score = Column(Float)  # 行列分解モデルの予測スコア
+    rank = Column(Integer)  # 1始まりの順位
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # おすすめ取得は user_id で絞って rank 順に読むだけ
+        Index("ix_user_recommendations_user_rank", "user_id", "rank"),
+    )
+
+    # リレーション
+    item = relationship("Item")
+
+
+# --- 18. PriceStat Model (相場の集計: キーごとの価格ヒストグラム) ---
+class PriceStat(Base):
+    __tablename__ = "price_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # 集計の単位: "name:<商品名>" / "token:<単語>" / "category_token:<カテゴリ>\x1f<単語>" /
+    # "brand:<ブランド>" / "category:<カテゴリ>" / "category_condition:<カテゴリ>\x1f<状態>"（price_stats.py）
+    stat_key = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False)  # "on_sale"（出品中） / "sold"（売却済み）
+    bucket = Column(Integer, nullable=False)  # 価格帯の番号（対数で等間隔）
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    price_sum = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # 相場の参照は stat_key で絞ってバケットを読むだけ。増減は1行の UPDATE
+        Index("ux_price_stats_key_status_bucket", "stat_key", "status", "bucket", unique=True),
+    )
+
+
+# --- 19. CacheInvalidation Model (商品詳細キャッシュの無効化ログ: ワーカー間の通知) ---
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+
+    # 各ワーカーは前回読んだ id より後ろを読み、その商品をキャッシュから外す（item_detail_cache.py）
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(String(255), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
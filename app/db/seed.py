@@ -37,6 +37,7 @@ try:
     # 作成したデータファイルからインポート
     from app.db.data.personas import PERSONAS_DATA
     from app.db.data.items import REALISTIC_ITEMS
+    from app.jobs.rebuild_price_stats import rebuild_price_stats
 except ImportError as e:
     print(f"Import Error in seed.py: {e}")
     # 直接実行で失敗しないようexitする
@@ -156,21 +157,28 @@ def create_initial_data(db: Session):
             is_instant_buy_ok=True,
             status="on_sale",
             seller_id=seller_uid,
+            like_count=0,
+            comment_count=0,
         )
 
         # ランダムエンゲージメント
         for uid in user_uids:
             if uid != seller_uid and random.random() < 0.2:
                 db.add(Like(user_id=uid, item=item))
+                item.like_count += 1
                 if random.random() < 0.3:
                     db.add(
                         Comment(
                             user_id=uid, item=item, content="購入を検討しています。"
                         )
                     )
+                    item.comment_count += 1
         db.add(item)
 
     db.commit()
+
+    # 相場の集計 (price_stats) を作る
+    rebuild_price_stats(db)
     print("✨ Seeding complete!")
 
 
@@ -0,0 +1,213 @@
+# hackathon-backend/app/jobs/build_item_neighbors.py
+"""
+類似商品テーブル (item_neighbors) を更新するバッチジョブ
+
+再計算するのは次の商品だけ:
+- まだ類似商品が計算されていない販売中の商品（新規出品）
+- 計算後に商品テキストが変わった商品（updated_at の変化で判定）
+- 類似商品のどれかが売り切れた商品
+販売中でなくなった商品の行は削除する。
+
+RECOMMEND_ANN_DIR が設定されていて販売中商品が RECOMMEND_ANN_MIN_ITEMS 以上なら、
+ANN インデックスも --ann-interval 秒ごとに作り直す（保存先は Web ワーカーと共有）。
+
+実行例:
+    python -m app.jobs.build_item_neighbors            # 差分のみ1回実行
+    python -m app.jobs.build_item_neighbors --full     # 全件再計算
+    python -m app.jobs.build_item_neighbors --interval 300  # 5分ごとに常駐実行
+    python -m app.jobs.build_item_neighbors --workers 4     # トークナイズを4プロセスで並列化
+    python -m app.jobs.build_item_neighbors --ann-interval 600  # ANN を10分ごとに作り直す
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 自身の場所(app/jobs)から2つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, engine, Base
+from app.services.ranker import get_ranker, load_features, rank_candidates
+from app.services.recommend_service import RecommendIndex
+
+CHUNK_SIZE = 500
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def find_stale_items(db: Session, current_versions: dict, full: bool = False) -> set:
+    """再計算が必要な販売中商品のIDを返す"""
+    if full:
+        return set(current_versions)
+
+    # 計算済みの商品と、その時点の版
+    stored_versions = dict(
+        db.query(models.ItemNeighbor.item_id, models.ItemNeighbor.item_version)
+        .distinct()
+        .all()
+    )
+
+    stale = set()
+    for item_id, version in current_versions.items():
+        # 新規出品 or テキスト変更
+        if item_id not in stored_versions or stored_versions[item_id] != version:
+            stale.add(item_id)
+
+    # 類似商品が売り切れた商品
+    sold_neighbor_owners = (
+        db.query(models.ItemNeighbor.item_id)
+        .join(models.Item, models.Item.item_id == models.ItemNeighbor.neighbor_item_id)
+        .filter(models.Item.status != "on_sale")
+        .distinct()
+        .all()
+    )
+    stale.update(
+        item_id for (item_id,) in sold_neighbor_owners if item_id in current_versions
+    )
+    return stale
+
+
+def delete_removed_items(db: Session, current_versions: dict) -> int:
+    """販売中でなくなった商品の類似商品行を削除する"""
+    stored_ids = {
+        item_id for (item_id,) in db.query(models.ItemNeighbor.item_id).distinct().all()
+    }
+    removed = stored_ids - set(current_versions)
+    for chunk in _chunks(removed):
+        db.query(models.ItemNeighbor).filter(
+            models.ItemNeighbor.item_id.in_(chunk)
+        ).delete(synchronize_session=False)
+    db.commit()
+    return len(removed)
+
+
+def rebuild_neighbors(
+    db: Session, index: RecommendIndex, item_ids, current_versions: dict, limit: int
+) -> None:
+    """指定商品の類似商品を計算し直して保存する（チャンクごとにコミット）"""
+    ranker = get_ranker()
+    for chunk in _chunks(sorted(item_ids)):
+        db.query(models.ItemNeighbor).filter(
+            models.ItemNeighbor.item_id.in_(chunk)
+        ).delete(synchronize_session=False)
+
+        # 類似度で候補を多めに集め、チャンク内の全候補の特徴量をまとめて読んで並べ直す
+        candidates = {
+            item_id: index.neighbors(item_id, limit * settings.RANK_CANDIDATE_FACTOR)
+            for item_id in chunk
+        }
+        features = load_features(
+            db, set(chunk) | {i for pairs in candidates.values() for i, _ in pairs}
+        )
+
+        rows = []
+        for item_id in chunk:
+            ranked = rank_candidates(ranker, features, item_id, candidates[item_id], limit)
+            for rank, (neighbor_id, score) in enumerate(ranked, start=1):
+                rows.append(
+                    {
+                        "item_id": item_id,
+                        "neighbor_item_id": neighbor_id,
+                        "score": score,
+                        "rank": rank,
+                        "item_version": current_versions[item_id],
+                    }
+                )
+        if rows:
+            db.bulk_insert_mappings(models.ItemNeighbor, rows)
+        db.commit()
+
+
+def run_once(
+    index: RecommendIndex,
+    full: bool = False,
+    limit: int = settings.ITEM_NEIGHBOR_COUNT,
+    build_ann: bool = False,
+) -> int:
+    """差分を1回計算する。再計算した商品数を返す"""
+    db = SessionLocal()
+    try:
+        # 1. インデックスをDBと同期（2回目以降は差分のみトークナイズ）
+        index.sync(db, force=True)
+        current_versions = index.versions()
+
+        # 大規模カタログでは近傍計算の前に ANN を作り直す
+        if build_ann and index.ann_dir and len(index) >= index.ann_min_items:
+            index.build_ann()
+
+        # 2. 売り切れた商品の行を削除
+        removed = delete_removed_items(db, current_versions)
+
+        # 3. 再計算が必要な商品だけ計算し直す
+        stale = find_stale_items(db, current_versions, full=full)
+        rebuild_neighbors(db, index, stale, current_versions, limit)
+
+        print(f"✅ item_neighbors updated: recomputed={len(stale)}, removed={removed}")
+        return len(stale)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ item_neighbors update failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build item_neighbors table")
+    parser.add_argument("--full", action="store_true", help="全件を再計算する")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="指定秒ごとに繰り返し実行する（0なら1回だけ）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="トークナイズに使うプロセス数（キャッシュにない商品が多い時だけ使われる）",
+    )
+    parser.add_argument(
+        "--ann-interval",
+        type=int,
+        default=3600,
+        help="ANN インデックスを作り直す間隔（秒）",
+    )
+    args = parser.parse_args()
+
+    # テーブルがなければ作成
+    Base.metadata.create_all(bind=engine)
+
+    index = RecommendIndex(tokenizer_workers=args.workers)
+    run_once(index, full=args.full, build_ann=True)
+    last_ann_build = time.monotonic()
+    while args.interval > 0:
+        time.sleep(args.interval)
+        build_ann = time.monotonic() - last_ann_build >= args.ann_interval
+        try:
+            run_once(index, build_ann=build_ann)
+            if build_ann:
+                last_ann_build = time.monotonic()
+        except Exception:
+            # 常駐モードでは次の周期で再試行する
+            pass
+
+
+if __name__ == "__main__":
+    main()
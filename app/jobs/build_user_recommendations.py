@@ -0,0 +1,165 @@
+# hackathon-backend/app/jobs/build_user_recommendations.py
+"""
+ユーザー別おすすめテーブル (user_recommendations) を更新するバッチジョブ
+
+いいね・購入・コメント・AIおすすめへの反応から ALS モデルを学習し直し、
+行動履歴のある全ユーザーについて上位 USER_RECOMMEND_COUNT 件を保存する。
+行動済みの商品・自分の出品・販売中でない商品はおすすめに含めない。
+
+実行例:
+    python -m app.jobs.build_user_recommendations                 # 1回実行
+    python -m app.jobs.build_user_recommendations --interval 3600 # 1時間ごとに常駐実行
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 自身の場所(app/jobs)から2つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+except ImportError:
+    pass
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, engine, Base
+from app.services.als_service import load_interactions, recommend_top_k, train_als
+
+CHUNK_SIZE = 500
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def build_exclusions(db: Session, user_ids, item_ids, weights) -> sparse.csr_matrix:
+    """行動済みの商品と自分の出品を (ユーザー, 商品) の疎行列にまとめる"""
+    user_of = {user_id: i for i, user_id in enumerate(user_ids)}
+    item_of = {item_id: i for i, item_id in enumerate(item_ids)}
+    own = [
+        (user_of[seller_id], item_of[item_id])
+        for item_id, seller_id in db.query(models.Item.item_id, models.Item.seller_id)
+        if seller_id in user_of and item_id in item_of
+    ]
+    rows = np.array([r for r, _ in own], dtype=np.int32)
+    cols = np.array([c for _, c in own], dtype=np.int32)
+    owned = sparse.csr_matrix(
+        (np.ones(len(own)), (rows, cols)), shape=weights.shape
+    )
+    # 「興味なし」で重みが負の商品も含め、観測のあるセルはすべて除外する
+    return (abs(weights) + owned).tocsr()
+
+
+def save_recommendations(db: Session, user_ids, item_ids, top_k) -> None:
+    """ユーザーごとのおすすめを入れ替える（チャンクごとにコミット）"""
+    for chunk in _chunks(range(len(user_ids))):
+        chunk_user_ids = [user_ids[u] for u in chunk]
+        db.query(models.UserRecommendation).filter(
+            models.UserRecommendation.user_id.in_(chunk_user_ids)
+        ).delete(synchronize_session=False)
+
+        rows = [
+            {
+                "user_id": user_ids[u],
+                "item_id": item_ids[item_index],
+                "score": score,
+                "rank": rank,
+            }
+            for u in chunk
+            for rank, (item_index, score) in enumerate(top_k.get(u, []), start=1)
+        ]
+        if rows:
+            db.bulk_insert_mappings(models.UserRecommendation, rows)
+        db.commit()
+
+    # 行動履歴がなくなったユーザー（全いいね解除など）の行を削除
+    stored = {
+        user_id
+        for (user_id,) in db.query(models.UserRecommendation.user_id).distinct().all()
+    }
+    for chunk in _chunks(stored - set(user_ids)):
+        db.query(models.UserRecommendation).filter(
+            models.UserRecommendation.user_id.in_(chunk)
+        ).delete(synchronize_session=False)
+    db.commit()
+
+
+def run_once(limit: int = settings.USER_RECOMMEND_COUNT) -> int:
+    """モデルを学習し直しておすすめを保存する。対象ユーザー数を返す"""
+    db = SessionLocal()
+    try:
+        # 1. 行動履歴を疎行列にまとめる
+        user_ids, item_ids, weights = load_interactions(db)
+        if weights.nnz == 0:
+            print("✅ user_recommendations: no interactions")
+            return 0
+
+        # 2. ALS で因子ベクトルを学習
+        start = time.perf_counter()
+        user_factors, item_factors = train_als(weights)
+        elapsed = time.perf_counter() - start
+
+        # 3. 販売中の商品だけを候補にして上位を選ぶ
+        on_sale = {
+            item_id
+            for (item_id,) in db.query(models.Item.item_id).filter(models.Item.status == "on_sale")
+        }
+        candidates = np.array(
+            [i for i, item_id in enumerate(item_ids) if item_id in on_sale], dtype=np.int64
+        )
+        exclude = build_exclusions(db, user_ids, item_ids, weights)
+        top_k = recommend_top_k(user_factors, item_factors, exclude, candidates, limit)
+
+        # 4. 保存
+        save_recommendations(db, user_ids, item_ids, top_k)
+
+        print(
+            f"✅ user_recommendations updated: users={len(user_ids)}, items={len(item_ids)}, "
+            f"interactions={weights.nnz}, train={elapsed:.1f}s"
+        )
+        return len(user_ids)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ user_recommendations update failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build user_recommendations table")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="指定秒ごとに繰り返し実行する（0なら1回だけ）",
+    )
+    args = parser.parse_args()
+
+    # テーブルがなければ作成
+    Base.metadata.create_all(bind=engine)
+
+    run_once()
+    while args.interval > 0:
+        time.sleep(args.interval)
+        try:
+            run_once()
+        except Exception:
+            # 常駐モードでは次の周期で再試行する
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# hackathon-backend/app/jobs/rebuild_price_stats.py
+"""
+相場の集計 (price_stats) を全件から作り直すバッチジョブ
+
+出品・購入のたびに price_stats.item_listed / item_sold で差分更新しているが、
+テーブル追加直後のバックフィルや、手作業でのデータ修正・価格変更でずれた場合はこれで数え直す。
+出品中・売却済みの商品を読み、price_stats の行を入れ替える（1トランザクション）。
+
+実行例:
+    python -m app.jobs.rebuild_price_stats                  # 1回実行
+    python -m app.jobs.rebuild_price_stats --interval 86400 # 1日ごとに常駐実行
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 自身の場所(app/jobs)から2つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.database import SessionLocal, engine, Base
+from app.services.price_stats import STATUSES, count_items
+
+CHUNK_SIZE = 5000
+
+
+def rebuild_price_stats(db: Session) -> int:
+    """price_stats を数え直して入れ替える。書き込んだ行数を返す"""
+    # 1. 出品中・売却済みの商品を読んで数える（価格と集計キーに使うカラムだけ）
+    items = (
+        db.query(
+            models.Item.name,
+            models.Item.category,
+            models.Item.condition,
+            models.Item.brand,
+            models.Item.price,
+            models.Item.status,
+        )
+        .filter(models.Item.status.in_(STATUSES))
+        .yield_per(CHUNK_SIZE)
+    )
+    totals = count_items(items)
+
+    # 2. 行を入れ替える
+    rows = [
+        {"stat_key": stat_key, "status": status, "bucket": bucket, "count": count, "price_sum": price_sum}
+        for (stat_key, status, bucket), (count, price_sum) in totals.items()
+    ]
+    db.execute(delete(models.PriceStat))
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(models.PriceStat), rows[start : start + CHUNK_SIZE])
+    db.commit()
+    return len(rows)
+
+
+def run_once() -> int:
+    """相場の集計を作り直す。書き込んだ行数を返す"""
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        written = rebuild_price_stats(db)
+        print(
+            f"✅ price stats rebuilt: rows={written}, "
+            f"elapsed={time.perf_counter() - start:.1f}s"
+        )
+        return written
+    except Exception as e:
+        db.rollback()
+        print(f"❌ price stats rebuild failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild price_stats from items")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="指定秒ごとに繰り返し実行する（0なら1回だけ）",
+    )
+    args = parser.parse_args()
+
+    # テーブルがなければ作成
+    Base.metadata.create_all(bind=engine)
+
+    run_once()
+    while args.interval > 0:
+        time.sleep(args.interval)
+        try:
+            run_once()
+        except Exception:
+            # 常駐モードでは次の周期で再試行する
+            pass
+
+
+if __name__ == "__main__":
+    main()
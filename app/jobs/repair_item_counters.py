@@ -0,0 +1,135 @@
+# hackathon-backend/app/jobs/repair_item_counters.py
+"""
+商品のいいね数・コメント数 (items.like_count / comment_count) を数え直すバッチジョブ
+
+likes / comments を GROUP BY で数えてカラムの値とずれている商品を探し、その商品だけを更新する。
+更新する値は UPDATE の中の相関サブクエリで数え直す（読んでから書くまでの間に付いたいいね・コメントを
+上書きしない。いいね・コメント側は n = n + delta で加減算している）。
+カラム追加直後のバックフィル（migrate_item_counters.py から呼ぶ）と、
+手作業でのデータ修正などでずれた場合の修復の両方に使う。
+updated_at は検索・類似商品インデックスの版に使うため変えない（商品詳細の版 version は上げる）。
+
+実行例:
+    python -m app.jobs.repair_item_counters                  # 1回実行
+    python -m app.jobs.repair_item_counters --interval 86400 # 1日ごとに常駐実行
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 自身の場所(app/jobs)から2つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.database import SessionLocal, engine, Base
+
+CHUNK_SIZE = 5000
+
+
+def repair_counters(db: Session) -> int:
+    """実際の件数とずれている商品のカウンタを直す。直した商品数を返す"""
+    # 1. 実際の件数を商品ごとに数える
+    like_counts = dict(
+        db.query(models.Like.item_id, func.count(models.Like.id)).group_by(models.Like.item_id)
+    )
+    comment_counts = dict(
+        db.query(models.Comment.item_id, func.count(models.Comment.id))
+        .group_by(models.Comment.item_id)
+    )
+
+    # 2. カラムの値とずれている商品を集める（NULL も 0 に直す）
+    fixes = [
+        item_id
+        for item_id, like_count, comment_count in db.query(
+            models.Item.item_id, models.Item.like_count, models.Item.comment_count
+        )
+        if like_count != like_counts.get(item_id, 0)
+        or comment_count != comment_counts.get(item_id, 0)
+    ]
+
+    # 3. まとめて更新（チャンクごとにコミット）。件数は UPDATE の時点で数え直す
+    actual_likes = (
+        select(func.count(models.Like.id))
+        .where(models.Like.item_id == models.Item.item_id)
+        .scalar_subquery()
+    )
+    actual_comments = (
+        select(func.count(models.Comment.id))
+        .where(models.Comment.item_id == models.Item.item_id)
+        .scalar_subquery()
+    )
+    for start in range(0, len(fixes), CHUNK_SIZE):
+        chunk = fixes[start : start + CHUNK_SIZE]
+        db.execute(
+            update(models.Item)
+            .where(models.Item.item_id.in_(chunk))
+            .values(
+                like_count=actual_likes,
+                comment_count=actual_comments,
+                version=models.Item.version + 1,
+                updated_at=models.Item.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # 各ワーカーの商品詳細キャッシュからも外す（item_detail_cache が cache_invalidations を読む）
+        db.execute(insert(models.CacheInvalidation), [{"item_id": item_id} for item_id in chunk])
+        db.commit()
+    return len(fixes)
+
+
+def run_once() -> int:
+    """カウンタを数え直す。直した商品数を返す"""
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        fixed = repair_counters(db)
+        print(
+            f"✅ item counters repaired: fixed={fixed}, "
+            f"elapsed={time.perf_counter() - start:.1f}s"
+        )
+        return fixed
+    except Exception as e:
+        db.rollback()
+        print(f"❌ item counter repair failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recount items.like_count / comment_count")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="指定秒ごとに繰り返し実行する（0なら1回だけ）",
+    )
+    args = parser.parse_args()
+
+    # テーブルがなければ作成
+    Base.metadata.create_all(bind=engine)
+
+    run_once()
+    while args.interval > 0:
+        time.sleep(args.interval)
+        try:
+            run_once()
+        except Exception:
+            # 常駐モードでは次の周期で再試行する
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,24 @@
 # hackathon-backend/app/main.py
 
 import os
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 
 # 必要なモジュール
 from app.db import models
 from app.schemas import user as user_schema
-from app.db.database import get_db, engine, Base
+from app.db.database import get_db, engine, Base, SessionLocal
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.items import NEXT_CURSOR_HEADER
 from app.core.config import settings
+from app.core.responses import iter_batches, stream_json_array
+from app.schemas import serializers
+from app.services import search_backend
+from app.services.search_index import search_index
+from app.services.suggest_index import suggest_index
 
 app = FastAPI(title="FleaMarketApp API", version="1.0.0")
 
@@ -30,6 +36,26 @@ def startup_event():
         Base.metadata.create_all(bind=engine)
         print("✅ Tables check passed.")
 
+        # 3. 検索バックエンドの決定 (FULLTEXT インデックスの有無を確認)
+        backend = search_backend.init_backend(engine)
+
+        db = SessionLocal()
+        try:
+            # 4. 転置インデックスで検索する場合は、最初の検索を待たずにここで構築する
+            #    (全件のトークナイズを最初のリクエストに負わせない)
+            if backend.name == "index":
+                search_index.sync(db, force=True)
+
+            # 5. 入力補完の前方一致インデックスを構築 (販売中の商品名・ブランド・カテゴリ)
+            suggest_index.sync(db, force=True)
+        finally:
+            db.close()
+
+        # 6. 他ワーカーの変更の取り込みはバックグラウンドで行う (検索・1打鍵ごとのリクエストで DB を読まない)
+        if backend.name == "index":
+            search_index.start_background_sync(SessionLocal)
+        suggest_index.start_background_sync(SessionLocal)
+
     except Exception as e:
         print(f"⚠️ Startup error: {e}")
         # 例外発生時も起動プロセスを停止させず、アプリを起動させる
@@ -44,6 +70,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 商品一覧の次ページのカーソルをフロントから読めるようにする
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # --- ルーター ---
@@ -72,8 +100,22 @@ def ping():
 
 
 @app.get("/users/", response_model=List[user_schema.UserBase], tags=["Test"])
-def read_users(db: Session = Depends(get_db)):
-    return db.query(models.User).all()
+def read_users(
+    stream: bool = Query(False, description="true なら JSON 配列を少しずつ返す"),
+    db: Session = Depends(get_db),
+):
+    query = db.query(models.User)
+    if stream:
+        # yield_per で少しずつ読む（キャラクターは JOIN して1ユーザーごとの追加クエリを出さない）
+        query = query.options(
+            joinedload(models.User.current_persona), joinedload(models.User.sub_persona)
+        ).order_by(models.User.id)
+        return stream_json_array(
+            iter_batches(query, settings.STREAM_BATCH_SIZE),
+            serializers.USERS,
+            convert=serializers.USERS.validate_python,
+        )
+    return query.all()
 
 
 @app.get("/")
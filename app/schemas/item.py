@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from .user import SellerInfo  # SellerInfoをインポート
+from datetime import datetime
 from typing import List
 from .comment import Comment
 
@@ -35,8 +36,31 @@ class Item(ItemBase):
     seller: SellerInfo
     # 追加: この商品についたコメントのリスト
     comments: List[Comment] = []
-    # 追加: いいねの数（簡易実装）
+    # 追加: いいねの数・コメントの数（items のカラム）
     like_count: int = 0
+    comment_count: int = 0
+
+
+class ItemSummary(BaseModel):
+    """
+    一覧用の商品スキーマ（説明文・コメント一覧を含まない。出品者は ID と名前だけ）
+    """
+
+    item_id: str
+    name: str
+    price: int
+    image_url: str | None = None
+    status: str
+    is_instant_buy_ok: bool
+    category: str
+    brand: str | None = None
+    condition: str
+    seller: SellerInfo
+    like_count: int = 0
+    comment_count: int = 0
+    created_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ItemCreate(BaseModel):
@@ -59,6 +83,30 @@ class ItemCreate(BaseModel):
     is_instant_buy_ok: bool = True
 
 
+class ItemRecommendBatchRequest(BaseModel):
+    """複数商品のおすすめをまとめて取得するリクエスト（カルーセル用）"""
+
+    # おすすめの元になる商品ID（この順で類似商品を割り当てる）
+    item_ids: List[str] = Field(..., min_length=1, max_length=50)
+    # 商品ごとの件数
+    limit: int = Field(10, ge=1, le=50)
+    # 画面に表示済みなどで、結果から除外する商品ID
+    exclude_item_ids: List[str] = Field(default_factory=list, max_length=500)
+
+
+class ItemRecommendations(BaseModel):
+    """1商品分のおすすめ"""
+
+    item_id: str
+    items: List[Item]
+
+
+class ItemRecommendBatchResponse(BaseModel):
+    """複数商品のおすすめ（商品同士で重複しない）"""
+
+    results: List[ItemRecommendations]
+
+
 class SearchItemResponse(BaseModel):
     """検索結果の商品情報"""
 
@@ -84,3 +132,45 @@ class SearchItemResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class FacetValue(BaseModel):
+    """ファセットの値と件数"""
+
+    value: str
+    count: int
+
+
+class PriceFacet(BaseModel):
+    """価格帯と件数（max_price が None なら上限なし）"""
+
+    min_price: int
+    max_price: int | None = None
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """検索結果のファセット件数（各フィールドの件数は、そのフィールド自身の絞り込みを外して数える）"""
+
+    category: List[FacetValue] = []
+    condition: List[FacetValue] = []
+    brand: List[FacetValue] = []
+    price: List[PriceFacet] = []
+
+
+class SearchItemsWithFacetsResponse(BaseModel):
+    """with_facets=true のときの検索結果"""
+
+    items: List[SearchItemResponse]
+    facets: SearchFacets
+    offset: int
+    limit: int
+    has_more: bool
+
+
+class SearchSuggestion(BaseModel):
+    """入力補完の候補"""
+
+    text: str
+    kind: str  # "name" / "brand" / "category"
+    score: int  # 販売中の商品数 + いいね数
@@ -0,0 +1,33 @@
+# hackathon-backend/app/schemas/serializers.py
+"""
+よく呼ばれるレスポンスの事前コンパイル済みシリアライザ（pydantic v2 の TypeAdapter）
+
+TypeAdapter はモジュールの読み込み時に1回だけ作り、リクエストごとには作らない。
+エンドポイントは app.core.responses.adapter_response で、作り終えた値をそのまま JSON にする。
+"""
+
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schemas.item import Item, SearchItemResponse, SearchItemsWithFacetsResponse
+from app.schemas.notification import NotificationListResponse
+from app.schemas.recommend import RecommendHistoryItem
+from app.schemas.transaction import Transaction
+from app.schemas.user import UserBase
+from app.services.item_summary import ItemSummary
+
+# 商品詳細（item_detail_cache に入れる JSON）
+ITEM = TypeAdapter(Item)
+# 商品一覧（summary_query の dataclass をそのまま。出力は schemas.item.ItemSummary と同じ形）
+ITEM_SUMMARIES = TypeAdapter(List[ItemSummary])
+# 検索結果
+SEARCH_ITEMS = TypeAdapter(List[SearchItemResponse])
+SEARCH_ITEMS_WITH_FACETS = TypeAdapter(SearchItemsWithFacetsResponse)
+# 通知一覧
+NOTIFICATION_LIST = TypeAdapter(NotificationListResponse)
+# おすすめ履歴
+RECOMMEND_HISTORY = TypeAdapter(List[RecommendHistoryItem])
+# stream=true の一覧（ORM のバッチを validate_python してから JSON にする）
+TRANSACTIONS = TypeAdapter(List[Transaction])
+USERS = TypeAdapter(List[UserBase])
@@ -0,0 +1,205 @@
+# hackathon-backend/app/services/als_service.py
+"""
+ユーザー別おすすめの学習（暗黙的フィードバックの行列分解 / ALS）
+
+いいね・購入・コメント・AIおすすめへの反応をユーザー x 商品の疎行列にまとめ、
+Hu, Koren, Volinsky (2008) の implicit ALS でユーザーと商品の因子ベクトルを学習する。
+- 好み p_ui: 重みの合計が正なら 1、負（「興味なし」が勝つ）なら 0
+- 信頼度 c_ui: 1 + ALS_ALPHA x |重みの合計|
+学習はバッチ (app/jobs/build_user_recommendations.py) で行い、
+Webワーカーは結果のテーブル (user_recommendations) を読むだけ。
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.core.config import settings
+
+# 行動ごとの重み（「興味なし」は好みを打ち消す方向に効かせる）
+EVENT_WEIGHTS = {
+    "purchase": 4.0,
+    "interested": 3.0,
+    "like": 2.0,
+    "comment": 1.0,
+    "not_interested": -2.0,
+}
+
+# 共役勾配法のステップ数（前回の解から始めるので、反復ごとに数ステップで十分収束する）
+CG_STEPS = 3
+# 観測ごとの内積をまとめて計算する単位（nnz x 因子数 の一時配列の大きさを抑える）
+DOT_CHUNK = 1 << 18
+
+
+def load_interactions(db: Session) -> Tuple[List[str], List[str], sparse.csr_matrix]:
+    """
+    行動履歴を ユーザー x 商品 の重み付き疎行列にまとめる
+    Returns: (ユーザーID一覧, 商品ID一覧, 重みの疎行列)
+    """
+    events = []
+    events += [
+        (user_id, item_id, EVENT_WEIGHTS["like"])
+        for user_id, item_id in db.query(models.Like.user_id, models.Like.item_id)
+    ]
+    events += [
+        (user_id, item_id, EVENT_WEIGHTS["purchase"])
+        for user_id, item_id in db.query(models.Transaction.buyer_id, models.Transaction.item_id)
+    ]
+    events += [
+        (user_id, item_id, EVENT_WEIGHTS["comment"])
+        for user_id, item_id in db.query(models.Comment.user_id, models.Comment.item_id)
+    ]
+    events += [
+        (user_id, item_id, EVENT_WEIGHTS[interest])
+        for user_id, item_id, interest in db.query(
+            models.LLMRecommendation.user_id,
+            models.LLMRecommendation.item_id,
+            models.LLMRecommendation.interest,
+        ).filter(models.LLMRecommendation.interest.in_(["interested", "not_interested"]))
+    ]
+    events = [e for e in events if e[0] and e[1]]
+
+    user_ids = sorted({e[0] for e in events})
+    item_ids = sorted({e[1] for e in events})
+    user_of = {user_id: i for i, user_id in enumerate(user_ids)}
+    item_of = {item_id: i for i, item_id in enumerate(item_ids)}
+
+    rows = np.array([user_of[e[0]] for e in events], dtype=np.int32)
+    cols = np.array([item_of[e[1]] for e in events], dtype=np.int32)
+    weights = np.array([e[2] for e in events], dtype=np.float64)
+    matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(len(user_ids), len(item_ids)))
+    # 同じ (ユーザー, 商品) の行動は合計される。打ち消し合って 0 になったものは観測なし扱い
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+    return user_ids, item_ids, matrix
+
+
+def _rowwise_dots(left: np.ndarray, right: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """観測 (rows[n], cols[n]) ごとに left[rows[n]] と right[cols[n]] の内積を返す"""
+    dots = np.empty(len(rows))
+    for start in range(0, len(rows), DOT_CHUNK):
+        stop = start + DOT_CHUNK
+        dots[start:stop] = np.einsum(
+            "nf,nf->n", left[rows[start:stop]], right[cols[start:stop]]
+        )
+    return dots
+
+
+def _least_squares(
+    weights: sparse.csr_matrix,
+    current: np.ndarray,
+    fixed: np.ndarray,
+    reg: float,
+    alpha: float,
+    cg_steps: int = CG_STEPS,
+) -> np.ndarray:
+    """
+    片側の因子 (fixed) を固定して、もう片側 (current) の全行を解き直す
+    各行 u について (YtY + Y^T (C_u - I) Y + reg I) x_u = Y^T C_u p_u を
+    共役勾配法で解く（Takács et al. 2011）。全行をまとめて疎行列の積だけで計算するため、
+    観測数 x 因子数^2 の一時配列を作らずに済む
+    """
+    signed = weights.data
+    confidence_minus_one = alpha * np.abs(signed)
+    preference = (signed > 0).astype(np.float64)
+    rows = np.repeat(np.arange(weights.shape[0]), np.diff(weights.indptr))
+    cols = weights.indices
+    gram = fixed.T @ fixed + reg * np.eye(fixed.shape[1])
+
+    def apply_lhs(vectors: np.ndarray) -> np.ndarray:
+        # YtY v + sum_i (c_ui - 1) (v . y_i) y_i
+        dots = _rowwise_dots(vectors, fixed, rows, cols)
+        extra = sparse.csr_matrix(
+            (confidence_minus_one * dots, cols, weights.indptr), shape=weights.shape
+        )
+        return vectors @ gram + extra @ fixed
+
+    # 右辺 b = sum_i c_ui p_ui y_i
+    rhs = sparse.csr_matrix(
+        ((1.0 + confidence_minus_one) * preference, cols, weights.indptr), shape=weights.shape
+    ) @ fixed
+
+    solved = current.copy()
+    residual = rhs - apply_lhs(solved)
+    direction = residual.copy()
+    rs_old = np.einsum("nf,nf->n", residual, residual)
+    for _ in range(cg_steps):
+        lhs_direction = apply_lhs(direction)
+        denom = np.einsum("nf,nf->n", direction, lhs_direction)
+        step = np.divide(rs_old, denom, out=np.zeros_like(rs_old), where=denom > 0)
+        solved += step[:, None] * direction
+        residual -= step[:, None] * lhs_direction
+        rs_new = np.einsum("nf,nf->n", residual, residual)
+        beta = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 0)
+        direction = residual + beta[:, None] * direction
+        rs_old = rs_new
+    return solved
+
+
+def train_als(
+    weights: sparse.csr_matrix,
+    factors: int = settings.ALS_FACTORS,
+    iterations: int = settings.ALS_ITERATIONS,
+    reg: float = settings.ALS_REGULARIZATION,
+    alpha: float = settings.ALS_ALPHA,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """ユーザー因子 (n_users, factors) と商品因子 (n_items, factors) を返す"""
+    rng = np.random.default_rng(seed)
+    weights_t = weights.T.tocsr()
+    user_factors = rng.normal(scale=0.01, size=(weights.shape[0], factors))
+    item_factors = rng.normal(scale=0.01, size=(weights.shape[1], factors))
+    for _ in range(iterations):
+        user_factors = _least_squares(weights, user_factors, item_factors, reg, alpha)
+        item_factors = _least_squares(weights_t, item_factors, user_factors, reg, alpha)
+    return user_factors, item_factors
+
+
+def recommend_top_k(
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    exclude: sparse.csr_matrix,
+    candidates: np.ndarray,
+    k: int,
+    chunk_size: int = 1024,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    全ユーザーの上位 k 件を返す: ユーザー行番号 -> [(商品列番号, スコア), ...]
+    exclude: 除外する (ユーザー, 商品)（行動済み・自分の出品など）
+    candidates: おすすめしてよい商品の列番号（販売中のもの）
+    """
+    result: Dict[int, List[Tuple[int, float]]] = {}
+    if len(candidates) == 0 or k <= 0:
+        return result
+    candidate_factors = item_factors[candidates]
+    # 商品列番号 -> 候補内の位置（候補外は -1）
+    position = np.full(item_factors.shape[0], -1, dtype=np.int64)
+    position[candidates] = np.arange(len(candidates))
+    k = min(k, len(candidates))
+
+    for start in range(0, user_factors.shape[0], chunk_size):
+        stop = min(start + chunk_size, user_factors.shape[0])
+        scores = user_factors[start:stop] @ candidate_factors.T
+
+        # 行動済みの商品は -inf にして選ばれないようにする
+        block = exclude[start:stop].tocoo()
+        pos = position[block.col]
+        keep = pos >= 0
+        scores[block.row[keep], pos[keep]] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for offset in range(stop - start):
+            result[start + offset] = [
+                (int(candidates[c]), float(s))
+                for c, s in zip(top[offset], top_scores[offset])
+                if np.isfinite(s)
+            ]
+    return result
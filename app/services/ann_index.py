@@ -0,0 +1,250 @@
+# hackathon-backend/app/services/ann_index.py
+"""
+類似商品の近似最近傍探索 (ANN) インデックス
+
+数百万件規模で「1行 x 全商品」の厳密計算が重くなった時に使う。
+- TF-IDF 疎行列をランダム射影で低次元 (RECOMMEND_ANN_DIM) の密ベクトルに落とす
+- 球面 k-means でクラスタに分け、クラスタ順に並べたベクトルを保存する (IVF)
+- 検索時はターゲットに近いクラスタを nprobe 個だけ調べる
+  nprobe を上げるほど再現率が上がり、遅くなる（RECOMMEND_ANN_NPROBE で調整）
+
+ファイルはディレクトリに .npy で保存し、np.load(mmap_mode="r") で開くため、
+同じマシン上の複数の uvicorn ワーカーは OS のページキャッシュ上の1コピーを共有する。
+差し替えは新しいサブディレクトリに書き出してから CURRENT ファイルを置き換える（atomic）。
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.core.config import settings
+
+CURRENT_FILE = "CURRENT"
+# 古い版はこの数だけ残す（読み込み中のワーカーがいても壊れないように）
+KEEP_VERSIONS = 2
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def project(matrix: sparse.csr_matrix, dim: int, seed: int = 0, chunk_size: int = 65536) -> np.ndarray:
+    """疎行列をガウス乱数行列で dim 次元に射影し、L2 正規化した float32 配列を返す"""
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((matrix.shape[1], dim), dtype=np.float32)
+    reduced = np.empty((matrix.shape[0], dim), dtype=np.float32)
+    for start in range(0, matrix.shape[0], chunk_size):
+        block = matrix[start : start + chunk_size]
+        reduced[start : start + chunk_size] = _normalize(np.asarray(block @ projection, dtype=np.float32))
+    return reduced
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """各ベクトルを内積が最大のクラスタに割り当てる"""
+    labels = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], chunk_size):
+        labels[start : start + chunk_size] = np.argmax(
+            vectors[start : start + chunk_size] @ centroids.T, axis=1
+        )
+    return labels
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, n_lists: int, iterations: int = 10, sample_size: int = 100_000, seed: int = 0
+) -> np.ndarray:
+    """正規化済みベクトルの球面 k-means。サンプルで学習したクラスタ中心を返す"""
+    rng = np.random.default_rng(seed)
+    if vectors.shape[0] > sample_size:
+        sample = vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+    else:
+        sample = vectors
+    centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        # one-hot 疎行列との積でクラスタごとの和を一度に計算する
+        one_hot = sparse.csr_matrix(
+            (np.ones(sample.shape[0], dtype=np.float32), (labels, np.arange(sample.shape[0]))),
+            shape=(n_lists, sample.shape[0]),
+        )
+        sums = np.asarray(one_hot @ sample)
+        empty = np.flatnonzero(np.asarray(one_hot.sum(axis=1)).ravel() == 0)
+        if len(empty):
+            # 空になったクラスタはランダムな点で置き直す
+            sums[empty] = sample[rng.choice(sample.shape[0], len(empty), replace=False)]
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+
+def build_ann_index(
+    matrix: sparse.csr_matrix,
+    item_ids: List[str],
+    out_dir: str,
+    dim: int = settings.RECOMMEND_ANN_DIM,
+    n_lists: Optional[int] = None,
+    seed: int = 0,
+) -> str:
+    """
+    L2 正規化済み TF-IDF 行列から IVF インデックスを作り、out_dir に新しい版として保存する
+    Returns: 書き出したサブディレクトリのパス
+    """
+    n_items = matrix.shape[0]
+    if n_lists is None:
+        n_lists = max(1, int(np.sqrt(n_items)))
+    n_lists = min(n_lists, n_items)
+
+    # 1. 次元削減 + クラスタリング
+    vectors = project(matrix, dim, seed=seed)
+    centroids = spherical_kmeans(vectors, n_lists, seed=seed)
+    labels = _assign(vectors, centroids)
+
+    # 2. クラスタ順に並べ替え（各クラスタのベクトルが連続領域になる）
+    order = np.argsort(labels, kind="stable")
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+    ids = np.array(item_ids, dtype=np.bytes_)[order]
+
+    # 3. 商品IDから位置を二分探索で引くための索引
+    sorted_order = np.argsort(ids)
+
+    # 同じ秒に複数回構築しても既存の版（他ワーカーがメモリマップ中）を上書きしないようにする
+    version = time.strftime("%Y%m%d%H%M%S") + f"-{time.time_ns() % 10**9:09d}"
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    np.save(os.path.join(version_dir, "vectors.npy"), vectors[order])
+    np.save(os.path.join(version_dir, "centroids.npy"), centroids)
+    np.save(os.path.join(version_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(version_dir, "ids.npy"), ids)
+    np.save(os.path.join(version_dir, "sorted_ids.npy"), ids[sorted_order])
+    np.save(os.path.join(version_dir, "sorted_positions.npy"), sorted_order.astype(np.int64))
+    with open(os.path.join(version_dir, "meta.json"), "w") as f:
+        json.dump({"n_items": n_items, "dim": dim, "n_lists": n_lists, "seed": seed}, f)
+
+    # 4. CURRENT を置き換えて公開し、古い版を掃除する
+    tmp_path = os.path.join(out_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(out_dir, CURRENT_FILE))
+
+    versions = sorted(
+        name for name in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, name))
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+
+    print(f"[ann_index] built {version}: items={n_items}, lists={n_lists}, dim={dim}")
+    return version_dir
+
+
+class AnnIndex:
+    """保存済み IVF インデックス（メモリマップで読み込む）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.vectors = load("vectors.npy")
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.ids = load("ids.npy")
+        self.sorted_ids = load("sorted_ids.npy")
+        self.sorted_positions = load("sorted_positions.npy")
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def position(self, item_id: str) -> Optional[int]:
+        key = item_id.encode()
+        i = int(np.searchsorted(self.sorted_ids, key))
+        if i < len(self.sorted_ids) and self.sorted_ids[i] == key:
+            return int(self.sorted_positions[i])
+        return None
+
+    def search(
+        self, item_id: str, k: int, nprobe: int = settings.RECOMMEND_ANN_NPROBE
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        item_id に近い商品を近似的に探す（自分自身は除く）
+        インデックスにない商品（構築後の新規出品など）は None を返すので、呼び出し側で厳密計算に切り替える
+        """
+        pos = self.position(item_id)
+        if pos is None:
+            return None
+        query = np.asarray(self.vectors[pos])
+
+        # 1. ターゲットに近いクラスタを nprobe 個選ぶ
+        n_lists = len(self.centroids)
+        nprobe = max(1, min(nprobe, n_lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        # 2. 選んだクラスタ内だけを内積で採点（各クラスタは連続領域なのでコピーなしで読める）
+        rows = []
+        scores = []
+        for cluster in probe:
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if start == end:
+                continue
+            rows.append(np.arange(start, end))
+            scores.append(self.vectors[start:end] @ query)
+        if not rows:
+            return []
+        rows = np.concatenate(rows)
+        scores = np.concatenate(scores)
+        scores[rows == pos] = -np.inf
+
+        # 3. 上位 k 件を部分選択
+        k = min(k, len(rows) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[rows[i]].decode(), float(scores[i])) for i in top]
+
+
+# --- ディスク上の最新版を開く（ワーカー内でキャッシュ） ---
+
+# base_dir -> (開いているインデックス, その版, 最後に CURRENT を確認した時刻)
+_loaded: Dict[str, Tuple[AnnIndex, str, float]] = {}
+_load_lock = threading.Lock()
+
+
+def load_ann_index(
+    base_dir: str = settings.RECOMMEND_ANN_DIR, check_interval: int = 60
+) -> Optional[AnnIndex]:
+    """
+    base_dir の CURRENT が指す版を開いて返す（未構築なら None）
+    check_interval 秒ごとに CURRENT を確認し、新しい版があれば開き直す
+    """
+    if not base_dir:
+        return None
+
+    now = time.monotonic()
+    cached = _loaded.get(base_dir)
+    if cached is not None and now - cached[2] < check_interval:
+        return cached[0]
+
+    with _load_lock:
+        try:
+            with open(os.path.join(base_dir, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if cached is not None and cached[1] == version:
+            _loaded[base_dir] = (cached[0], version, now)
+            return cached[0]
+        try:
+            index = AnnIndex(os.path.join(base_dir, version))
+        except Exception as e:
+            print(f"[ann_index] load failed: {e}")
+            return cached[0] if cached is not None else None
+        _loaded[base_dir] = (index, version, now)
+        print(f"[ann_index] loaded {version}: items={len(index)}")
+        return index
@@ -0,0 +1,35 @@
+# hackathon-backend/app/services/background_sync.py
+"""
+プロセス内インデックスの定期同期（バックグラウンドのスレッド）
+
+入力補完・検索の転置インデックスが他ワーカーの変更を DB から取り込む処理を、リクエストの外で
+interval 秒ごとに行う（1打鍵ごとの補完や検索のリクエストに、全件の読み込みを負わせない）。
+スレッドはデーモンなので、プロセスの終了を待たせない。
+"""
+
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+
+def start(name: str, interval: float, sync: Callable[[Session], None], session_factory) -> threading.Thread:
+    """interval 秒ごとに、専用のセッションで sync(db) を呼ぶスレッドを起動する"""
+
+    def run() -> None:
+        while True:
+            time.sleep(interval)
+            db = session_factory()
+            try:
+                sync(db)
+            except Exception as e:
+                # 次の周期で再試行する
+                db.rollback()
+                print(f"[{name}] background sync failed: {e}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=run, name=f"{name}-sync", daemon=True)
+    thread.start()
+    return thread
@@ -8,6 +8,8 @@ from sqlalchemy.orm import Session
 from typing import Any, Dict, List, Optional
 
 from app.db import models
+from app.services import price_stats
+from app.services.search_service import search_service
 
 
 # --- Function定義 (Gemini Tool Schema) ---
@@ -28,6 +30,14 @@ FUNCTION_DECLARATIONS = [
                     type=types.Type.STRING,
                     description="カテゴリで絞り込む場合（任意）",
                 ),
+                "min_price": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="最低価格（円）で絞り込む場合（任意）",
+                ),
+                "max_price": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="最高価格（円）で絞り込む場合（任意）",
+                ),
             },
             required=["query"],
         ),
@@ -173,25 +183,22 @@ class FunctionExecutor:
     
     # --- ショッピング関連 ---
     
-    def _exec_search_items(self, query: str, category: str = None) -> Dict[str, Any]:
-        """商品検索"""
-        q = self.db.query(models.Item).filter(models.Item.status == "on_sale")
-        
-        # キーワード検索
-        if query:
-            keywords = query.replace("　", " ").split()
-            for kw in keywords:
-                if not kw: continue
-                q = q.filter(
-                    models.Item.name.ilike(f"%{kw}%") |
-                    models.Item.description.ilike(f"%{kw}%")
-                )
-        
-        # カテゴリ絞り込み
-        if category:
-            q = q.filter(models.Item.category == category)
-        
-        items = q.limit(5).all()
+    def _exec_search_items(
+        self,
+        query: str,
+        category: str = None,
+        min_price: int = None,
+        max_price: int = None,
+    ) -> Dict[str, Any]:
+        """商品検索（/search/items と同じ SearchService、関連度順に上位5件）"""
+        items = search_service.search(
+            self.db,
+            query,
+            limit=5,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+        ).items
         
         return {
             "action": "search_items",
@@ -323,7 +330,7 @@ class FunctionExecutor:
     def _exec_get_recommendations(self, keyword: str = None) -> Dict[str, Any]:
         """おすすめ生成（ユーザー活動履歴ベース）"""
         from sqlalchemy.orm import joinedload
-        from app.services import recommend_service
+        from app.services import neighbor_service, user_recommend_service
         
         user = self.db.query(models.User).filter(
             models.User.firebase_uid == self.user_id
@@ -346,7 +353,15 @@ class FunctionExecutor:
             recommended_items = items
             reason = f"「{keyword}」に関連する商品"
         
-        # 2. いいねした商品から類似商品を探す
+        # 2. 行動履歴から学習したユーザー別おすすめ（バッチで事前計算済み）
+        if not recommended_items:
+            recommended_items = user_recommend_service.get_user_recommended_items(
+                self.db, self.user_id, limit=5
+            )
+            if recommended_items:
+                reason = "あなたのいいね・購入履歴から選んだおすすめ商品"
+        
+        # 3. いいねした商品から類似商品を探す
         if not recommended_items:
             liked_item = (
                 self.db.query(models.Item)
@@ -356,12 +371,12 @@ class FunctionExecutor:
                 .first()
             )
             if liked_item:
-                recommended_items = recommend_service.get_recommendations(
+                recommended_items = neighbor_service.get_neighbor_items(
                     self.db, liked_item.item_id, limit=5
                 )
                 reason = f"お気に入りの「{liked_item.name}」に似た商品"
         
-        # 3. 購入履歴から類似商品を探す
+        # 4. 購入履歴から類似商品を探す
         if not recommended_items:
             purchase = (
                 self.db.query(models.Transaction)
@@ -371,12 +386,12 @@ class FunctionExecutor:
                 .first()
             )
             if purchase and purchase.item:
-                recommended_items = recommend_service.get_recommendations(
+                recommended_items = neighbor_service.get_neighbor_items(
                     self.db, purchase.item.item_id, limit=5
                 )
                 reason = f"購入した「{purchase.item.name}」に似た商品"
         
-        # 4. コメント履歴から関心のあるカテゴリを探す
+        # 5. コメント履歴から関心のあるカテゴリを探す
         if not recommended_items:
             comment = (
                 self.db.query(models.Comment)
@@ -400,7 +415,7 @@ class FunctionExecutor:
                 recommended_items = items
                 reason = f"興味のある「{category}」カテゴリの商品"
         
-        # 5. フォールバック: 人気商品（いいね数順）
+        # 6. フォールバック: 人気商品（いいね数順）
         if not recommended_items:
             items = (
                 self.db.query(models.Item)
@@ -445,17 +460,10 @@ class FunctionExecutor:
     # --- 出品サポート ---
     
     def _exec_suggest_price(self, name: str, category: str = None, condition: str = None) -> Dict[str, Any]:
-        """価格提案（類似商品の平均価格を計算）"""
-        q = self.db.query(models.Item).filter(
-            models.Item.name.ilike(f"%{name}%")
-        )
+        """価格提案（相場の集計 price_stats から中央値と価格帯を引く）"""
+        market = price_stats.market_price(self.db, name, category=category, condition=condition)
         
-        if category:
-            q = q.filter(models.Item.category == category)
-        
-        similar_items = q.limit(10).all()
-        
-        if not similar_items:
+        if not market:
             return {
                 "action": "suggest_price",
                 "name": name,
@@ -463,17 +471,14 @@ class FunctionExecutor:
                 "message": "類似商品が見つかりませんでした。",
             }
         
-        prices = [item.price for item in similar_items if item.price]
-        avg_price = sum(prices) // len(prices) if prices else 0
-        min_price = min(prices) if prices else 0
-        max_price = max(prices) if prices else 0
-        
         return {
             "action": "suggest_price",
             "name": name,
-            "suggested_price": avg_price,
-            "price_range": {"min": min_price, "max": max_price},
-            "sample_count": len(similar_items),
+            "suggested_price": market["suggested_price"],
+            "price_range": market["price_range"],
+            "sample_count": market["count"],
+            "basis": market["basis"],
+            "percentiles": market["percentiles"],
         }
     
     
@@ -0,0 +1,149 @@
+# hackathon-backend/app/services/item_detail_cache.py
+"""
+商品詳細 (GET /items/{item_id}) のレスポンスのキャッシュ（プロセス内、LRU + TTL）
+
+シリアライズ済みの JSON と ETag を商品IDごとに持ち、ヒットすれば DB を読まずに返す。
+- 無効化: 商品詳細が変わる書き込み（購入・いいね・コメント・カウンタの修正）は、同じトランザクションで
+  cache_invalidations に商品IDを書き、コミットした後で自分のワーカーのキャッシュからも外す (evict)
+- ワーカー間の通知: 各ワーカーは ITEM_DETAIL_CACHE_POLL_SECONDS ごとに cache_invalidations の
+  前回の続きを読み、その商品を外す。後からコミットされた小さい id を拾うため、少し前から読み直す
+- TTL を過ぎたものも捨てる（出品者名の変更など、無効化ログに載らない変更の上限）
+"""
+
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.search_service import LRUCache
+
+# 無効化ログを前回の位置からこの件数だけ前から読み直す（id の採番とコミットの順が前後した分を拾う）
+POLL_OVERLAP = 100
+# 無効化ログに残す件数。これより遅れたワーカーは、取りこぼしがありうるのでキャッシュを全部捨てる
+INVALIDATION_LOG_SIZE = 10000
+# 古い無効化ログを消す間隔（秒）
+PRUNE_INTERVAL_SECONDS = 60
+
+
+class ItemDetailCache:
+    def __init__(
+        self,
+        ttl_seconds: int = settings.ITEM_DETAIL_CACHE_TTL_SECONDS,
+        max_entries: int = settings.ITEM_DETAIL_CACHE_SIZE,
+        poll_interval: float = settings.ITEM_DETAIL_CACHE_POLL_SECONDS,
+    ):
+        self.cache = LRUCache(ttl_seconds, max_entries)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # 読み終えた無効化ログの位置と、読み直す範囲のうち処理済みの id
+        self._last_seen: Optional[int] = None
+        self._applied: Set[int] = set()
+        self._last_poll = 0.0
+        self._last_prune = 0.0
+        self.polls = 0
+        self.polled_invalidations = 0
+
+    # --- 読み書き ---
+
+    def get(self, item_id: str) -> Optional[Tuple[str, bytes]]:
+        """(ETag, JSON) を返す。なければ None"""
+        return self.cache.get(item_id)
+
+    def put(self, item_id: str, etag: str, body: bytes) -> None:
+        self.cache.put(item_id, (etag, body))
+
+    def invalidate(self, db: Session, item_id: str) -> None:
+        """
+        商品詳細が変わったことを記録する（呼び出し側のトランザクションでコミットされる）
+        自分のワーカーのキャッシュは、コミットした後で呼び出し側が evict で外す
+        （コミット前に外すと、同時に来た GET が古い内容を入れ直してしまう）
+        """
+        db.add(models.CacheInvalidation(item_id=item_id))
+
+    def evict(self, item_id: str) -> None:
+        """自分のワーカーのキャッシュから外す（invalidate したトランザクションをコミットした後に呼ぶ）"""
+        self.cache.pop(item_id)
+
+    # --- 他ワーカーの無効化の取り込み ---
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """前回の続きから無効化ログを読み、その商品をキャッシュから外す（poll_interval ごと）"""
+        if not self.cache.enabled:
+            return
+        if not force and time.monotonic() - self._last_poll < self.poll_interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_poll < self.poll_interval:
+                return
+            self._last_poll = now
+            self.polls += 1
+
+            # 1. 初回は今の末尾から読み始める（まだ何もキャッシュしていない）
+            if self._last_seen is None:
+                self._last_seen = db.query(func.max(models.CacheInvalidation.id)).scalar() or 0
+                return
+
+            # 2. 前回の位置の少し前から読み、まだ処理していない行の商品を外す
+            start = self._last_seen - POLL_OVERLAP
+            rows = (
+                db.query(models.CacheInvalidation.id, models.CacheInvalidation.item_id)
+                .filter(models.CacheInvalidation.id > start)
+                .order_by(models.CacheInvalidation.id)
+                .limit(INVALIDATION_LOG_SIZE)
+                .all()
+            )
+            if len(rows) >= INVALIDATION_LOG_SIZE:
+                # 読み切れないほど遅れた（ログが消えている可能性もある）ので全部捨てる
+                print(f"[item_detail_cache] fell behind the invalidation log; clearing {len(self.cache)} entries")
+                self.cache.clear()
+                self._applied.clear()
+                self._last_seen = db.query(func.max(models.CacheInvalidation.id)).scalar() or 0
+                return
+            for row_id, item_id in rows:
+                if row_id not in self._applied:
+                    self._applied.add(row_id)
+                    self.cache.pop(item_id)
+                    self.polled_invalidations += 1
+            if rows:
+                self._last_seen = max(self._last_seen, rows[-1][0])
+            start = self._last_seen - POLL_OVERLAP
+            self._applied = {row_id for row_id in self._applied if row_id > start}
+
+            # 3. 古い無効化ログをときどき消す（どのワーカーが消しても同じ結果）
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._last_prune = now
+                self._prune(db)
+
+    def _prune(self, db: Session) -> None:
+        """古い無効化ログを消す（GET のリクエストのセッションをコミットしないよう、専用のセッションで）"""
+        try:
+            with Session(bind=db.get_bind()) as prune_db:
+                prune_db.execute(
+                    delete(models.CacheInvalidation).where(
+                        models.CacheInvalidation.id <= self._last_seen - INVALIDATION_LOG_SIZE
+                    )
+                )
+                prune_db.commit()
+        except Exception as e:
+            print(f"[item_detail_cache] prune failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "polls": self.polls,
+            "polled_invalidations": self.polled_invalidations,
+            "last_seen_invalidation": self._last_seen,
+        }
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+# プロセス全体で共有するキャッシュ
+item_detail_cache = ItemDetailCache()
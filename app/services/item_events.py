@@ -0,0 +1,38 @@
+# hackathon-backend/app/services/item_events.py
+"""
+商品の変更をプロセス内のインデックスへ伝える
+
+出品・購入などのエンドポイントは item_saved / item_removed を呼ぶだけにして、
+類似商品インデックス・検索インデックスなどの購読者には subscribe で登録してもらう。
+購読者の失敗は print して握りつぶす（本体の処理は既にコミット済みのため）。
+他ワーカーでの変更は、各インデックスが定期的に DB と同期して取り込む。
+"""
+
+from typing import List
+
+
+_subscribers: List[object] = []
+
+
+def subscribe(subscriber) -> None:
+    """upsert(item) と remove(item_id) を持つオブジェクトを登録する"""
+    if subscriber not in _subscribers:
+        _subscribers.append(subscriber)
+
+
+def item_saved(item) -> None:
+    """商品が出品・編集された"""
+    for subscriber in _subscribers:
+        try:
+            subscriber.upsert(item)
+        except Exception as e:
+            print(f"[item_events] {type(subscriber).__name__}.upsert failed: {e}")
+
+
+def item_removed(item_id: str) -> None:
+    """商品が売り切れ・削除された"""
+    for subscriber in _subscribers:
+        try:
+            subscriber.remove(item_id)
+        except Exception as e:
+            print(f"[item_events] {type(subscriber).__name__}.remove failed: {e}")
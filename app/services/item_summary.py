@@ -0,0 +1,118 @@
+# hackathon-backend/app/services/item_summary.py
+"""
+商品一覧用の軽量な読み込み
+
+一覧（新着・出品した商品・いいね・コメントした商品）は、一覧に表示するカラムと出品者名だけを
+items と users の1回の JOIN で読む。ORM の Item / Comment は作らず、コメント一覧も返さないので、
+1ページあたりのクエリ数とレスポンスの大きさが商品の件数・コメントの数によらず一定になる。
+詳細画面（コメント付き）は今まで通り GET /items/{item_id} を使う。
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.db import models
+
+
+@dataclass(frozen=True)
+class SummarySeller:
+    """
+    一覧に表示する出品者（ID は DM 用）
+    アイコン・評価は一覧では読まない。既定値はレスポンスの SellerInfo と同じ形にするためのもの
+    """
+
+    id: Optional[int]
+    firebase_uid: Optional[str]
+    username: Optional[str]
+    icon_url: Optional[str] = None
+    average_rating: Optional[float] = 0.0
+    rating_count: Optional[int] = 0
+
+
+@dataclass(frozen=True)
+class ItemSummary:
+    """一覧に表示する商品（説明文・コメントは含まない）"""
+
+    item_id: str
+    name: str
+    price: int
+    image_url: Optional[str]
+    status: str
+    is_instant_buy_ok: bool
+    category: str
+    brand: Optional[str]
+    condition: str
+    seller: SummarySeller
+    like_count: int
+    comment_count: int
+    created_at: Optional[datetime]
+
+
+# summary_query で読むカラム（この順で ItemSummary を作る。id はページングのカーソル用）
+SUMMARY_COLUMNS = (
+    models.Item.id,
+    models.Item.item_id,
+    models.Item.name,
+    models.Item.price,
+    models.Item.image_url,
+    models.Item.status,
+    models.Item.is_instant_buy_ok,
+    models.Item.category,
+    models.Item.brand,
+    models.Item.condition,
+    models.Item.seller_id,
+    models.User.id.label("seller_user_id"),
+    models.User.username,
+    models.Item.like_count,
+    models.Item.comment_count,
+    models.Item.created_at,
+)
+
+
+def summary_query(db: Session) -> Query:
+    """一覧のカラムと出品者名を読むクエリ（絞り込み・並び順は呼び出し側で付ける）"""
+    return db.query(*SUMMARY_COLUMNS).outerjoin(
+        models.User, models.Item.seller_id == models.User.firebase_uid
+    )
+
+
+def to_summaries(rows) -> List[ItemSummary]:
+    """summary_query の結果を ItemSummary にする"""
+    return [
+        ItemSummary(
+            item_id=item_id,
+            name=name,
+            price=price,
+            image_url=image_url,
+            status=status,
+            is_instant_buy_ok=bool(is_instant_buy_ok),
+            category=category,
+            brand=brand,
+            condition=condition,
+            seller=SummarySeller(seller_user_id, seller_id, username),
+            like_count=like_count or 0,
+            comment_count=comment_count or 0,
+            created_at=created_at,
+        )
+        for (
+            _id,
+            item_id,
+            name,
+            price,
+            image_url,
+            status,
+            is_instant_buy_ok,
+            category,
+            brand,
+            condition,
+            seller_id,
+            seller_user_id,
+            username,
+            like_count,
+            comment_count,
+            created_at,
+        ) in rows
+    ]
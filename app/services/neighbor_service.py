@@ -0,0 +1,119 @@
+# hackathon-backend/app/services/neighbor_service.py
+"""
+類似商品（item_neighbors）の読み出し
+バッチ (app/jobs/build_item_neighbors.py) が事前計算した結果を1クエリで返すだけなので、
+Webワーカーでは TF-IDF の計算や関連ライブラリの読み込みを行わない。
+"""
+
+from typing import Dict, List
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.core.config import settings
+
+
+def get_neighbor_items(
+    db: Session, item_id: str, limit: int = settings.RECOMMEND_ITEM_COUNT
+) -> List[models.Item]:
+    """
+    事前計算済みの類似商品を順位順に返す（販売中のもののみ）
+    まだバッチで計算されていない商品（出品直後など）は、同じカテゴリの新着商品で代用する
+    """
+    items = (
+        db.query(models.Item)
+        .join(models.ItemNeighbor, models.ItemNeighbor.neighbor_item_id == models.Item.item_id)
+        .options(joinedload(models.Item.seller))
+        .filter(
+            models.ItemNeighbor.item_id == item_id,
+            models.Item.status == "on_sale",
+        )
+        .order_by(models.ItemNeighbor.rank)
+        .limit(limit)
+        .all()
+    )
+    if items:
+        return items
+
+    # フォールバック: 同じカテゴリの新着商品
+    target = db.query(models.Item).filter(models.Item.item_id == item_id).first()
+    if target is None or target.status != "on_sale":
+        return []
+    return _newest_in_category(db, target.category, {item_id}, limit)
+
+
+def _newest_in_category(db: Session, category: str, exclude_ids, limit: int) -> List[models.Item]:
+    """同じカテゴリの販売中の新着商品（exclude_ids を除く）"""
+    query = (
+        db.query(models.Item)
+        .options(joinedload(models.Item.seller))
+        .filter(models.Item.status == "on_sale", models.Item.category == category)
+    )
+    if exclude_ids:
+        query = query.filter(models.Item.item_id.notin_(list(exclude_ids)))
+    return query.order_by(models.Item.created_at.desc()).limit(limit).all()
+
+
+def get_batch_neighbor_items(
+    db: Session, item_ids: List[str], limit: int = settings.RECOMMEND_ITEM_COUNT, exclude=()
+) -> Dict[str, List[models.Item]]:
+    """
+    複数の商品それぞれの類似商品をまとめて返す: 商品ID -> 商品リスト（カルーセル用）
+    get_neighbor_items と同じ item_neighbors の順位を、全シード分1クエリで読む。
+    - シード自身と exclude（表示済みの商品など）は含めない
+    - 同じ商品は1つのシードにだけ割り当てる（順位の高い順に、シードを交互に埋める）
+    - 1シードの件数は item_neighbors に保存した件数（ITEM_NEIGHBOR_COUNT）まで
+    - まだバッチで計算されていないシードは、同じカテゴリの新着商品で代用する
+    """
+    seeds = list(dict.fromkeys(item_ids))
+    result: Dict[str, List[models.Item]] = {item_id: [] for item_id in seeds}
+    if limit <= 0:
+        return result
+    used = set(seeds) | set(exclude)
+
+    # 1. 全シードの類似商品を順位順に読む（販売中のみ）
+    rows = (
+        db.query(models.ItemNeighbor.item_id, models.Item)
+        .join(models.Item, models.ItemNeighbor.neighbor_item_id == models.Item.item_id)
+        .options(joinedload(models.Item.seller))
+        .filter(
+            models.ItemNeighbor.item_id.in_(seeds),
+            models.Item.status == "on_sale",
+        )
+        .order_by(models.ItemNeighbor.rank)
+        .all()
+    )
+    ranked: Dict[str, List[models.Item]] = {item_id: [] for item_id in seeds}
+    for seed_id, item in rows:
+        ranked[seed_id].append(item)
+
+    # 2. 未計算のシードは同じカテゴリの新着商品を候補にする（販売中でないシードは空のまま）
+    missing = [item_id for item_id in seeds if not ranked[item_id]]
+    if missing:
+        categories = dict(
+            db.query(models.Item.item_id, models.Item.category).filter(
+                models.Item.item_id.in_(missing), models.Item.status == "on_sale"
+            )
+        )
+        for item_id, category in categories.items():
+            ranked[item_id] = _newest_in_category(db, category, used, limit * len(seeds))
+
+    # 3. 順位ごとにシードを順番に回して割り当てる（重複・除外対象は飛ばす）
+    cursors = {item_id: 0 for item_id in seeds}
+    active = [item_id for item_id in seeds if ranked[item_id]]
+    while active:
+        for item_id in list(active):
+            candidates = ranked[item_id]
+            cursor = cursors[item_id]
+            while cursor < len(candidates) and candidates[cursor].item_id in used:
+                cursor += 1
+            if cursor >= len(candidates):
+                active.remove(item_id)
+                continue
+            item = candidates[cursor]
+            used.add(item.item_id)
+            result[item_id].append(item)
+            cursors[item_id] = cursor + 1
+            if len(result[item_id]) >= limit:
+                active.remove(item_id)
+    return result
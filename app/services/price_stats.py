@@ -0,0 +1,288 @@
+# hackathon-backend/app/services/price_stats.py
+"""
+相場（価格の統計）の集計と参照
+
+出品中・売却済みの商品の価格を、次のキーごとに「価格帯（対数で等間隔のバケット）ごとの件数と合計」として
+price_stats テーブルに持つ。
+- name:<商品名> / token:<商品名の単語> / category_token:<カテゴリ + 単語>
+- brand:<ブランド> / category:<カテゴリ> / category_condition:<カテゴリ + 状態>
+出品で on_sale に +1、購入で on_sale から sold へ移す（どちらも1行ずつの UPDATE で、出品・購入と同じトランザクションで反映する）。
+相場の参照はキーを絞った1回のクエリで、件数・平均・分位点・ヒストグラムはバケットから計算する。
+全件の数え直しは app/jobs/rebuild_price_stats.py。
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.search_index import normalize
+
+# 価格帯: バケット0は100円未満、以降は 100円 x 10^(0.1 x i) ずつ（約26%刻み）。最後のバケットは上限なし
+BUCKETS_PER_DECADE = 10
+NUM_BUCKETS = 61
+# 商品名から取る単語の数の上限
+MAX_NAME_TOKENS = 6
+# 相場に出す分位点
+PERCENTILES = (10, 25, 50, 75, 90)
+# 状態による補正の上下限（相場の中央値に掛ける）
+CONDITION_FACTOR_RANGE = (0.7, 1.2)
+
+STATUSES = ("on_sale", "sold")
+# 絞り込みの細かい順（上から順に、件数が足りるキーを使う）
+BASIS_ORDER = ("name", "category_token", "token", "brand", "category")
+
+
+def bucket_of(price: int) -> int:
+    if price < 100:
+        return 0
+    return min(int(math.log10(price / 100) * BUCKETS_PER_DECADE) + 1, NUM_BUCKETS - 1)
+
+
+def bucket_bounds(bucket: int) -> Tuple[float, Optional[float]]:
+    """バケットの [下限, 上限)。最後のバケットの上限は None"""
+    lower = 0.0 if bucket == 0 else 100 * 10 ** ((bucket - 1) / BUCKETS_PER_DECADE)
+    upper = None if bucket == NUM_BUCKETS - 1 else 100 * 10 ** (bucket / BUCKETS_PER_DECADE)
+    return lower, upper
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """商品名を正規化して空白で区切った単語（2文字以上、数字・記号だけのものは除く）"""
+    tokens = []
+    for token in normalize(name).split():
+        if len(token) >= 2 and any(ch.isalpha() for ch in token) and token not in tokens:
+            tokens.append(token)
+    return tokens[:MAX_NAME_TOKENS]
+
+
+def _key(kind: str, value: str = "") -> str:
+    return f"{kind}:{value}"[:255]
+
+
+def stat_keys(name, category=None, condition=None, brand=None) -> Dict[str, List[str]]:
+    """商品（または問い合わせ）の 絞り込みの種類 -> キー"""
+    category = normalize(category).strip()
+    brand = normalize(brand).strip()
+    condition = normalize(condition).strip()
+    tokens = name_tokens(name)
+    keys = {
+        "name": [_key("name", " ".join(normalize(name).split()))] if (name or "").strip() else [],
+        "category_token": [_key("category_token", f"{category}\x1f{t}") for t in tokens] if category else [],
+        "token": [_key("token", t) for t in tokens],
+        "brand": [_key("brand", brand)] if brand else [],
+        "category": [_key("category", category)] if category else [],
+        "category_condition": (
+            [_key("category_condition", f"{category}\x1f{condition}")] if category and condition else []
+        ),
+    }
+    return keys
+
+
+def _item_keys(item) -> List[str]:
+    keys = stat_keys(item.name, item.category, item.condition, item.brand)
+    return [key for kind_keys in keys.values() for key in kind_keys]
+
+
+# --- 集計の更新 ---
+
+
+def apply_changes(db: Session, changes: Dict[Tuple[str, str, int], Tuple[int, int]]) -> None:
+    """(キー, 状態, バケット) -> (件数の増減, 価格の合計の増減) を反映する（コミットは呼び出し側）"""
+    table = models.PriceStat
+    # 複数ワーカーで同じ行を更新してもデッドロックしないよう、行の順番を揃える
+    for (stat_key, status, bucket), (count, price_sum) in sorted(changes.items()):
+        if count == 0 and price_sum == 0:
+            continue
+        where = and_(table.stat_key == stat_key, table.status == status, table.bucket == bucket)
+        statement = update(table).where(where).values(
+            count=table.count + count, price_sum=table.price_sum + price_sum
+        )
+        if db.execute(statement).rowcount:
+            continue
+        # まだ行がなければ作る（同時に作られたら UPDATE し直す）
+        try:
+            with db.begin_nested():
+                db.add(
+                    table(stat_key=stat_key, status=status, bucket=bucket, count=count, price_sum=price_sum)
+                )
+        except IntegrityError:
+            db.execute(statement)
+
+
+def _changes_for(item, status: str, sign: int) -> Dict[Tuple[str, str, int], Tuple[int, int]]:
+    price = item.price or 0
+    bucket = bucket_of(price)
+    return {(key, status, bucket): (sign, sign * price) for key in _item_keys(item)}
+
+
+def item_listed(db: Session, item) -> None:
+    """出品された商品を出品中の相場に足す（コミットは呼び出し側）"""
+    apply_changes(db, _changes_for(item, "on_sale", 1))
+
+
+def item_sold(db: Session, item) -> None:
+    """購入された商品を出品中から売却済みの相場へ移す（コミットは呼び出し側）"""
+    changes = _changes_for(item, "on_sale", -1)
+    changes.update(_changes_for(item, "sold", 1))
+    apply_changes(db, changes)
+
+
+def count_items(items: Iterable) -> Dict[Tuple[str, str, int], Tuple[int, int]]:
+    """商品（name, category, condition, brand, price, status を持つもの）をまとめて数える"""
+    totals: Dict[Tuple[str, str, int], List[int]] = defaultdict(lambda: [0, 0])
+    for item in items:
+        if item.status not in STATUSES:
+            continue
+        price = item.price or 0
+        bucket = bucket_of(price)
+        for key in _item_keys(item):
+            total = totals[(key, item.status, bucket)]
+            total[0] += 1
+            total[1] += price
+    return {key: (count, price_sum) for key, (count, price_sum) in totals.items()}
+
+
+# --- 相場の参照 ---
+
+
+def summarize_buckets(buckets: Dict[int, Tuple[int, int]]) -> Optional[dict]:
+    """バケット -> (件数, 合計) から件数・平均・分位点・ヒストグラムを作る"""
+    buckets = {bucket: value for bucket, value in buckets.items() if value[0] > 0}
+    count = sum(c for c, _ in buckets.values())
+    if count == 0:
+        return None
+
+    def percentile(p: float) -> int:
+        # 目標の順位を含むバケットの中で、バケットの範囲を件数で等分して補間する
+        target = p / 100 * count
+        seen = 0
+        for bucket in sorted(buckets):
+            bucket_count, bucket_sum = buckets[bucket]
+            if seen + bucket_count >= target:
+                lower, upper = bucket_bounds(bucket)
+                if upper is None or bucket_count == 1:
+                    return int(round(bucket_sum / bucket_count))
+                return int(round(lower + (upper - lower) * (target - seen) / bucket_count))
+            seen += bucket_count
+        return int(round(buckets[max(buckets)][1] / buckets[max(buckets)][0]))
+
+    histogram = []
+    for bucket in sorted(buckets):
+        lower, upper = bucket_bounds(bucket)
+        histogram.append(
+            {
+                "min_price": int(math.ceil(lower)),
+                "max_price": int(math.ceil(upper)) - 1 if upper is not None else None,
+                "count": buckets[bucket][0],
+            }
+        )
+    return {
+        "count": count,
+        "mean": int(round(sum(s for _, s in buckets.values()) / count)),
+        "percentiles": {f"p{p}": percentile(p) for p in PERCENTILES},
+        "histogram": histogram,
+    }
+
+
+def _load(db: Session, keys: List[str]) -> Dict[str, Dict[str, Dict[int, Tuple[int, int]]]]:
+    """キー -> 状態 -> バケット -> (件数, 合計)"""
+    stats: Dict[str, Dict[str, Dict[int, Tuple[int, int]]]] = {}
+    rows = (
+        db.query(
+            models.PriceStat.stat_key,
+            models.PriceStat.status,
+            models.PriceStat.bucket,
+            models.PriceStat.count,
+            models.PriceStat.price_sum,
+        )
+        .filter(models.PriceStat.stat_key.in_(keys), models.PriceStat.count > 0)
+        .all()
+    )
+    for stat_key, status, bucket, count, price_sum in rows:
+        stats.setdefault(stat_key, {}).setdefault(status, {})[bucket] = (count, price_sum)
+    return stats
+
+
+def _merged(by_status: Dict[str, Dict[int, Tuple[int, int]]]) -> Dict[int, Tuple[int, int]]:
+    merged: Dict[int, Tuple[int, int]] = {}
+    for buckets in by_status.values():
+        for bucket, (count, price_sum) in buckets.items():
+            total = merged.get(bucket, (0, 0))
+            merged[bucket] = (total[0] + count, total[1] + price_sum)
+    return merged
+
+
+def market_price(
+    db: Session,
+    name: str,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_samples: int = settings.PRICE_STATS_MIN_SAMPLES,
+) -> Optional[dict]:
+    """
+    商品名などから相場を引く（該当がなければ None）
+
+    商品名 -> カテゴリ + 単語 -> 単語 -> ブランド -> カテゴリ の順に、min_samples 件以上あるキーを使う
+    （単語は商品名の前にあるものを優先する。「iPhone 15 Pro」なら iphone -> 15 は数字なので飛ばす -> pro）。
+    提示価格は売却済みが min_samples 件以上あればその中央値、なければ出品中も合わせた中央値で、
+    カテゴリと状態を指定すると「カテゴリ内のその状態の中央値 / カテゴリの中央値」で補正する。
+    """
+    keys = stat_keys(name, category, condition, brand)
+    stats = _load(db, [key for kind_keys in keys.values() for key in kind_keys])
+
+    # 1. 件数が足りる、いちばん細かいキーを選ぶ
+    basis = basis_key = None
+    for kind in BASIS_ORDER:
+        for key in keys[kind]:
+            if key in stats and sum(c for c, _ in _merged(stats[key]).values()) >= min_samples:
+                basis, basis_key = kind, key
+                break
+        if basis_key is not None:
+            break
+    if basis_key is None:
+        return None
+
+    # 2. 出品中・売却済み・合計のそれぞれを集計する
+    by_status = stats[basis_key]
+    summary = {status: summarize_buckets(by_status.get(status, {})) for status in STATUSES}
+    overall = summarize_buckets(_merged(by_status))
+    reference = summary["sold"] if summary["sold"] and summary["sold"]["count"] >= min_samples else overall
+
+    # 3. 状態による補正（カテゴリ内のその状態の中央値 / カテゴリの中央値）
+    #    商品名のキーは状態を区別しないため。カテゴリ別に比べるのは、安い商品ほど新品が多いなどの偏りを避けるため
+    factor = 1.0
+    condition_keys = [key for key in keys["category_condition"] if key in stats]
+    category_keys = [key for key in keys["category"] if key in stats]
+    if condition_keys and category_keys:
+        by_condition = summarize_buckets(_merged(stats[condition_keys[0]]))
+        by_category = summarize_buckets(_merged(stats[category_keys[0]]))
+        if by_condition["count"] >= min_samples and by_category["count"] >= min_samples:
+            factor = by_condition["percentiles"]["p50"] / max(by_category["percentiles"]["p50"], 1)
+            factor = min(max(factor, CONDITION_FACTOR_RANGE[0]), CONDITION_FACTOR_RANGE[1])
+
+    def adjusted(price: int) -> int:
+        # 10円単位に丸める
+        return int(round(price * factor, -1))
+
+    return {
+        "basis": basis,
+        "basis_key": basis_key.split(":", 1)[1].replace("\x1f", " "),
+        "count": overall["count"],
+        "mean": overall["mean"],
+        "percentiles": overall["percentiles"],
+        "histogram": overall["histogram"],
+        "on_sale": summary["on_sale"],
+        "sold": summary["sold"],
+        "condition_factor": round(factor, 3),
+        "suggested_price": adjusted(reference["percentiles"]["p50"]),
+        "price_range": {
+            "min": adjusted(reference["percentiles"]["p25"]),
+            "max": adjusted(reference["percentiles"]["p75"]),
+        },
+    }
@@ -0,0 +1,199 @@
+# hackathon-backend/app/services/ranker.py
+"""
+類似商品候補のランキング
+
+TF-IDF の類似度で集めた候補を、次の特徴量を組み合わせたスコアで並べ直す。
+- text: テキストの類似度（コサイン）
+- likes / comments: いいね数・コメント数（候補内の最大値で割った log スケール）
+- recency: 出品からの経過日数による減衰（RANK_RECENCY_HALF_LIFE_DAYS で半減。
+  created_at は func.now() で入るので、タイムゾーンなしの値は DB_TIMEZONE（既定 UTC）として読む）
+- price: ターゲット商品との価格の近さ（価格比の log の差が小さいほど 1 に近い）
+特徴量は候補全体の NumPy 配列としてまとめて計算する。
+重みは Settings の RANK_WEIGHT_* で調整し、使うランカーは RECOMMEND_RANKER で切り替える。
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.core.config import settings
+from app.utils.time_utils import from_db_time, get_jst_now
+
+
+@dataclass
+class ItemFeatures:
+    """商品ごとのランキング用の値（load_features で DB からまとめて読む）"""
+
+    like_count: int
+    comment_count: int
+    created_at: Optional[float]  # UNIX 時刻（秒）
+    price: Optional[int]
+
+
+@dataclass
+class Candidates:
+    """候補集合の特徴量（すべて候補数の長さの配列）"""
+
+    similarity: np.ndarray
+    like_count: np.ndarray
+    comment_count: np.ndarray
+    age_days: np.ndarray
+    price: np.ndarray
+    target_price: float
+
+
+def load_features(db: Session, item_ids, chunk_size: int = 5000) -> Dict[str, ItemFeatures]:
+    """商品の価格・出品日時・いいね数・コメント数をまとめて取得する（チャンクごとに1クエリ）"""
+    item_ids = list(set(item_ids))
+    features: Dict[str, ItemFeatures] = {}
+    for start in range(0, len(item_ids), chunk_size):
+        chunk = item_ids[start : start + chunk_size]
+        rows = (
+            db.query(
+                models.Item.item_id,
+                models.Item.created_at,
+                models.Item.price,
+                models.Item.like_count,
+                models.Item.comment_count,
+            )
+            .filter(models.Item.item_id.in_(chunk))
+            .all()
+        )
+        for item_id, created_at, price, like_count, comment_count in rows:
+            features[item_id] = ItemFeatures(
+                like_count=like_count or 0,
+                comment_count=comment_count or 0,
+                created_at=from_db_time(created_at).timestamp() if created_at else None,
+                price=price,
+            )
+    return features
+
+
+def build_candidates(
+    features: Dict[str, ItemFeatures],
+    target_id: str,
+    pairs: List[Tuple[str, float]],
+    now: Optional[float] = None,
+) -> Candidates:
+    """(商品ID, 類似度) の候補リストを特徴量の配列にまとめる"""
+    now = now if now is not None else get_jst_now().timestamp()
+    missing = ItemFeatures(0, 0, None, None)
+    rows = [features.get(item_id, missing) for item_id, _ in pairs]
+    target = features.get(target_id, missing)
+
+    created = np.array(
+        [r.created_at if r.created_at is not None else np.nan for r in rows], dtype=np.float64
+    )
+    return Candidates(
+        similarity=np.array([score for _, score in pairs], dtype=np.float64),
+        like_count=np.array([r.like_count for r in rows], dtype=np.float64),
+        comment_count=np.array([r.comment_count for r in rows], dtype=np.float64),
+        # 出品日時が不明な商品は減衰させない
+        age_days=np.nan_to_num(np.maximum(now - created, 0) / 86400, nan=0.0),
+        price=np.array([r.price or 0 for r in rows], dtype=np.float64),
+        target_price=float(target.price or 0),
+    )
+
+
+class Ranker(ABC):
+    """候補のスコア付け（サブクラスで score を実装する。未実装ならインスタンス化の時点でエラー）"""
+
+    @abstractmethod
+    def score(self, candidates: Candidates) -> np.ndarray:
+        """候補ごとのスコア（候補数の長さの配列。大きいほど上位）"""
+
+
+class SimilarityRanker(Ranker):
+    """テキストの類似度だけで並べる（従来の並び）"""
+
+    def score(self, candidates: Candidates) -> np.ndarray:
+        return candidates.similarity
+
+
+class HybridRanker(Ranker):
+    """テキスト類似度・いいね・コメント・新しさ・価格の近さの重み付き和"""
+
+    def __init__(
+        self,
+        text: float = settings.RANK_WEIGHT_TEXT,
+        likes: float = settings.RANK_WEIGHT_LIKES,
+        comments: float = settings.RANK_WEIGHT_COMMENTS,
+        recency: float = settings.RANK_WEIGHT_RECENCY,
+        price: float = settings.RANK_WEIGHT_PRICE,
+        half_life_days: float = settings.RANK_RECENCY_HALF_LIFE_DAYS,
+    ):
+        self.weights = np.array([text, likes, comments, recency, price], dtype=np.float64)
+        self.half_life_days = half_life_days
+
+    @staticmethod
+    def _log_scaled(counts: np.ndarray) -> np.ndarray:
+        """件数を log1p して候補内の最大値で割る（0〜1）"""
+        scaled = np.log1p(counts)
+        peak = scaled.max() if len(scaled) else 0.0
+        return scaled / peak if peak > 0 else np.zeros_like(scaled)
+
+    def features(self, candidates: Candidates) -> np.ndarray:
+        """(候補数, 5) の特徴量行列"""
+        recency = np.exp2(-candidates.age_days / self.half_life_days)
+        if candidates.target_price > 0:
+            ratio = np.log(np.maximum(candidates.price, 1) / candidates.target_price)
+            price = 1.0 / (1.0 + np.abs(ratio))
+        else:
+            price = np.zeros_like(candidates.similarity)
+        return np.column_stack(
+            [
+                candidates.similarity,
+                self._log_scaled(candidates.like_count),
+                self._log_scaled(candidates.comment_count),
+                recency,
+                price,
+            ]
+        )
+
+    def score(self, candidates: Candidates) -> np.ndarray:
+        return self.features(candidates) @ self.weights
+
+
+RANKERS = {
+    "similarity": SimilarityRanker,
+    "hybrid": HybridRanker,
+}
+
+
+def get_ranker(name: str = settings.RECOMMEND_RANKER) -> Ranker:
+    """設定名からランカーを作る（未知の名前は類似度のみ）"""
+    return RANKERS.get(name, SimilarityRanker)()
+
+
+def rank_candidates(
+    ranker: Ranker,
+    features: Dict[str, ItemFeatures],
+    target_id: str,
+    pairs: List[Tuple[str, float]],
+    limit: int,
+    now: Optional[float] = None,
+) -> List[Tuple[str, float]]:
+    """
+    候補を ranker のスコア順に並べ、上位 limit 件の (商品ID, スコア) を返す
+    テキストの類似度が 0 の候補（共通する単語がない商品）は除外する
+    同点の場合は類似度の高い順
+    """
+    pairs = [(item_id, score) for item_id, score in pairs if score > 0]
+    if not pairs:
+        return []
+    candidates = build_candidates(features, target_id, pairs, now=now)
+    scores = ranker.score(candidates)
+    order = np.lexsort((-candidates.similarity, -scores))[:limit]
+    return [(pairs[i][0], float(scores[i])) for i in order]
+
+
+def rerank(
+    db: Session, ranker: Ranker, target_id: str, pairs: List[Tuple[str, float]], limit: int
+) -> List[Tuple[str, float]]:
+    """1商品分の候補を DB から特徴量を読んで並べ直す"""
+    features = load_features(db, [target_id] + [item_id for item_id, _ in pairs])
+    return rank_candidates(ranker, features, target_id, pairs, limit)
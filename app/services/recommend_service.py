@@ -1,81 +1,347 @@
 # hackathon-backend/app/services/recommend_service.py
 
-from sqlalchemy.orm import Session
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session, joinedload
 from app.db import models
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from janome.tokenizer import Tokenizer
+from app.services import item_events
+from app.services.ann_index import AnnIndex, build_ann_index, load_ann_index
+from app.services.ranker import get_ranker, rerank
+from app.services.tokenizer_service import (
+    get_item_term_counts,
+    item_fields,
+    item_term_counts,
+)
+from app.core.config import settings
 
-# 日本語解析器 (Janome) の初期化
-tokenizer = Tokenizer()
 
+def normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """疎行列の各行を L2 正規化する（内積がそのままコサイン類似度になる）"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
 
-def japanese_tokenizer(text):
+
+def top_k_similar(
+    matrix: sparse.csr_matrix, target_index: int, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    日本語の文章を単語に分割する関数
-    例: "これはペンです" -> ["これ", "は", "ペン", "です"]
+    L2 正規化済みの疎行列から、target_index 行に似ている上位 k 行を返す
+
+    - 全商品 x 全商品の類似度行列は作らず、ターゲット1行分のスコア (n,) だけを計算する
+    - 上位 k 件は argpartition で部分選択し、その k 件だけをソートする
+    - 同点の場合は行番号の小さい順（安定ソートと同じ並び）
+    Returns: (行番号の配列, スコアの配列) ※ターゲット自身は含まない
     """
-    if not text:
-        return []
-    return [token.surface for token in tokenizer.tokenize(text)]
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows - 1)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
 
+    scores = np.asarray((matrix @ matrix[target_index].T).todense()).ravel()
+    scores[target_index] = -np.inf
 
-from app.core.config import settings
+    # k 番目に高いスコアを境に部分選択（O(n)）
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    threshold = scores[candidates].min()
+    # 境界と同点の行は行番号の小さいものから必要数だけ採用する
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+    candidates = np.concatenate([above, ties])
+    order = np.lexsort((candidates, -scores[candidates]))
+    top = candidates[order]
+    return top, scores[top]
 
-def get_recommendations(db: Session, item_id: str, limit: int = settings.RECOMMEND_ITEM_COUNT):
+
+def _item_version(updated_at, created_at):
+    """商品の版（更新日時、未更新なら作成日時）"""
+    return updated_at or created_at
+
+
+class RecommendIndex:
     """
-    指定された商品(item_id)に似ている商品をDBから探して返す
+    販売中商品の TF-IDF インデックス（プロセス内に常駐）
+
+    - 商品ごとの単語出現回数を保持し、出品・更新・売り切れ時に該当商品だけを差分更新する
+    - IDF と L2 正規化済みの疎行列は、変更があった時だけ出現回数から再構築する
+      （再トークナイズは行わないため、全件の再学習に比べて十分軽い）
+    - 単語出現回数は item_token_cache に保存されるため、再起動後も変更分しかトークナイズしない
+    - 他ワーカーでの変更は RECOMMEND_INDEX_SYNC_SECONDS ごとに DB と突き合わせて取り込む
+    - 商品数が RECOMMEND_ANN_MIN_ITEMS 以上で ANN インデックスがあれば、
+      ANN で候補を絞ってから候補だけを厳密な類似度で並べ直す
     """
-    # 1. 全商品のデータを取得 (販売中のものだけ)
-    # ※ 本番では全件取得は重いので、最新100件や同じカテゴリ内で絞るなどの工夫が必要ですが、
-    #    MVPなら全件でOKです。
-    items = db.query(models.Item).filter(models.Item.status == "on_sale").all()
 
-    # 商品が少なすぎる場合はレコメンドできないので空リストを返す
-    if len(items) < 2:
-        return []
+    def __init__(
+        self,
+        sync_interval: int = settings.RECOMMEND_INDEX_SYNC_SECONDS,
+        tokenizer_workers: int = settings.TOKENIZER_WORKERS,
+        ann_dir: str = settings.RECOMMEND_ANN_DIR,
+        ann_min_items: int = settings.RECOMMEND_ANN_MIN_ITEMS,
+    ):
+        self.sync_interval = sync_interval
+        self.tokenizer_workers = tokenizer_workers
+        self.ann_dir = ann_dir
+        self.ann_min_items = ann_min_items
+        self._lock = threading.RLock()
+        self._vocab: Dict[str, int] = {}
+        self._df: Counter = Counter()
+        # item_id -> (単語ID配列, 出現回数配列)
+        self._docs: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._versions: Dict[str, object] = {}
+        self._built = False
+        self._last_sync = 0.0
+        # 再構築済みの行列（_dirty の間は無効）
+        self._dirty = True
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._row_ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
 
-    # 2. データフレームの作成
-    # 商品IDと、特徴量に使うテキスト（タイトル + 説明文 + カテゴリ）を準備
-    item_data = []
-    target_index = -1
-
-    for index, item in enumerate(items):
-        # テキストを結合: 商品名を3回繰り返して重要度を上げる
-        # "商品名 商品名 商品名 カテゴリ 状態 説明文"
-        name_weight = f"{item.name} {item.name} {item.name}"
-        condition = item.condition or ""
-        text_feature = f"{name_weight} {item.category} {condition} {item.description or ''}"
-        item_data.append(text_feature)
-
-        if item.item_id == item_id:
-            target_index = index
-
-    # ターゲット商品が「販売中」リストになかった場合（売り切れなど）
-    if target_index == -1:
-        # 売り切れ商品も含めて再検索するか、空を返す。今回は空を返す。
-        return []
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- 差分更新 ---
+
+    def _to_doc(self, counts: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """単語出現回数を (単語ID配列, 出現回数配列) に変換する（未知の単語は語彙に追加）"""
+        term_ids = np.empty(len(counts), dtype=np.int32)
+        values = np.empty(len(counts), dtype=np.float64)
+        for i, (term, count) in enumerate(counts.items()):
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._vocab)
+            term_ids[i] = term_id
+            values[i] = count
+        return term_ids, values
+
+    def _put(self, item_id: str, doc: Tuple[np.ndarray, np.ndarray], version) -> None:
+        self._drop(item_id)
+        self._docs[item_id] = doc
+        self._versions[item_id] = version
+        self._df.update(doc[0].tolist())
+        self._dirty = True
+
+    def _drop(self, item_id: str) -> None:
+        old = self._docs.pop(item_id, None)
+        self._versions.pop(item_id, None)
+        if old is not None:
+            self._df.subtract(old[0].tolist())
+            self._dirty = True
+
+    def upsert(self, item: models.Item) -> None:
+        """出品・編集された商品をインデックスに反映する（販売中でなければ削除）"""
+        if not self._built:
+            # 未構築なら次回の sync で全件読み込まれる
+            return
+        with self._lock:
+            if item.status != "on_sale":
+                self._drop(item.item_id)
+                return
+            doc = self._to_doc(item_term_counts(item_fields(item)))
+            self._put(item.item_id, doc, _item_version(item.updated_at, item.created_at))
+
+    def remove(self, item_id: str) -> None:
+        """売り切れ・削除された商品をインデックスから外す"""
+        if not self._built:
+            return
+        with self._lock:
+            self._drop(item_id)
+
+    # --- DBとの同期 ---
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        DB上の販売中商品とインデックスを突き合わせ、差分だけを取り込む
+        初回は全件を読み込んでインデックスを構築する
+        """
+        now = time.monotonic()
+        if self._built and not force and now - self._last_sync < self.sync_interval:
+            return
+
+        with self._lock:
+            # 1. 販売中商品のIDと版だけを軽量に取得
+            rows = (
+                db.query(
+                    models.Item.item_id,
+                    models.Item.updated_at,
+                    models.Item.created_at,
+                )
+                .filter(models.Item.status == "on_sale")
+                .all()
+            )
+            current = {
+                item_id: _item_version(updated_at, created_at)
+                for item_id, updated_at, created_at in rows
+            }
+
+            # 2. 売り切れ・削除された商品を外す
+            for item_id in set(self._docs) - set(current):
+                self._drop(item_id)
 
-    # 3. TF-IDF でテキストをベクトル化 (AIの計算用データに変換)
-    # tokenizer=japanese_tokenizer を指定して日本語に対応させる
-    vectorizer = TfidfVectorizer(tokenizer=japanese_tokenizer)
-    tfidf_matrix = vectorizer.fit_transform(item_data)
+            # 3. 新規・更新された商品だけを取り込む
+            #    トークンキャッシュにある商品はトークナイズせずに済む
+            changed = [
+                item_id
+                for item_id, version in current.items()
+                if item_id not in self._docs or self._versions.get(item_id) != version
+            ]
+            for start in range(0, len(changed), 5000):
+                chunk = {item_id: current[item_id] for item_id in changed[start : start + 5000]}
+                for item_id, counts in get_item_term_counts(db, chunk, workers=self.tokenizer_workers).items():
+                    self._put(item_id, self._to_doc(counts), chunk[item_id])
 
-    # 4. コサイン類似度を計算
-    # 全商品 vs 全商品の類似度行列を作る
-    cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+            if changed:
+                print(f"[recommend_index] synced: {len(changed)} changed, total={len(self._docs)}")
 
-    # 5. ターゲット商品に似ている順にソート
-    # target_index の商品の類似度スコアを取得
-    sim_scores = list(enumerate(cosine_sim[target_index]))
+            self._built = True
+            self._last_sync = now
 
-    # スコアが高い順にソート (key=lambda x: x[1], reverse=True)
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+    # --- 行列の再構築・検索 ---
 
-    # 6. 上位の商品を取得 (自分自身 [0] は除くので [1:limit+1])
-    recommended_items = []
-    for i, score in sim_scores[1 : limit + 1]:
-        # 類似度が0（全く関係ない）商品は除外しても良いが、今回はそのまま出す
-        recommended_items.append(items[i])
+    def _ensure_matrix(self) -> None:
+        """出現回数から L2 正規化済み TF-IDF 行列を組み立てる（変更時のみ）"""
+        if not self._dirty:
+            return
+
+        row_ids = list(self._docs)
+        n_docs = len(row_ids)
+        n_terms = len(self._vocab)
+
+        if n_docs == 0:
+            self._matrix = sparse.csr_matrix((0, n_terms))
+        else:
+            docs = [self._docs[item_id] for item_id in row_ids]
+            indices = np.concatenate([d[0] for d in docs])
+            data = np.concatenate([d[1] for d in docs])
+            indptr = np.zeros(n_docs + 1, dtype=np.int64)
+            np.cumsum([len(d[0]) for d in docs], out=indptr[1:])
+
+            # IDF: scikit-learn の smooth_idf と同じ式 ln((1+n)/(1+df)) + 1
+            df = np.zeros(n_terms, dtype=np.float64)
+            if self._df:
+                term_ids, counts = zip(*self._df.items())
+                df[list(term_ids)] = counts
+            idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+            data = data * idf[indices]
+
+            matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_docs, n_terms))
+            self._matrix = normalize_rows(matrix)
+
+        self._row_ids = row_ids
+        self._row_of = {item_id: i for i, item_id in enumerate(row_ids)}
+        self._dirty = False
+
+    def neighbors(self, item_id: str, limit: int) -> List[Tuple[str, float]]:
+        """item_id に似ている (商品ID, 類似度) を類似度の高い順に返す（自分自身は除く）"""
+        with self._lock:
+            self._ensure_matrix()
+            target_index = self._row_of.get(item_id)
+            if target_index is None or len(self._row_ids) < 2:
+                return []
+
+            # 大規模カタログでは ANN で候補を絞る（ANN 構築後の新規出品は厳密計算）
+            ann = self.ann()
+            if ann is not None:
+                result = self._ann_neighbors(ann, item_id, target_index, limit)
+                if result is not None:
+                    return result
+
+            # ターゲットの1行だけを全商品と掛け合わせ、上位 limit 件を部分選択
+            top, scores = top_k_similar(self._matrix, target_index, limit)
+            return [(self._row_ids[i], float(score)) for i, score in zip(top, scores)]
+
+    def ann(self) -> Optional[AnnIndex]:
+        """使える ANN インデックスを返す（小さいカタログや未構築なら None）"""
+        if not self.ann_dir or len(self._docs) < self.ann_min_items:
+            return None
+        return load_ann_index(self.ann_dir)
+
+    def _ann_neighbors(
+        self, ann: AnnIndex, item_id: str, target_index: int, limit: int
+    ) -> Optional[List[Tuple[str, float]]]:
+        """ANN の候補を厳密なコサイン類似度で並べ直す"""
+        candidates = ann.search(
+            item_id, limit * settings.RECOMMEND_ANN_CANDIDATES, nprobe=settings.RECOMMEND_ANN_NPROBE
+        )
+        if candidates is None:
+            return None
+        # ANN 構築後に売り切れた商品は除く
+        rows = np.array(
+            [self._row_of[c] for c, _ in candidates if c in self._row_of], dtype=np.int64
+        )
+        if len(rows) == 0:
+            return []
+        scores = np.asarray(
+            (self._matrix[rows] @ self._matrix[target_index].T).todense()
+        ).ravel()
+        order = np.lexsort((rows, -scores))[:limit]
+        return [(self._row_ids[rows[i]], float(scores[i])) for i in order]
+
+    def build_ann(self, out_dir: Optional[str] = None) -> Optional[str]:
+        """現在の行列から ANN インデックスを作り直してディスクに保存する"""
+        out_dir = out_dir or self.ann_dir
+        if not out_dir:
+            return None
+        with self._lock:
+            self._ensure_matrix()
+            if len(self._row_ids) < 2:
+                return None
+            path = build_ann_index(self._matrix, self._row_ids, out_dir)
+        # このプロセスでもすぐに新しい版を使う
+        load_ann_index(out_dir, check_interval=0)
+        return path
+
+    def similar(self, item_id: str, limit: int) -> List[str]:
+        """item_id に似ている商品IDを類似度の高い順に返す（自分自身は除く）"""
+        return [neighbor_id for neighbor_id, _ in self.neighbors(item_id, limit)]
+
+    def versions(self) -> Dict[str, object]:
+        """インデックス内の商品ID -> 版 のスナップショット"""
+        with self._lock:
+            return dict(self._versions)
+
+
+# プロセス全体で共有するインデックス（出品・購入時に item_events から差分更新される）
+recommend_index = RecommendIndex()
+item_events.subscribe(recommend_index)
+
+
+def get_recommendations(db: Session, item_id: str, limit: int = settings.RECOMMEND_ITEM_COUNT):
+    """
+    指定された商品(item_id)に似ている商品をDBから探して返す
+    """
+    # 1. インデックスをDBと同期（初回のみ全件構築、以降は差分のみ）
+    recommend_index.sync(db)
+
+    # 2. ターゲット商品の1行だけで類似度を計算し、多めに候補を集める
+    #    ターゲット商品が「販売中」でない場合（売り切れなど）は空を返す
+    candidates = recommend_index.neighbors(item_id, limit * settings.RANK_CANDIDATE_FACTOR)
+    if not candidates:
+        return []
+
+    # 3. いいね・新しさなども加味して並べ直す（類似度 0 の商品は除外）
+    ranked = rerank(db, get_ranker(), item_id, candidates, limit)
+    recommended_ids = [i for i, _ in ranked]
+    if not recommended_ids:
+        return []
 
-    return recommended_items
+    # 4. 上位の商品をDBから取得し、ランキング順に並べ直す
+    #    他ワーカーで売り切れた直後の商品は除外する
+    items = (
+        db.query(models.Item)
+        .filter(
+            models.Item.item_id.in_(recommended_ids),
+            models.Item.status == "on_sale",
+        )
+        .all()
+    )
+    by_id = {item.item_id: item for item in items}
+    return [by_id[i] for i in recommended_ids if i in by_id]
@@ -0,0 +1,315 @@
+# hackathon-backend/app/services/search_backend.py
+"""
+商品検索のバックエンド切り替え
+
+SearchService は SearchBackend.search で「関連度順の商品ID」だけを受け取り、商品の読み込みは共通で行う。
+ファセット件数 (SearchBackend.facets) も同じバックエンドの一致集合で数える（検索結果と件数の対象を揃える）。
+- fulltext: MySQL の FULLTEXT (ngram パーサー) インデックスを MATCH ... AGAINST (BOOLEAN MODE) で引く
+- index: プロセス内の転置インデックス（search_index）
+- like: LIKE による部分一致（SQLite など、どのDBでも動く）
+SEARCH_BACKEND=auto（既定）なら、起動時に items の FULLTEXT インデックスの有無を調べ、
+あれば fulltext、なければ index を使う。FULLTEXT インデックスは migrate_search_fulltext.py で作成する。
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.search_index import FACET_FIELDS, PRICE_BUCKETS, search_index
+
+# migrate_search_fulltext.py で作る FULLTEXT インデックス
+FULLTEXT_INDEX_NAME = "ft_items_search"
+FULLTEXT_COLUMNS = ("name", "description", "category")
+# ngram パーサーの既定のトークン長（ngram_token_size）。これより短いキーワードは FULLTEXT で引けない
+NGRAM_TOKEN_SIZE = 2
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """キーワード以外の絞り込み条件（キャッシュのキーにも使う）"""
+
+    category: Optional[str] = None  # 部分一致
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    condition: Optional[str] = None  # 完全一致
+    brand: Optional[str] = None  # 完全一致
+
+
+NO_FILTERS = SearchFilters()
+
+
+def _apply_filters(base_query, filters: SearchFilters, skip: Optional[str] = None):
+    """
+    ORM のクエリにカテゴリ・価格帯・状態・ブランドの条件を足す
+    skip（"category" / "price" / "condition" / "brand"）の条件は足さない（ファセット用）
+    """
+    if filters.category and skip != "category":
+        base_query = base_query.filter(models.Item.category.contains(filters.category, autoescape=True))
+    if filters.min_price is not None and skip != "price":
+        base_query = base_query.filter(models.Item.price >= filters.min_price)
+    if filters.max_price is not None and skip != "price":
+        base_query = base_query.filter(models.Item.price <= filters.max_price)
+    if filters.condition and skip != "condition":
+        base_query = base_query.filter(models.Item.condition == filters.condition)
+    if filters.brand and skip != "brand":
+        base_query = base_query.filter(models.Item.brand == filters.brand)
+    return base_query
+
+
+def empty_facets() -> Dict[str, list]:
+    """キーワードがないときのファセット（search_index.facet_counts と同じ形）"""
+    return {**{field: [] for field in FACET_FIELDS}, "price": []}
+
+
+def _price_bucket():
+    """価格を PRICE_BUCKETS の区切りの番号にする式（search_index.facet_counts と同じ区切り）"""
+    return case(
+        *((models.Item.price < bound, n) for n, bound in enumerate(PRICE_BUCKETS)),
+        else_=len(PRICE_BUCKETS),
+    )
+
+
+def sql_facet_counts(matched, filters: SearchFilters, top: int = 20) -> Dict[str, list]:
+    """
+    一致する販売中商品のクエリ (matched) から、GROUP BY でファセット件数を数える
+    出力の形・並び・数え方（各フィールドは自身の条件を外す）は search_index.facet_counts と同じ
+    """
+    facets: Dict[str, list] = {}
+    for field in FACET_FIELDS:
+        column = getattr(models.Item, field)
+        rows = (
+            _apply_filters(matched.with_entities(column, func.count()), filters, skip=field)
+            .filter(column.isnot(None), column != "")
+            .group_by(column)
+            .all()
+        )
+        values = sorted(((value, count) for value, count in rows), key=lambda value: (-value[1], value[0]))
+        facets[field] = [{"value": value, "count": count} for value, count in values[:top]]
+
+    # 区切りの番号の別名で GROUP BY する（CASE 式を2回書かない）
+    bucket = _price_bucket().label("price_bucket")
+    counts = dict(
+        _apply_filters(matched.with_entities(bucket, func.count()), filters, skip="price")
+        .group_by(bucket.name)
+        .all()
+    )
+    bounds = (0,) + PRICE_BUCKETS
+    facets["price"] = [
+        {
+            "min_price": bounds[i],
+            "max_price": PRICE_BUCKETS[i] - 1 if i < len(PRICE_BUCKETS) else None,
+            "count": int(counts.get(i, 0)),
+        }
+        for i in range(len(PRICE_BUCKETS) + 1)
+    ]
+    return facets
+
+
+class SearchBackend(ABC):
+    """検索の実装（サブクラスで search を実装する。未実装ならインスタンス化の時点でエラー）"""
+
+    name = "base"
+
+    @abstractmethod
+    def search(
+        self,
+        db: Session,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        filters: SearchFilters = NO_FILTERS,
+    ) -> List[str]:
+        """
+        クエリ（空白区切りは AND）と絞り込み条件に一致する販売中の商品IDを、
+        関連度順に offset 件目から limit 件返す
+        """
+
+    @abstractmethod
+    def facets(self, db: Session, query: str, filters: SearchFilters = NO_FILTERS) -> Dict[str, list]:
+        """search と同じ一致集合の、カテゴリ・状態・ブランド・価格帯ごとの件数"""
+
+
+class LikeSearchBackend(SearchBackend):
+    """各キーワードが名前・説明・カテゴリのいずれかに含まれる商品（新しい順）"""
+
+    name = "like"
+
+    @staticmethod
+    def matched(db, query: str):
+        """キーワードがすべて含まれる販売中の商品（絞り込み条件なし）"""
+        # ベースクエリ: 販売中の商品のみ
+        base_query = db.query(models.Item.item_id).filter(models.Item.status == "on_sale")
+
+        # 各キーワードについて、名前・説明・カテゴリのいずれかに含まれるか確認
+        for keyword in query.lower().split():
+            search_pattern = f"%{keyword}%"
+            base_query = base_query.filter(
+                or_(
+                    func.lower(models.Item.name).like(search_pattern),
+                    func.lower(models.Item.description).like(search_pattern),
+                    func.lower(models.Item.category).like(search_pattern),
+                )
+            )
+        return base_query
+
+    def search(self, db, query, limit, offset=0, filters=NO_FILTERS) -> List[str]:
+        base_query = _apply_filters(self.matched(db, query), filters)
+        # ページ送りで結果が揺れないよう、新しい順 + id で並びを固定する
+        base_query = base_query.order_by(models.Item.created_at.desc(), models.Item.id.desc())
+        return [item_id for (item_id,) in base_query.offset(offset).limit(limit).all()]
+
+    def facets(self, db, query, filters=NO_FILTERS) -> Dict[str, list]:
+        if not query.split():
+            return empty_facets()
+        return sql_facet_counts(self.matched(db, query), filters)
+
+
+class InvertedIndexSearchBackend(SearchBackend):
+    """プロセス内の転置インデックス（未構築なら先に DB から読み込む。他ワーカーの変更はバックグラウンドで同期）"""
+
+    name = "index"
+
+    def search(self, db, query, limit, offset=0, filters=NO_FILTERS) -> List[str]:
+        search_index.sync(db)
+        return search_index.search(
+            query,
+            limit=limit,
+            offset=offset,
+            category=filters.category,
+            min_price=filters.min_price,
+            max_price=filters.max_price,
+            condition=filters.condition,
+            brand=filters.brand,
+        )
+
+    def facets(self, db, query, filters=NO_FILTERS) -> Dict[str, list]:
+        # DB に GROUP BY は投げず、転置インデックスの配列演算で数える
+        search_index.sync(db)
+        return search_index.facet_counts(
+            query,
+            category=filters.category,
+            min_price=filters.min_price,
+            max_price=filters.max_price,
+            condition=filters.condition,
+            brand=filters.brand,
+        )
+
+
+class FulltextSearchBackend(SearchBackend):
+    """
+    MySQL の FULLTEXT (ngram) インデックスによる検索
+    キーワードはそれぞれ "+" 付きのフレーズにして AND にする（ngram のトークンが連続して並ぶものだけ一致）
+    関連度は MATCH のスコア順、同点は新しい順
+    """
+
+    name = "fulltext"
+
+    def __init__(self, fallback: Optional[SearchBackend] = None):
+        self.fallback = fallback or LikeSearchBackend()
+
+    @staticmethod
+    def boolean_query(query: str) -> str:
+        """空白区切りのキーワードを BOOLEAN MODE の式にする（演算子になる記号は落とす）"""
+        keywords = []
+        for keyword in query.split():
+            keyword = keyword.replace('"', "").replace("\\", "")
+            if keyword:
+                keywords.append(f'+"{keyword}"')
+        return " ".join(keywords)
+
+    @staticmethod
+    def needs_fallback(keywords: List[str]) -> bool:
+        """ngram のトークンより短いキーワードは FULLTEXT では一致しないため LIKE で探す"""
+        return any(len(keyword) < NGRAM_TOKEN_SIZE for keyword in keywords)
+
+    def score(self, query: str):
+        return mysql_match(
+            *(getattr(models.Item, column) for column in FULLTEXT_COLUMNS),
+            against=self.boolean_query(query),
+        ).in_boolean_mode()
+
+    def search(self, db, query, limit, offset=0, filters=NO_FILTERS) -> List[str]:
+        keywords = query.split()
+        if not keywords:
+            return []
+        if self.needs_fallback(keywords):
+            return self.fallback.search(db, query, limit, offset, filters)
+
+        score = self.score(query)
+        base_query = _apply_filters(
+            db.query(models.Item.item_id).filter(models.Item.status == "on_sale", score),
+            filters,
+        )
+        rows = (
+            base_query.order_by(score.desc(), models.Item.created_at.desc(), models.Item.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return [item_id for (item_id,) in rows]
+
+    def facets(self, db, query, filters=NO_FILTERS) -> Dict[str, list]:
+        keywords = query.split()
+        if not keywords:
+            return empty_facets()
+        if self.needs_fallback(keywords):
+            return self.fallback.facets(db, query, filters)
+        matched = db.query(models.Item.item_id).filter(models.Item.status == "on_sale", self.score(query))
+        return sql_facet_counts(matched, filters)
+
+
+BACKENDS = {
+    "fulltext": FulltextSearchBackend,
+    "index": InvertedIndexSearchBackend,
+    "like": LikeSearchBackend,
+}
+
+
+def has_fulltext_index(engine: Engine) -> bool:
+    """items に FULLTEXT インデックス（ft_items_search）があるか（MySQL 以外は常に False）"""
+    if engine is None or engine.dialect.name != "mysql":
+        return False
+    with engine.connect() as connection:
+        count = connection.execute(
+            text(
+                "SELECT COUNT(*) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'items' "
+                "AND INDEX_NAME = :name AND INDEX_TYPE = 'FULLTEXT'"
+            ),
+            {"name": FULLTEXT_INDEX_NAME},
+        ).scalar()
+    return bool(count)
+
+
+_backend: Optional[SearchBackend] = None
+
+
+def init_backend(engine: Engine, name: str = settings.SEARCH_BACKEND) -> SearchBackend:
+    """設定と FULLTEXT インデックスの有無から使うバックエンドを決める（起動時に呼ぶ）"""
+    global _backend
+    if name == "auto":
+        try:
+            name = "fulltext" if has_fulltext_index(engine) else "index"
+        except Exception as e:
+            print(f"[search_backend] fulltext detection failed: {e}")
+            name = "index"
+    elif name == "fulltext" and not has_fulltext_index(engine):
+        print("[search_backend] FULLTEXT index not found, falling back to LIKE")
+        name = "like"
+    _backend = BACKENDS.get(name, InvertedIndexSearchBackend)()
+    print(f"[search_backend] using {_backend.name}")
+    return _backend
+
+
+def get_backend() -> SearchBackend:
+    """起動時に決めたバックエンド（未初期化なら転置インデックス）"""
+    global _backend
+    if _backend is None:
+        _backend = InvertedIndexSearchBackend()
+    return _backend
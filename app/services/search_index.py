@@ -0,0 +1,512 @@
+# hackathon-backend/app/services/search_index.py
+"""
+商品検索用の転置インデックス（プロセス内に常駐）
+
+- 商品名・ブランド・カテゴリ・説明文を NFKC 正規化 + 小文字化し、文字 bigram をキーにする
+  （1文字のキーワード検索用に unigram も持つ）
+- Janome の単語（item_token_cache のものを再利用）も別のキーとして持ち、関連度の加点に使う
+- ポスティングは 語 -> (文書番号の配列, どのフィールドに出たかのビットの配列)。
+  文書番号は追加順に振るので配列は常に昇順になり、削除は印を付けておいて後でまとめて詰める
+- 検索はキーワードごとに bigram のポスティングを短い順に積集合し、キーワード同士も積集合（AND）
+- 関連度は BM25F。語ごとに、出たフィールドの重み（商品名は tokenizer_service と同じ3倍）を
+  フィールド長で正規化して足し合わせ、k1 で飽和させて IDF を掛ける。フィールド内の出現回数は
+  ポスティングのビット（出たかどうか）で数える。同点は新しい商品を優先
+- カテゴリ・状態・ブランドは文書ごとの値番号の配列で持ち、絞り込みとファセット件数（値ごとの件数）は
+  一致した文書の集合に対する配列演算 (bincount) で出す。価格は PRICE_BUCKETS の区切りで数える
+販売中の商品だけを持ち、出品・購入時は item_events から差分更新、他ワーカーの変更はバックグラウンドの
+スレッドで定期的に DB と同期する（DB はロックの外で読み、差分の反映だけロックを取る）。
+"""
+
+import math
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services import background_sync, item_events
+from app.services.tokenizer_service import (
+    NAME_WEIGHT,
+    get_item_term_counts,
+    item_fields,
+    item_term_counts,
+    japanese_tokenizer,
+)
+
+# フィールドのビット
+NAME, BRAND, CATEGORY, DESCRIPTION, WORD = 1, 2, 4, 8, 16
+FIELDS = (NAME, BRAND, CATEGORY, DESCRIPTION, WORD)
+FIELD_WEIGHTS = {NAME: float(NAME_WEIGHT), BRAND: 2.0, CATEGORY: 1.5, DESCRIPTION: 1.0, WORD: 1.0}
+# BM25 のパラメータ（k1: 出現の飽和の速さ、b: フィールド長による正規化の強さ）
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Janome の単語キーの接頭辞（文字 n-gram のキーと区別する）
+WORD_PREFIX = "\x01"
+# 削除扱いの文書がこの件数（かつ全体の1/4）を超えたらポスティングを詰め直す
+COMPACT_MIN_DEAD = 1000
+# ファセット（値ごとの件数）を出すフィールド
+FACET_FIELDS = ("category", "condition", "brand")
+# 価格のファセットの区切り（円）。[0, 1000), [1000, 3000), ..., [50000, 上限なし)
+PRICE_BUCKETS = (1000, 3000, 5000, 10000, 30000, 50000)
+
+
+def normalize(text: Optional[str]) -> str:
+    """全角英数・半角カナなどを揃えて小文字にする"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def char_grams(text: str, unigrams: bool = False) -> Set[str]:
+    """空白で区切った各部分の文字 bigram（unigrams=True なら1文字も含める。1文字だけの部分は常に含める）"""
+    grams = set()
+    for run in text.split():
+        if unigrams or len(run) == 1:
+            grams.update(run)
+        grams.update(run[i : i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+def document_terms(name, brand, category, description, words) -> Dict[str, int]:
+    """商品1件分の 語 -> フィールドのビット"""
+    terms: Dict[str, int] = {}
+    for bit, text in (
+        (NAME, name),
+        (BRAND, brand),
+        (CATEGORY, category),
+        (DESCRIPTION, description),
+    ):
+        for gram in char_grams(normalize(text), unigrams=True):
+            terms[gram] = terms.get(gram, 0) | bit
+    for word in words:
+        word = normalize(word).strip()
+        if word:
+            terms[WORD_PREFIX + word] = WORD
+    return terms
+
+
+def field_lengths(name, brand, category, description, words) -> Dict[int, int]:
+    """商品1件分の フィールドのビット -> 長さ（文字数。単語は語数）"""
+    lengths = {
+        bit: len("".join(normalize(text).split()))
+        for bit, text in ((NAME, name), (BRAND, brand), (CATEGORY, category), (DESCRIPTION, description))
+    }
+    lengths[WORD] = len(words)
+    return lengths
+
+
+def _item_version(updated_at, created_at):
+    """商品の版（更新日時、未更新なら作成日時）"""
+    return updated_at or created_at
+
+
+class SearchIndex:
+    def __init__(self, sync_interval: int = settings.RECOMMEND_INDEX_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        # 語 -> (文書番号の配列, フィールドのビットの配列)。文書番号は追加順なので常に昇順
+        self._postings: Dict[str, Tuple[array, bytearray]] = {}
+        self._doc_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._alive = bytearray()
+        self._created = array("d")
+        # BM25 の長さ正規化用: フィールドごとの文書の長さと、販売中の文書の長さの合計
+        self._lengths: Dict[int, array] = {bit: array("H") for bit in FIELDS}
+        self._length_sums: Dict[int, int] = {bit: 0 for bit in FIELDS}
+        # 絞り込み・ファセット用: 価格と、フィールドごとの値番号（値 -> 番号は追加のみ）
+        self._prices = array("q")
+        self._facet_of: Dict[str, array] = {field: array("i") for field in FACET_FIELDS}
+        self._facet_ids: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+        self._versions: Dict[str, object] = {}
+        self._dead = 0
+        self._built = False
+        self._last_sync = 0.0
+        # 同期は1つずつ（起動時の構築とバックグラウンドの同期が重ならないように）
+        self._sync_lock = threading.Lock()
+        self._background = False
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    # --- 差分更新 ---
+
+    def _put(
+        self,
+        item_id: str,
+        terms: Dict[str, int],
+        lengths: Dict[int, int],
+        created_at,
+        version,
+        price,
+        facets: Dict[str, str],
+    ) -> None:
+        """文書を末尾に追加する（更新は古い文書を削除扱いにして追加し直す）"""
+        self._drop(item_id)
+        doc = len(self._ids)
+        self._ids.append(item_id)
+        self._alive.append(1)
+        self._created.append(created_at.timestamp() if created_at else 0.0)
+        for bit in FIELDS:
+            length = min(lengths.get(bit, 0), 0xFFFF)
+            self._lengths[bit].append(length)
+            self._length_sums[bit] += length
+        self._prices.append(price or 0)
+        for field in FACET_FIELDS:
+            value_ids = self._facet_ids[field]
+            self._facet_of[field].append(value_ids.setdefault(facets.get(field) or "", len(value_ids)))
+        self._doc_of[item_id] = doc
+        self._versions[item_id] = version
+        for term, mask in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("i"), bytearray())
+            posting[0].append(doc)
+            posting[1].append(mask)
+
+    def _drop(self, item_id: str) -> None:
+        """文書を削除扱いにする（ポスティングからは compact でまとめて取り除く）"""
+        doc = self._doc_of.pop(item_id, None)
+        self._versions.pop(item_id, None)
+        if doc is None:
+            return
+        self._ids[doc] = None
+        self._alive[doc] = 0
+        for bit in FIELDS:
+            self._length_sums[bit] -= self._lengths[bit][doc]
+        self._dead += 1
+
+    def _compact(self) -> None:
+        """削除扱いの文書が増えたら、ポスティングから取り除いて文書番号を詰め直す"""
+        if self._dead < max(COMPACT_MIN_DEAD, len(self._ids) // 4):
+            return
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        new_doc = np.cumsum(alive, dtype=np.int64) - 1
+
+        postings = {}
+        for term, (docs, masks) in self._postings.items():
+            docs = np.array(docs, dtype=np.int32)
+            keep = alive[docs]
+            if keep.any():
+                postings[term] = (
+                    array("i", new_doc[docs[keep]].astype(np.int32).tobytes()),
+                    bytearray(np.array(masks, dtype=np.uint8)[keep].tobytes()),
+                )
+        self._postings = postings
+        self._ids = [item_id for item_id in self._ids if item_id is not None]
+        self._doc_of = {item_id: doc for doc, item_id in enumerate(self._ids)}
+        self._created = array("d", np.array(self._created)[alive].tobytes())
+        self._lengths = {
+            bit: array("H", np.array(lengths, dtype=np.uint16)[alive].tobytes())
+            for bit, lengths in self._lengths.items()
+        }
+        self._prices = array("q", np.array(self._prices)[alive].tobytes())
+        self._facet_of = {
+            field: array("i", np.array(values, dtype=np.int32)[alive].tobytes())
+            for field, values in self._facet_of.items()
+        }
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._dead = 0
+
+    def upsert(self, item: models.Item) -> None:
+        """出品・編集された商品をインデックスに反映する（販売中でなければ削除）"""
+        if not self._built:
+            # 未構築なら次回の sync で全件読み込まれる
+            return
+        with self._lock:
+            if item.status != "on_sale":
+                self._drop(item.item_id)
+                return
+            fields = (
+                item.name, item.brand, item.category, item.description,
+                item_term_counts(item_fields(item)),
+            )
+            self._put(
+                item.item_id, document_terms(*fields), field_lengths(*fields), item.created_at,
+                _item_version(item.updated_at, item.created_at), item.price,
+                {"category": item.category, "condition": item.condition, "brand": item.brand},
+            )
+            self._compact()
+
+    def remove(self, item_id: str) -> None:
+        """売り切れ・削除された商品をインデックスから外す"""
+        if not self._built:
+            return
+        with self._lock:
+            self._drop(item_id)
+            self._compact()
+
+    # --- DBとの同期 ---
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        DB上の販売中商品とインデックスを突き合わせ、差分だけを取り込む
+        初回は全件を読み込んでインデックスを構築する
+        バックグラウンドで同期している間は、force でなければ未構築のときだけ読み込む
+        """
+        now = time.monotonic()
+        if self._built and not force and (self._background or now - self._last_sync < self.sync_interval):
+            return
+
+        with self._sync_lock:
+            # 1. 今の版を控えてから、販売中商品のIDと版だけを軽量に取得（ここからロックの外）
+            with self._lock:
+                known = dict(self._versions)
+            rows = (
+                db.query(models.Item.item_id, models.Item.updated_at, models.Item.created_at)
+                .filter(models.Item.status == "on_sale")
+                .all()
+            )
+            current = {
+                item_id: _item_version(updated_at, created_at)
+                for item_id, updated_at, created_at in rows
+            }
+            removed = [item_id for item_id in known if item_id not in current]
+            changed = [item_id for item_id, version in current.items() if known.get(item_id) != version]
+
+            # 2. 新規・更新された商品の語を作る（単語はトークンキャッシュから）
+            updates = []
+            for start in range(0, len(changed), 5000):
+                chunk = {item_id: current[item_id] for item_id in changed[start : start + 5000]}
+                words = get_item_term_counts(db, chunk)
+                for item_id, name, brand, category, description, created_at, price, condition in (
+                    db.query(
+                        models.Item.item_id,
+                        models.Item.name,
+                        models.Item.brand,
+                        models.Item.category,
+                        models.Item.description,
+                        models.Item.created_at,
+                        models.Item.price,
+                        models.Item.condition,
+                    )
+                    .filter(models.Item.item_id.in_(list(chunk)))
+                    .all()
+                ):
+                    fields = (name, brand, category, description, words.get(item_id, ()))
+                    updates.append(
+                        (
+                            item_id, document_terms(*fields), field_lengths(*fields), created_at,
+                            chunk[item_id], price,
+                            {"category": category, "condition": condition, "brand": brand},
+                        )
+                    )
+
+            # 3. ロックを取って差分を反映する。読んでいる間に item_events で変わった商品は、そちらの方が新しいので残す
+            with self._lock:
+                for item_id in removed:
+                    if self._versions.get(item_id) == known[item_id]:
+                        self._drop(item_id)
+                for update in updates:
+                    if self._versions.get(update[0]) == known.get(update[0]):
+                        self._put(*update)
+                self._compact()
+                if updates:
+                    print(f"[search_index] synced: {len(updates)} changed, total={len(self._doc_of)}")
+
+                self._built = True
+                self._last_sync = time.monotonic()
+
+    def start_background_sync(self, session_factory) -> None:
+        """他ワーカーの変更の取り込みを、リクエストの外で sync_interval 秒ごとに行う"""
+        if self._background:
+            return
+        self._background = True
+        background_sync.start(
+            "search_index", self.sync_interval, lambda db: self.sync(db, force=True), session_factory
+        )
+
+    # --- 検索 ---
+
+    def _match(self, keyword: str) -> np.ndarray:
+        """キーワードの文字 n-gram をすべて含む文書番号（ポスティングの短い順に積集合）"""
+        postings = [self._postings.get(g) for g in char_grams(keyword)]
+        if not postings or any(p is None for p in postings):
+            return np.empty(0, dtype=np.int32)
+        postings.sort(key=lambda p: len(p[0]))
+        docs = np.array(postings[0][0], dtype=np.int32)
+        for posting in postings[1:]:
+            docs = np.intersect1d(docs, np.array(posting[0], dtype=np.int32), assume_unique=True)
+            if not len(docs):
+                break
+        return docs
+
+    @staticmethod
+    def _take(buffer, dtype, docs: np.ndarray) -> np.ndarray:
+        """array / bytearray から docs の位置の値をコピーして取り出す（バッファを掴んだままにしない）"""
+        return np.frombuffer(buffer, dtype=dtype)[docs]
+
+    def _filter_masks(
+        self,
+        docs: np.ndarray,
+        category: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        condition: Optional[str] = None,
+        brand: Optional[str] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        条件ごとの「docs のうち条件を満たすか」の真偽配列（category は部分一致、condition / brand は完全一致）
+        キーは category / condition / brand / price。指定のない条件は含めない
+        """
+        masks = {}
+        if category:
+            allowed = [i for name, i in self._facet_ids["category"].items() if category in name]
+            masks["category"] = np.isin(self._take(self._facet_of["category"], np.int32, docs), allowed)
+        for field, value in (("condition", condition), ("brand", brand)):
+            if value:
+                value_id = self._facet_ids[field].get(value, -1)
+                masks[field] = self._take(self._facet_of[field], np.int32, docs) == value_id
+        if min_price is not None or max_price is not None:
+            prices = self._take(self._prices, np.int64, docs)
+            mask = np.ones(len(docs), dtype=bool)
+            if min_price is not None:
+                mask &= prices >= min_price
+            if max_price is not None:
+                mask &= prices <= max_price
+            masks["price"] = mask
+        return masks
+
+    @staticmethod
+    def _all(masks, n: int, skip: Optional[str] = None) -> np.ndarray:
+        """skip 以外の条件をすべて満たすか"""
+        selected = np.ones(n, dtype=bool)
+        for name, mask in masks.items():
+            if name != skip:
+                selected &= mask
+        return selected
+
+    def _candidates(self, keywords: List[str]) -> np.ndarray:
+        """全キーワードに一致する販売中の文書番号（昇順）"""
+        docs: Optional[np.ndarray] = None
+        for keyword in sorted(keywords, key=len, reverse=True):
+            matched = self._match(keyword)
+            docs = matched if docs is None else np.intersect1d(docs, matched, assume_unique=True)
+            if not len(docs):
+                return docs
+        return docs[self._take(self._alive, np.uint8, docs) == 1]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        category: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        condition: Optional[str] = None,
+        brand: Optional[str] = None,
+    ) -> List[str]:
+        """
+        クエリ（空白区切りは AND）に一致する商品IDを関連度順に返す
+        category（部分一致）・min_price / max_price・condition / brand を指定するとその条件でも絞り込む
+        """
+        keywords = normalize(query).split()
+        if not keywords:
+            return []
+
+        with self._lock:
+            # 1. 候補: 全キーワードに一致する販売中の文書を、条件で絞り込む
+            docs = self._candidates(keywords)
+            filter_masks = self._filter_masks(docs, category, min_price, max_price, condition, brand)
+            docs = docs[self._all(filter_masks, len(docs))]
+            if not len(docs):
+                return []
+
+            # 2. 関連度 (BM25F): 語ごとに、出たフィールドの 重み / 長さの正規化 を足して k1 で飽和させ、IDF を掛ける
+            #    （df には削除扱いの文書も含まれるが、compact で一定割合以下に保たれる）
+            n_docs = max(len(self._doc_of), 1)
+            norms = {}
+            for bit in FIELDS:
+                average = max(self._length_sums[bit] / n_docs, 1.0)
+                lengths = self._take(self._lengths[bit], np.uint16, docs)
+                norms[bit] = FIELD_WEIGHTS[bit] / (1 - BM25_B + BM25_B * lengths / average)
+            terms = set()
+            for keyword in keywords:
+                terms.update(char_grams(keyword))
+                terms.update(
+                    WORD_PREFIX + word for word in japanese_tokenizer(keyword) if not word.isspace()
+                )
+            scores = np.zeros(len(docs))
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                term_docs = np.array(posting[0], dtype=np.int32)
+                df = len(term_docs)
+                idf = math.log(1 + (max(n_docs, df) - df + 0.5) / (df + 0.5))
+                pos = np.minimum(np.searchsorted(term_docs, docs), df - 1)
+                hit = np.flatnonzero(term_docs[pos] == docs)
+                masks = self._take(posting[1], np.uint8, pos[hit])
+                tf = np.zeros(len(hit))
+                for bit in FIELDS:
+                    tf += np.where(masks & bit, norms[bit][hit], 0.0)
+                scores[hit] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+            # 浮動小数の誤差で同点の並びが揺れないように丸める
+            scores = np.round(scores, 9)
+
+            # 3. 関連度の高い順、同点は新しい順
+            created = self._take(self._created, np.float64, docs)
+            order = np.lexsort((docs, -created, -scores))[offset : offset + limit]
+            return [self._ids[doc] for doc in docs[order]]
+
+    def facet_counts(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        condition: Optional[str] = None,
+        brand: Optional[str] = None,
+        top: int = 20,
+    ) -> Dict[str, list]:
+        """
+        クエリに一致する商品の、カテゴリ・状態・ブランド・価格帯ごとの件数
+        各フィールドの件数はそのフィールド自身の条件だけを外して数える（選び直したときの件数になる）
+        値は件数の多い順に top 件まで。ブランドなしなど空の値は含めない
+        """
+        facets = {field: [] for field in FACET_FIELDS}
+        facets["price"] = []
+        keywords = normalize(query).split()
+        if not keywords:
+            return facets
+
+        with self._lock:
+            docs = self._candidates(keywords)
+            filter_masks = self._filter_masks(docs, category, min_price, max_price, condition, brand)
+
+            for field in FACET_FIELDS:
+                selected = docs[self._all(filter_masks, len(docs), field)]
+                value_ids = self._take(self._facet_of[field], np.int32, selected)
+                names = list(self._facet_ids[field])
+                counts = np.bincount(value_ids, minlength=len(names))
+                values = [(names[i], int(counts[i])) for i in np.flatnonzero(counts) if names[i]]
+                values.sort(key=lambda value: (-value[1], value[0]))
+                facets[field] = [{"value": name, "count": count} for name, count in values[:top]]
+
+            selected = docs[self._all(filter_masks, len(docs), "price")]
+            prices = self._take(self._prices, np.int64, selected)
+            counts = np.bincount(
+                np.searchsorted(PRICE_BUCKETS, prices, side="right"), minlength=len(PRICE_BUCKETS) + 1
+            )
+            bounds = (0,) + PRICE_BUCKETS
+            for i, count in enumerate(counts):
+                facets["price"].append(
+                    {
+                        "min_price": bounds[i],
+                        "max_price": PRICE_BUCKETS[i] - 1 if i < len(PRICE_BUCKETS) else None,
+                        "count": int(count),
+                    }
+                )
+        return facets
+
+
+# プロセス全体で共有するインデックス（出品・購入時に item_events から差分更新される）
+search_index = SearchIndex()
+item_events.subscribe(search_index)
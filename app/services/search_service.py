@@ -0,0 +1,411 @@
+# hackathon-backend/app/services/search_service.py
+"""
+商品検索サービス
+
+/search/items・AIチャットの search_items ツール (FunctionExecutor)・/llm/func の search_items は
+すべて SearchService.search を使う。
+- キーワードの照合と関連度の並びは起動時に選んだ SearchBackend（fulltext / index / like）に任せる
+- カテゴリ（部分一致）・価格帯で絞り込み、offset / limit でページ送りする
+- 検索結果は商品IDだけを結果キャッシュに、商品の中身（SearchItem）は商品キャッシュに持つ
+  どちらも LRU + TTL で件数の上限を決め、出品・編集・購入（item_events）で破棄する
+  他ワーカーでの変更とコメント・いいね数の増減は TTL が切れたときに反映される
+- with_facets なら、カテゴリ・状態・ブランド・価格帯ごとの件数も返す。件数は検索と同じバックエンドの
+  一致集合で数える（index は配列演算、fulltext / like は GROUP BY。条件ごとにキャッシュする）
+- ヒット率・レイテンシは metrics() で返す（/search/metrics）
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services import item_events, search_backend
+from app.services.search_backend import NO_FILTERS, SearchFilters
+
+# レイテンシの分位点は直近この件数から計算する
+LATENCY_WINDOW = 2048
+
+
+@dataclass(frozen=True)
+class SellerSummary:
+    username: Optional[str]
+
+
+@dataclass(frozen=True)
+class SearchItem:
+    """検索結果の1商品（キャッシュに置くため ORM ではなく値で持つ）"""
+
+    item_id: str
+    name: str
+    price: int
+    image_url: Optional[str]
+    category: str
+    seller: Optional[SellerSummary]
+    like_count: int
+    comment_count: int
+
+
+@dataclass
+class SearchPage:
+    """検索結果の1ページ分"""
+
+    items: List[SearchItem]
+    offset: int
+    limit: int
+    has_more: bool
+    facets: Optional[dict] = None
+
+
+class LRUCache:
+    """件数の上限（LRU）と保持秒数（TTL）つきのキャッシュ。ヒット・ミスなどを数える"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[object, Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._delete(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._stored(key, value)
+            while len(self._entries) > self.max_entries:
+                self._delete(next(iter(self._entries)))
+                self.evictions += 1
+
+    def pop(self, key) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._cleared()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    # サブクラスで付随する索引を保守するためのフック（ロックの内側で呼ばれる）
+    def _delete(self, key) -> None:
+        del self._entries[key]
+
+    def _stored(self, key, value) -> None:
+        pass
+
+    def _cleared(self) -> None:
+        pass
+
+
+class SearchResultCache(LRUCache):
+    """
+    ((バックエンド, クエリ, 条件), offset, limit) -> 商品ID のキャッシュ
+    商品IDから、その商品を含むクエリへの逆引きを持ち、売り切れた商品を含むクエリだけを捨てられる
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = settings.SEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = settings.SEARCH_CACHE_SIZE,
+    ):
+        super().__init__(ttl_seconds, max_entries)
+        self._queries_by_item: Dict[str, Set[tuple]] = {}
+
+    def _stored(self, key, value) -> None:
+        for item_id in value:
+            self._queries_by_item.setdefault(item_id, set()).add(key[0])
+
+    def _delete(self, key) -> None:
+        # 同じクエリの他のページが残っていれば逆引きは消さない（drop_item で広めに捨てるだけ）
+        _, item_ids = self._entries.pop(key)
+        query = key[0]
+        if any(other[0] == query for other in self._entries):
+            return
+        for item_id in item_ids:
+            queries = self._queries_by_item.get(item_id)
+            if queries is not None:
+                queries.discard(query)
+                if not queries:
+                    del self._queries_by_item[item_id]
+
+    def _cleared(self) -> None:
+        self._queries_by_item.clear()
+
+    def drop_item(self, item_id: str) -> None:
+        """商品を含むクエリのページをすべて捨てる（後ろのページの位置もずれるため）"""
+        with self._lock:
+            queries = self._queries_by_item.pop(item_id, None)
+            if not queries:
+                return
+            for key in [key for key in self._entries if key[0] in queries]:
+                self._delete(key)
+                self.invalidations += 1
+
+
+def load_items(db: Session, item_ids: List[str]) -> List[SearchItem]:
+    """商品IDの順に、販売中の商品を検索結果に使うカラムだけ読み込む"""
+    if not item_ids:
+        return []
+    # いいね数・コメント数は items のカラムなので likes / comments は読まない
+    rows = (
+        db.query(
+            models.Item.item_id,
+            models.Item.name,
+            models.Item.price,
+            models.Item.image_url,
+            models.Item.category,
+            models.User.username,
+            models.Item.like_count,
+            models.Item.comment_count,
+        )
+        .outerjoin(models.User, models.Item.seller_id == models.User.firebase_uid)
+        .filter(models.Item.item_id.in_(item_ids), models.Item.status == "on_sale")
+        .all()
+    )
+    by_id = {}
+    for item_id, name, price, image_url, category, username, like_count, comment_count in rows:
+        by_id[item_id] = SearchItem(
+            item_id=item_id,
+            name=name,
+            price=price,
+            image_url=image_url,
+            category=category,
+            seller=SellerSummary(username) if username is not None else None,
+            like_count=like_count or 0,
+            comment_count=comment_count or 0,
+        )
+    return [by_id[item_id] for item_id in item_ids if item_id in by_id]
+
+
+class LatencyRecorder:
+    """直近のレイテンシ（ミリ秒）を区分ごとに持ち、分位点を返す"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self.window = window
+
+    def record(self, label: str, milliseconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(label, deque(maxlen=self.window)).append(milliseconds)
+            self._counts[label] = self._counts.get(label, 0) + 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            snapshot = {label: sorted(samples) for label, samples in self._samples.items()}
+            counts = dict(self._counts)
+        result = {}
+        for label, samples in snapshot.items():
+            def percentile(p):
+                return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+            result[label] = {
+                "count": counts[label],
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(samples[-1], 3),
+            }
+        return result
+
+
+class SearchService:
+    def __init__(
+        self,
+        cache: Optional[SearchResultCache] = None,
+        item_cache: Optional[LRUCache] = None,
+    ):
+        self.cache = cache or SearchResultCache()
+        self.item_cache = item_cache or LRUCache(
+            settings.SEARCH_ITEM_CACHE_TTL_SECONDS, settings.SEARCH_ITEM_CACHE_SIZE
+        )
+        # (クエリ, 条件) -> ファセット件数。商品の増減で件数が変わるため item_events で全消去する
+        self.facet_cache = LRUCache(settings.SEARCH_CACHE_TTL_SECONDS, settings.SEARCH_CACHE_SIZE)
+        self.latency = LatencyRecorder()
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """全角スペースも区切りとして扱い、連続する空白をまとめる（大文字・小文字は区別しない）"""
+        return " ".join((query or "").replace("　", " ").lower().split())
+
+    def search_ids(
+        self,
+        db: Session,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        filters: SearchFilters = NO_FILTERS,
+    ) -> Tuple[List[str], bool]:
+        """(関連度順の商品ID, 次のページがあるか) を返す"""
+        query = self.normalize_query(query)
+        if not query:
+            return [], False
+
+        # 1件多く取って次のページの有無を判定する
+        backend = search_backend.get_backend()
+        key = ((backend.name, query, filters), offset, limit)
+        item_ids = self.cache.get(key)
+        if item_ids is None:
+            try:
+                item_ids = backend.search(db, query, limit + 1, offset, filters)
+            except Exception as e:
+                print(f"[search_service] {backend.name} search failed, falling back to LIKE: {e}")
+                db.rollback()
+                item_ids = search_backend.LikeSearchBackend().search(db, query, limit + 1, offset, filters)
+            self.cache.put(key, tuple(item_ids))
+        return list(item_ids[:limit]), len(item_ids) > limit
+
+    def get_items(self, db: Session, item_ids: List[str]) -> List[SearchItem]:
+        """商品IDの順に SearchItem を返す（商品キャッシュにないものだけ DB から読む）"""
+        found = {}
+        missing = []
+        for item_id in item_ids:
+            item = self.item_cache.get(item_id)
+            if item is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = item
+        if missing:
+            for item in load_items(db, missing):
+                self.item_cache.put(item.item_id, item)
+                found[item.item_id] = item
+        return [found[item_id] for item_id in item_ids if item_id in found]
+
+    def facets(self, db: Session, query: str, filters: SearchFilters = NO_FILTERS) -> dict:
+        """クエリに一致する商品の、カテゴリ・状態・ブランド・価格帯ごとの件数"""
+        query = self.normalize_query(query)
+        backend = search_backend.get_backend()
+        key = (backend.name, query, filters)
+        facets = self.facet_cache.get(key)
+        if facets is None:
+            try:
+                facets = backend.facets(db, query, filters)
+            except Exception as e:
+                # search_ids と同じく、失敗したら LIKE の一致集合で数える
+                print(f"[search_service] {backend.name} facets failed, falling back to LIKE: {e}")
+                db.rollback()
+                facets = search_backend.LikeSearchBackend().facets(db, query, filters)
+            self.facet_cache.put(key, facets)
+        return facets
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        category: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        condition: Optional[str] = None,
+        brand: Optional[str] = None,
+        with_facets: bool = False,
+    ) -> SearchPage:
+        """
+        キーワード（空白区切りは AND）と条件で販売中の商品を検索し、1ページ分を返す
+        with_facets=True ならファセット件数も付ける
+        """
+        start = time.perf_counter()
+        hits = self.cache.hits
+        filters = SearchFilters(
+            category=category or None,
+            min_price=min_price,
+            max_price=max_price,
+            condition=condition or None,
+            brand=brand or None,
+        )
+        item_ids, has_more = self.search_ids(db, query, offset, limit, filters)
+        page = SearchPage(
+            items=self.get_items(db, item_ids), offset=offset, limit=limit, has_more=has_more
+        )
+        if with_facets:
+            page.facets = self.facets(db, query, filters)
+        # 他スレッドのヒットが混ざることがあるが、区分けの目安なので許容する
+        label = "hit" if self.cache.hits > hits else "miss"
+        self.latency.record(label, (time.perf_counter() - start) * 1000)
+        return page
+
+    def metrics(self) -> dict:
+        """結果キャッシュ・商品キャッシュ・ファセットキャッシュの統計と、ヒット / ミス別の検索レイテンシ"""
+        return {
+            "backend": search_backend.get_backend().name,
+            "result_cache": self.cache.stats(),
+            "item_cache": self.item_cache.stats(),
+            "facet_cache": self.facet_cache.stats(),
+            "latency": self.latency.summary(),
+        }
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.item_cache.clear()
+        self.facet_cache.clear()
+
+    # item_events の購読者
+    def upsert(self, item) -> None:
+        """出品・編集: どのクエリに入るか分からないため結果は全消去し、商品キャッシュからも外す"""
+        self.cache.clear()
+        self.item_cache.pop(item.item_id)
+        self.facet_cache.clear()
+
+    def remove(self, item_id: str) -> None:
+        """売り切れ・削除: その商品を含むクエリの結果だけを捨てる"""
+        self.cache.drop_item(item_id)
+        self.item_cache.pop(item_id)
+        self.facet_cache.clear()
+
+
+# プロセス全体で共有する検索サービス（結果キャッシュ・商品キャッシュも共有）
+search_service = SearchService()
+item_events.subscribe(search_service)
@@ -0,0 +1,288 @@
+# hackathon-backend/app/services/suggest_index.py
+"""
+検索窓の入力補完（サジェスト）用の前方一致インデックス（プロセス内に常駐）
+
+- 販売中商品の商品名・ブランド・カテゴリを NFKC 正規化 + 小文字化し、(正規化した文字列, 種類) の
+  ソート済み配列に持つ。前方一致は bisect で開始位置を探し、接頭辞が一致する間だけ走査する
+- 人気度は「その文字列を持つ販売中商品の (1 + いいね数) の合計」。同点は文字列の順
+- 接頭辞ごとの上位 MAX_SUGGESTIONS 件を LRU で覚えておき、キーの人気度が変わったら
+  そのキーの接頭辞の分だけ直す（1打鍵ごとに呼ばれても走査しないで済む）
+起動時に全件を読み込み、出品・購入時は item_events から差分更新、他ワーカーの変更といいね数は
+バックグラウンドのスレッドで定期的に DB と同期して取り込む（DB はロックの外で読み、差分の反映だけロックを取る）。
+"""
+
+import bisect
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services import background_sync, item_events
+from app.services.search_index import normalize
+
+# 補完候補の種類
+KINDS = ("name", "brand", "category")
+# 1回に返す候補の上限（接頭辞ごとに覚えておく件数）
+MAX_SUGGESTIONS = 20
+# 上位候補を覚えておく接頭辞の数
+PREFIX_CACHE_SIZE = 4096
+# 同期で変わった商品がこれより多ければ、1件ずつ挿入せずに配列を作り直す
+REBUILD_THRESHOLD = 1000
+
+Key = Tuple[str, str]
+
+
+def _text_key(text: Optional[str]) -> str:
+    """正規化して、連続する空白を1つにまとめる"""
+    return " ".join(normalize(text).split())
+
+
+def _item_entries(name, brand, category) -> Dict[Key, str]:
+    """商品1件分の (正規化した文字列, 種類) -> 表示用の文字列"""
+    entries = {}
+    for kind, text in zip(KINDS, (name, brand, category)):
+        key = _text_key(text)
+        if key:
+            entries[(key, kind)] = " ".join((text or "").split())
+    return entries
+
+
+def _item_version(updated_at, created_at, like_count):
+    """商品の版（更新日時、未更新なら作成日時）。いいね数が変わっても取り込み直す"""
+    return (updated_at or created_at, like_count or 0)
+
+
+class SuggestIndex:
+    def __init__(self, sync_interval: int = settings.RECOMMEND_INDEX_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        # (正規化した文字列, 種類) の昇順
+        self._keys: List[Key] = []
+        self._scores: Dict[Key, int] = {}
+        self._labels: Dict[Key, str] = {}
+        # 商品ID -> その商品が足している (キー, 人気度)
+        self._item_entries: Dict[str, Tuple[Tuple[Key, int], ...]] = {}
+        self._versions: Dict[str, object] = {}
+        # 接頭辞 -> 上位候補のキー
+        self._top: "OrderedDict[str, List[Key]]" = OrderedDict()
+        self._bulk = False
+        self._built = False
+        self._last_sync = 0.0
+        # 同期は1つずつ（起動時の構築とバックグラウンドの同期が重ならないように）
+        self._sync_lock = threading.Lock()
+        self._background = False
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --- 差分更新 ---
+
+    def _add_score(self, key: Key, delta: int, label: Optional[str] = None) -> None:
+        score = self._scores.get(key, 0) + delta
+        if score > 0:
+            if key not in self._scores and not self._bulk:
+                bisect.insort(self._keys, key)
+            self._scores[key] = score
+            if label and key not in self._labels:
+                self._labels[key] = label
+        elif key in self._scores:
+            del self._scores[key]
+            self._labels.pop(key, None)
+            if not self._bulk:
+                del self._keys[bisect.bisect_left(self._keys, key)]
+        if not self._bulk:
+            self._update_top(key, delta)
+
+    def _update_top(self, key: Key, delta: int) -> None:
+        """
+        キーの接頭辞ごとの上位候補を直す
+        人気度が上がったなら入れ替えるだけで済む。下がったキーが上位にいたら、
+        圏外のキーが繰り上がるかもしれないので捨てる（候補が上限に満たなければ全件なので直せる）
+        """
+        text = key[0]
+        for end in range(1, len(text) + 1):
+            prefix = text[:end]
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if delta < 0 and key in top and len(top) >= MAX_SUGGESTIONS:
+                del self._top[prefix]
+                continue
+            if delta < 0 and key not in top:
+                continue
+            candidates = [other for other in top if other != key]
+            if key in self._scores:
+                candidates.append(key)
+            candidates.sort(key=self._rank)
+            self._top[prefix] = candidates[:MAX_SUGGESTIONS]
+
+    def _rank(self, key: Key):
+        """人気度の高い順、同点は文字列の順"""
+        return (-self._scores[key], key)
+
+    def _put(self, item_id: str, entries: Dict[Key, str], weight: int, version) -> None:
+        self._drop(item_id)
+        for key, label in entries.items():
+            self._add_score(key, weight, label)
+        self._item_entries[item_id] = tuple((key, weight) for key in entries)
+        self._versions[item_id] = version
+
+    def _drop(self, item_id: str) -> None:
+        self._versions.pop(item_id, None)
+        for key, weight in self._item_entries.pop(item_id, ()):
+            self._add_score(key, -weight)
+
+    def upsert(self, item: models.Item) -> None:
+        """出品・編集された商品を反映する（販売中でなければ削除）"""
+        if not self._built:
+            # 未構築なら次回の sync で全件読み込まれる
+            return
+        with self._lock:
+            if item.status != "on_sale":
+                self._drop(item.item_id)
+                return
+            like_count = item.like_count or 0
+            self._put(
+                item.item_id,
+                _item_entries(item.name, item.brand, item.category),
+                1 + like_count,
+                _item_version(item.updated_at, item.created_at, like_count),
+            )
+
+    def remove(self, item_id: str) -> None:
+        """売り切れ・削除された商品を外す"""
+        if not self._built:
+            return
+        with self._lock:
+            self._drop(item_id)
+
+    # --- DBとの同期 ---
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        DB上の販売中商品と突き合わせ、差分だけを取り込む
+        初回（と差分が多いとき）はソート済み配列を作り直す
+        バックグラウンドで同期している間は、force でなければ未構築のときだけ読み込む
+        """
+        now = time.monotonic()
+        if self._built and not force and (self._background or now - self._last_sync < self.sync_interval):
+            return
+
+        with self._sync_lock:
+            # 1. 今の版を控えてから、販売中商品のIDと版だけを軽量に取得（ここからロックの外）
+            with self._lock:
+                known = dict(self._versions)
+            rows = (
+                db.query(
+                    models.Item.item_id,
+                    models.Item.updated_at,
+                    models.Item.created_at,
+                    models.Item.like_count,
+                )
+                .filter(models.Item.status == "on_sale")
+                .all()
+            )
+            current = {
+                item_id: _item_version(updated_at, created_at, like_count)
+                for item_id, updated_at, created_at, like_count in rows
+            }
+            removed = [item_id for item_id in known if item_id not in current]
+            changed = [item_id for item_id, version in current.items() if known.get(item_id) != version]
+
+            # 2. 変わった商品の補完のキーを作る
+            updates = []
+            for start in range(0, len(changed), 5000):
+                chunk = changed[start : start + 5000]
+                for item_id, name, brand, category in (
+                    db.query(
+                        models.Item.item_id,
+                        models.Item.name,
+                        models.Item.brand,
+                        models.Item.category,
+                    )
+                    .filter(models.Item.item_id.in_(chunk))
+                    .all()
+                ):
+                    updates.append((item_id, _item_entries(name, brand, category), current[item_id]))
+
+            # 3. ロックを取って差分を反映する。読んでいる間に item_events で変わった商品は、そちらの方が新しいので残す
+            #    差分が多ければ1件ずつ挿入せず、最後にまとめて並べ直す
+            with self._lock:
+                self._bulk = len(removed) + len(updates) > REBUILD_THRESHOLD
+                try:
+                    for item_id in removed:
+                        if self._versions.get(item_id) == known[item_id]:
+                            self._drop(item_id)
+                    for item_id, entries, version in updates:
+                        if self._versions.get(item_id) == known.get(item_id):
+                            self._put(item_id, entries, 1 + version[1], version)
+                finally:
+                    if self._bulk:
+                        self._keys = sorted(self._scores)
+                        self._top.clear()
+                        self._bulk = False
+
+                if updates or removed:
+                    print(
+                        f"[suggest_index] synced: {len(updates)} changed, {len(removed)} removed, "
+                        f"keys={len(self._keys)}"
+                    )
+                self._built = True
+                self._last_sync = time.monotonic()
+
+    def start_background_sync(self, session_factory) -> None:
+        """他ワーカーの変更といいね数の取り込みを、リクエストの外で sync_interval 秒ごとに行う"""
+        if self._background:
+            return
+        self._background = True
+        background_sync.start(
+            "suggest_index", self.sync_interval, lambda db: self.sync(db, force=True), session_factory
+        )
+
+    # --- 補完 ---
+
+    def _top_keys(self, prefix: str) -> List[Key]:
+        """接頭辞に一致するキーを人気度の高い順に MAX_SUGGESTIONS 件（覚えてあればそれを返す）"""
+        top = self._top.get(prefix)
+        if top is not None:
+            self._top.move_to_end(prefix)
+            return top
+
+        start = bisect.bisect_left(self._keys, (prefix,))
+        end = start
+        while end < len(self._keys) and self._keys[end][0].startswith(prefix):
+            end += 1
+        top = heapq.nsmallest(MAX_SUGGESTIONS, self._keys[start:end], key=self._rank)
+        self._top[prefix] = top
+        while len(self._top) > PREFIX_CACHE_SIZE:
+            self._top.popitem(last=False)
+        return top
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """接頭辞で始まる商品名・ブランド・カテゴリを人気度の高い順に返す"""
+        # 入力途中の末尾の空白は「次の単語を打つところ」なので1つだけ残す
+        text = _text_key(prefix)
+        if not text:
+            return []
+        if prefix[-1:].isspace():
+            text += " "
+
+        with self._lock:
+            return [
+                {"text": self._labels[key], "kind": key[1], "score": self._scores[key]}
+                for key in self._top_keys(text)[:limit]
+            ]
+
+
+# プロセス全体で共有するインデックス（出品・購入時に item_events から差分更新される）
+suggest_index = SuggestIndex()
+item_events.subscribe(suggest_index)
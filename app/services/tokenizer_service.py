@@ -0,0 +1,188 @@
+# hackathon-backend/app/services/tokenizer_service.py
+"""
+商品テキストのトークナイズ（Janome）
+
+- Janome の Tokenizer はスレッドごとに1つ持つ（スレッド間で共有しない）
+- 商品ごとの単語出現回数は (item_id, 版) をキーに item_token_cache テーブルへ保存し、
+  デプロイ後の再構築では新規・変更された商品だけをトークナイズする
+  保存は専用のセッションでコミットし、呼び出し側（リクエスト）のトランザクションには触れない
+- 大量にトークナイズする場合はプロセスプールで並列化する
+"""
+
+import atexit
+import json
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from janome.tokenizer import Tokenizer
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+# 単語カウントの作り方を変えたら上げる（古いキャッシュは使われなくなる）
+TOKENIZER_VERSION = 1
+
+# 商品名の重み（商品名の単語は3回分として数える）
+NAME_WEIGHT = 3
+
+# この件数以上をまとめてトークナイズする時だけプロセスプールを使う
+POOL_MIN_TEXTS = 5000
+
+_local = threading.local()
+
+
+def _get_tokenizer() -> Tokenizer:
+    """スレッドごとの Tokenizer を返す"""
+    tokenizer = getattr(_local, "tokenizer", None)
+    if tokenizer is None:
+        tokenizer = _local.tokenizer = Tokenizer()
+    return tokenizer
+
+
+def japanese_tokenizer(text):
+    """
+    日本語の文章を単語に分割する関数
+    例: "これはペンです" -> ["これ", "は", "ペン", "です"]
+    """
+    if not text:
+        return []
+    return [token.surface for token in _get_tokenizer().tokenize(text)]
+
+
+def item_fields(item) -> Tuple[str, str, str, str]:
+    """トークナイズに使う商品のフィールド (商品名, カテゴリ, 状態, 説明文)"""
+    return (item.name or "", item.category or "", item.condition or "", item.description or "")
+
+
+def item_term_counts(fields: Tuple[str, str, str, str]) -> Dict[str, int]:
+    """
+    商品の単語出現回数を数える
+    商品名は1回だけトークナイズし、NAME_WEIGHT 倍して重要度を上げる
+    空白だけのトークンは数えない
+    """
+    name, category, condition, description = fields
+    counts: Counter = Counter()
+    for term in japanese_tokenizer(name.lower()):
+        if not term.isspace():
+            counts[term] += NAME_WEIGHT
+    for text in (category, condition, description):
+        counts.update(term for term in japanese_tokenizer(text.lower()) if not term.isspace())
+    return dict(counts)
+
+
+# --- プロセスプール ---
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # fork だと親プロセスのロックやDB接続を引き継ぐため spawn で起動する
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def tokenize_items(
+    fields_list: List[Tuple[str, str, str, str]], workers: int = settings.TOKENIZER_WORKERS
+) -> List[Dict[str, int]]:
+    """複数商品の単語出現回数をまとめて数える（件数が多ければプロセスプールで並列化）"""
+    if workers > 1 and len(fields_list) >= POOL_MIN_TEXTS:
+        chunksize = max(1, len(fields_list) // (workers * 4))
+        return list(_get_pool(workers).map(item_term_counts, fields_list, chunksize=chunksize))
+    return [item_term_counts(fields) for fields in fields_list]
+
+
+# --- トークンキャッシュ (item_token_cache) ---
+
+def load_cached_counts(db: Session, versions: Dict[str, object]) -> Dict[str, Dict[str, int]]:
+    """
+    キャッシュ済みの単語出現回数を返す
+    versions: item_id -> 版。版が一致するものだけをヒットとする
+    """
+    if not versions:
+        return {}
+    rows = (
+        db.query(
+            models.ItemTokenCache.item_id,
+            models.ItemTokenCache.item_version,
+            models.ItemTokenCache.term_counts,
+        )
+        .filter(
+            models.ItemTokenCache.item_id.in_(list(versions)),
+            models.ItemTokenCache.tokenizer_version == TOKENIZER_VERSION,
+        )
+        .all()
+    )
+    return {
+        item_id: json.loads(term_counts)
+        for item_id, item_version, term_counts in rows
+        if versions.get(item_id) == item_version
+    }
+
+
+def save_cached_counts(
+    db: Session, entries: Iterable[Tuple[str, object, Dict[str, int]]]
+) -> None:
+    """
+    (item_id, 版, 単語出現回数) をキャッシュに保存する（既存行は置き換え）
+    db と同じ接続先の専用セッションで書いてコミットする（db のトランザクションはコミットしない）
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    item_ids = [item_id for item_id, _, _ in entries]
+    with Session(bind=db.get_bind()) as cache_db:
+        cache_db.query(models.ItemTokenCache).filter(
+            models.ItemTokenCache.item_id.in_(item_ids)
+        ).delete(synchronize_session=False)
+        cache_db.bulk_insert_mappings(
+            models.ItemTokenCache,
+            [
+                {
+                    "item_id": item_id,
+                    "item_version": version,
+                    "tokenizer_version": TOKENIZER_VERSION,
+                    "term_counts": json.dumps(counts, ensure_ascii=False),
+                }
+                for item_id, version, counts in entries
+            ],
+        )
+        cache_db.commit()
+
+
+def get_item_term_counts(
+    db: Session, versions: Dict[str, object], workers: int = settings.TOKENIZER_WORKERS
+) -> Dict[str, Dict[str, int]]:
+    """
+    商品IDと版から単語出現回数を取得する
+    キャッシュにない（または版が古い）商品だけDBから読み込んでトークナイズし、キャッシュに保存する
+    """
+    result = load_cached_counts(db, versions)
+    misses = [item_id for item_id in versions if item_id not in result]
+    if not misses:
+        return result
+
+    items = db.query(models.Item).filter(models.Item.item_id.in_(misses)).all()
+    counts_list = tokenize_items([item_fields(item) for item in items], workers=workers)
+
+    entries = []
+    for item, counts in zip(items, counts_list):
+        result[item.item_id] = counts
+        entries.append((item.item_id, versions[item.item_id], counts))
+    try:
+        save_cached_counts(db, entries)
+    except Exception as e:
+        # キャッシュ保存に失敗しても計算結果はそのまま使う（専用セッションは with を抜けるときに破棄される）
+        print(f"[tokenizer] token cache save failed: {e}")
+    return result
@@ -0,0 +1,34 @@
+# hackathon-backend/app/services/user_recommend_service.py
+"""
+ユーザー別おすすめ（user_recommendations）の読み出し
+バッチ (app/jobs/build_user_recommendations.py) が ALS で事前計算した結果を1クエリで返すだけなので、
+Webワーカーでは学習や関連ライブラリの読み込みを行わない。
+"""
+
+from typing import List
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.core.config import settings
+
+
+def get_user_recommended_items(
+    db: Session, user_id: str, limit: int = settings.RECOMMEND_ITEM_COUNT
+) -> List[models.Item]:
+    """
+    事前計算済みのユーザー別おすすめを順位順に返す（販売中のもののみ）
+    行動履歴がなく計算されていないユーザーは空を返すので、呼び出し側で別の方法に切り替える
+    """
+    return (
+        db.query(models.Item)
+        .join(models.UserRecommendation, models.UserRecommendation.item_id == models.Item.item_id)
+        .options(joinedload(models.Item.seller))
+        .filter(
+            models.UserRecommendation.user_id == user_id,
+            models.Item.status == "on_sale",
+        )
+        .order_by(models.UserRecommendation.rank)
+        .limit(limit)
+        .all()
+    )
@@ -7,6 +7,7 @@ from .time_utils import (
     get_jst_now,
     get_jst_today,
     to_jst,
+    from_db_time,
     is_same_day_jst,
     is_consecutive_day_jst,
     days_since_jst,
@@ -0,0 +1,35 @@
+# hackathon-backend/app/utils/cursor.py
+"""
+キーセットページング用のカーソル
+
+最後に返した行の並び順のキー（作成日時, ID）を URL で渡せる文字列にする。
+中身はクライアントに依存させないため、base64 (URL-safe) の JSON として不透明に扱う。
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    """カーソルが壊れている・別の API のもの"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(作成日時, ID) をカーソル文字列にする"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """カーソル文字列から (作成日時, ID) を取り出す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(row_id, int):
+            raise TypeError(row_id)
+        return datetime.fromisoformat(created_at), row_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(f"invalid cursor: {cursor!r}") from e
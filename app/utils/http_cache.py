@@ -0,0 +1,58 @@
+# hackathon-backend/app/utils/http_cache.py
+"""
+HTTP の条件付き GET（ETag / If-None-Match）と Cache-Control
+
+エンドポイントは行を読み込む前に、版（商品の version など）だけを軽く読んで ETag を作る。
+If-None-Match が一致すれば、行の読み込みもシリアライズもせずに 304 を返す。
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+from app.core.config import settings
+
+# 誰が見ても同じレスポンス（商品・キャラクター一覧）: ブラウザは毎回再検証し、CDN は短時間保持する
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age=0, s-maxage={settings.HTTP_CACHE_S_MAXAGE}, "
+    f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+)
+# ユーザーごとのレスポンス: CDN には置かず、ブラウザは毎回再検証する
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """版を表す値から弱い ETag を作る（同じ値なら同じ ETag）"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match のどれかが ETag と一致するか（弱い比較なので W/ は無視する）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    value = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == value for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str, cache_control: str = PUBLIC_CACHE_CONTROL, vary: Optional[str] = None) -> dict:
+    """200 / 304 に付けるヘッダー"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(if_none_match: Optional[str], etag: str, **kwargs) -> Optional[Response]:
+    """If-None-Match が一致すれば 304 のレスポンス、しなければ None"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers(etag, **kwargs))
+    return None
+
+
+def set_cache_headers(response: Response, etag: str, **kwargs) -> None:
+    """200 のレスポンスに ETag と Cache-Control を付ける"""
+    response.headers.update(cache_headers(etag, **kwargs))
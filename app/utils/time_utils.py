@@ -6,7 +6,11 @@
 from datetime import datetime, timedelta
 from pytz import timezone as tz
 
+from app.core.config import settings
+
 JST = tz('Asia/Tokyo')
+# DB の server_default (func.now()) で入ったタイムゾーンなしの日時のタイムゾーン
+DB_TZ = tz(settings.DB_TIMEZONE)
 
 
 def get_jst_now() -> datetime:
@@ -28,6 +32,15 @@ def to_jst(dt: datetime) -> datetime:
     return JST.localize(dt)
 
 
+def from_db_time(dt: datetime) -> datetime:
+    """DB の server_default (func.now()) で入った日時をJSTに変換（タイムゾーンなしなら DB_TIMEZONE として扱う）"""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = DB_TZ.localize(dt)
+    return dt.astimezone(JST)
+
+
 def is_same_day_jst(dt1: datetime, dt2: datetime = None) -> bool:
     """2つの日時が同じ日（JST）かどうか"""
     if dt1 is None:
@@ -0,0 +1,8 @@
+# hackathon-backend/benchmarks/__init__.py
+"""
+おすすめ・検索まわりのベンチマーク
+
+- catalog.py: REALISTIC_ITEMS を元にした合成カタログ（1k〜1M 商品）の生成
+- bench_recommend.py: 合成カタログ上でおすすめ系の各経路を計測し、JSON で出力
+- bench_topk.py / bench_ann.py: 類似度計算部分だけのマイクロベンチマーク
+"""
@@ -0,0 +1,134 @@
+# hackathon-backend/benchmarks/bench_ann.py
+"""
+ANN インデックスの再現率・レイテンシのベンチマーク
+
+トピック構造を持つ合成 TF-IDF 行列に対して、
+- 厳密計算 (recommend_service.top_k_similar)
+- ANN のみ (ann_index.AnnIndex.search)
+- ANN 候補 + 厳密な類似度で並べ直し（RecommendIndex が大規模カタログで使う経路）
+を nprobe ごとに比較し、recall@k（厳密計算の上位 k 件がどれだけ含まれるか）を出す。
+
+実行例:
+    python benchmarks/bench_ann.py
+    python benchmarks/bench_ann.py --sizes 1000000 --nprobe 4 8 16 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+
+# 自身の場所(benchmarks)から1つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from app.services.ann_index import AnnIndex, build_ann_index
+from app.services.recommend_service import normalize_rows, top_k_similar
+
+
+def make_topic_matrix(
+    n_items: int,
+    n_terms: int = 50_000,
+    n_topics: int = 500,
+    terms_per_item: int = 30,
+    topic_share: float = 0.6,
+    seed: int = 0,
+):
+    """
+    各商品が1つのトピック（カテゴリ・ブランドのようなもの）に属する合成 TF-IDF 行列
+    単語の topic_share はトピック固有の語彙から、残りは全体の Zipf 分布から選ぶ
+    """
+    rng = np.random.default_rng(seed)
+    topic_terms = 50
+    topics = rng.integers(0, n_topics, size=n_items)
+    n_topic = int(terms_per_item * topic_share)
+    n_common = terms_per_item - n_topic
+
+    topic_vocab = rng.integers(0, n_terms, size=(n_topics, topic_terms))
+    picks = rng.zipf(1.5, size=(n_items, n_topic)) % topic_terms
+    topic_indices = topic_vocab[topics[:, None], picks]
+    common_indices = (rng.zipf(1.3, size=(n_items, n_common)) - 1) % n_terms
+
+    indices = np.concatenate([topic_indices, common_indices], axis=1).ravel()
+    data = rng.random(indices.size, dtype=np.float32) + 0.1
+    indptr = np.arange(0, indices.size + 1, terms_per_item, dtype=np.int64)
+    matrix = sparse.csr_matrix((data, indices.astype(np.int32), indptr), shape=(n_items, n_terms))
+    matrix.sum_duplicates()
+    return normalize_rows(matrix).astype(np.float32)
+
+
+def rerank(matrix, target: int, candidates, k: int):
+    """ANN 候補を厳密な類似度で並べ直す（RecommendIndex._ann_neighbors と同じ計算）"""
+    rows = np.array(candidates, dtype=np.int64)
+    if len(rows) == 0:
+        return []
+    scores = np.asarray((matrix[rows] @ matrix[target].T).todense()).ravel()
+    return rows[np.lexsort((rows, -scores))[:k]].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN recall / latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--candidates", type=int, default=10, help="rerank 用の候補倍率")
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    for n_items in args.sizes:
+        matrix = make_topic_matrix(n_items)
+        item_ids = [f"item-{i:08d}" for i in range(n_items)]
+        targets = np.random.default_rng(1).integers(0, n_items, size=args.queries)
+
+        # 1. 厳密計算（正解）
+        exact = {}
+        latencies = []
+        for target in targets:
+            start = time.perf_counter()
+            top, _ = top_k_similar(matrix, int(target), args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            exact[int(target)] = set(top.tolist())
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            start = time.perf_counter()
+            path = build_ann_index(matrix, item_ids, out_dir, dim=args.dim)
+            build_seconds = time.perf_counter() - start
+            ann = AnnIndex(path)
+
+            print(f"\nitems={n_items} build={build_seconds:.1f}s lists={len(ann.centroids)}")
+            print(f"{'method':>16} {'nprobe':>7} {'recall@k':>9} {'p50 ms':>9} {'p95 ms':>9}")
+            print(f"{'exact':>16} {'-':>7} {1.0:>9.3f} "
+                  f"{statistics.median(latencies):>9.2f} {np.percentile(latencies, 95):>9.2f}")
+
+            for nprobe in args.nprobe:
+                results = {"ann": ([], []), "ann+rerank": ([], [])}
+                for target in targets:
+                    target = int(target)
+                    truth = exact[target]
+
+                    start = time.perf_counter()
+                    hits = ann.search(item_ids[target], args.k, nprobe=nprobe)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    found = {int(item_id[5:]) for item_id, _ in hits}
+                    results["ann"][0].append(len(found & truth) / len(truth))
+                    results["ann"][1].append(elapsed)
+
+                    start = time.perf_counter()
+                    hits = ann.search(item_ids[target], args.k * args.candidates, nprobe=nprobe)
+                    found = set(rerank(matrix, target, [int(item_id[5:]) for item_id, _ in hits], args.k))
+                    elapsed = (time.perf_counter() - start) * 1000
+                    results["ann+rerank"][0].append(len(found & truth) / len(truth))
+                    results["ann+rerank"][1].append(elapsed)
+
+                for method, (recalls, lat) in results.items():
+                    print(f"{method:>16} {nprobe:>7} {statistics.mean(recalls):>9.3f} "
+                          f"{statistics.median(lat):>9.2f} {np.percentile(lat, 95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
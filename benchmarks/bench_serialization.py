@@ -0,0 +1,333 @@
+# hackathon-backend/benchmarks/bench_serialization.py
+"""
+レスポンスのシリアライズの CPU 時間のベンチマーク（DB なし・合成データ）
+
+よく呼ばれるエンドポイントが返す値を作っておき、JSON のレスポンスにするまでの CPU 時間
+（time.process_time）を1リクエストあたりで比べて JSON で出力する。
+- before: 今までの経路。response_model のあるルートは FastAPI と同じくルートの response_field で
+  検証し直してから JSON にする。response_model のないルートは jsonable_encoder + JSONResponse
+- after: app.core.responses の経路（事前コンパイル済みの TypeAdapter / orjson の FastJSONResponse）
+- same_json: 両方の JSON を読み直して同じ内容か
+計測する値:
+- item_detail: GET /items/{item_id}（コメント付きの商品。キャッシュに入れる JSON を作るとき）
+- list_items: GET /items・/users/me/items など（ItemSummary の1ページ）
+- search_items / search_items_facets: GET /search/items
+- notifications: GET /notifications
+- conversations: GET /messages/conversations
+- recommend_history: GET /recommend/history
+- me_personas: GET /users/me/personas（手で組み立てた dict のリスト）
+- missions: GET /mission/missions（手で組み立てた dict）
+商品の中身は benchmarks/catalog.py の合成カタログと同じ作り方。
+
+実行例:
+    python -m benchmarks.bench_serialization --output serialization.json
+    python -m benchmarks.bench_serialization --rounds 5000 --page-size 100
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 自身の場所(benchmarks)から1つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from benchmarks.bench_recommend import environment
+from benchmarks.catalog import generate_items
+from app.api.v1.endpoints import items, messages, notification, recommend, search
+from app.core.responses import FastJSONResponse, adapter_response
+from app.db.data.personas import PERSONAS_DATA
+from app.schemas import serializers
+from app.schemas.item import SearchItemResponse, SearchItemsWithFacetsResponse
+from app.schemas.notification import NotificationListResponse
+from app.schemas.recommend import RecommendHistoryItem
+from app.schemas.user import PersonaBase
+from app.services.item_summary import ItemSummary, SummarySeller
+
+
+def route_field(router, path: str):
+    """ルーターから path の GET ルートの response_field（FastAPI がレスポンスの検証に使うもの）を探す"""
+    for route in router.routes:
+        if route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+def typed_response(field, value) -> Response:
+    """response_model のあるルートで FastAPI がすること（検証し直してから JSON にする）"""
+    validated, errors = field.validate(value, {}, loc=("response",))
+    assert not errors, errors
+    return Response(content=field.serialize_json(validated), media_type="application/json")
+
+
+def typed(router, path: str):
+    """path のルートの typed_response"""
+    field = route_field(router, path)
+    return lambda value: typed_response(field, value)
+
+
+def untyped_response(value) -> Response:
+    """response_model のないルートで FastAPI がすること"""
+    return JSONResponse(jsonable_encoder(value))
+
+
+# --- 合成データ ---
+
+
+def make_payloads(page_size: int, comments: int, seed: int) -> dict:
+    """エンドポイントごとに (返す値, before の経路, after の経路) を作る"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    users_ = [
+        SimpleNamespace(
+            id=i,
+            firebase_uid=f"bench_user_{i}",
+            username=f"ユーザー{i}",
+            email=f"user{i}@example.com",
+            icon_url=f"https://example.com/icons/{i}.png",
+            current_persona_id=1,
+            current_persona=None,
+            sub_persona_id=None,
+            sub_persona=None,
+            subscription_tier="free",
+            subscription_expires_at=None,
+            gacha_points=rng.randint(0, 500),
+            memory_fragments=rng.randint(0, 50),
+            average_rating=round(rng.uniform(3, 5), 2),
+            rating_count=rng.randint(0, 30),
+        )
+        for i in range(1, 21)
+    ]
+    rows = list(generate_items(page_size, [user.firebase_uid for user in users_], seed=seed))
+
+    # 商品詳細（ORM の Item と同じ属性を持つオブジェクト）
+    detail_row = rows[0]
+    detail = SimpleNamespace(
+        **detail_row,
+        seller=rng.choice(users_),
+        comments=[
+            SimpleNamespace(
+                comment_id=f"c{j}",
+                content="気になっています。お値下げは可能でしょうか？" * rng.randint(1, 3),
+                created_at=now - timedelta(minutes=j),
+                user=rng.choice(users_),
+            )
+            for j in range(comments)
+        ],
+        like_count=rng.randint(0, 50),
+        comment_count=comments,
+    )
+
+    summaries = [
+        ItemSummary(
+            item_id=row["item_id"],
+            name=row["name"],
+            price=row["price"],
+            image_url=row["image_url"],
+            status=row["status"],
+            is_instant_buy_ok=row["is_instant_buy_ok"],
+            category=row["category"],
+            brand=row["brand"],
+            condition=row["condition"],
+            seller=SummarySeller(i % 20 + 1, row["seller_id"], f"ユーザー{i % 20 + 1}"),
+            like_count=rng.randint(0, 50),
+            comment_count=rng.randint(0, 10),
+            created_at=row["created_at"],
+        )
+        for i, row in enumerate(rows)
+    ]
+
+    search_items = [
+        SearchItemResponse(
+            item_id=row["item_id"],
+            name=row["name"],
+            price=row["price"],
+            image_url=row["image_url"],
+            category=row["category"],
+            seller={"username": f"ユーザー{i % 20 + 1}"},
+            like_count=rng.randint(0, 50),
+            comment_count=rng.randint(0, 10),
+        )
+        for i, row in enumerate(rows[:20])
+    ]
+    search_facets = SearchItemsWithFacetsResponse(
+        items=search_items,
+        facets={
+            "category": [{"value": row["category"], "count": rng.randint(1, 500)} for row in rows[:8]],
+            "condition": [{"value": row["condition"], "count": rng.randint(1, 500)} for row in rows[:5]],
+            "brand": [{"value": row["brand"] or "なし", "count": rng.randint(1, 500)} for row in rows[:10]],
+            "price": [
+                {"min_price": low, "max_price": high, "count": rng.randint(1, 500)}
+                for low, high in [(0, 1000), (1000, 5000), (5000, 10000), (10000, None)]
+            ],
+        },
+        offset=0,
+        limit=20,
+        has_more=True,
+    )
+
+    notifications = NotificationListResponse(
+        notifications=[
+            SimpleNamespace(
+                id=i,
+                type="like",
+                title="いいねされました",
+                message=f"{row['name']} にいいねがつきました",
+                link=f"/items/{row['item_id']}",
+                is_read=False,
+                created_at=now - timedelta(minutes=i),
+            )
+            for i, row in enumerate(rows[:20])
+        ],
+        unread_count=20,
+    )
+
+    conversations = [
+        messages.ConversationPreview(
+            id=i,
+            other_user_id=user.id,
+            other_user_username=user.username,
+            other_user_icon_url=user.icon_url,
+            last_message="まだ購入可能でしょうか？よろしくお願いします。",
+            last_message_at=now - timedelta(hours=i),
+            unread_count=rng.randint(0, 3),
+            item_id=row["item_id"],
+            item_name=row["name"],
+        )
+        for i, (user, row) in enumerate(zip(users_, rows))
+    ]
+
+    history = [
+        RecommendHistoryItem(
+            id=i,
+            item_id=row["item_id"],
+            name=row["name"],
+            price=row["price"],
+            image_url=row["image_url"],
+            status=row["status"],
+            reason="以前いいねした商品と雰囲気が近いので、きっと気に入ると思います！",
+            persona_name=PERSONAS_DATA[i % len(PERSONAS_DATA)]["name"],
+            persona_avatar_url=PERSONAS_DATA[i % len(PERSONAS_DATA)]["avatar_url"],
+            interest=None,
+            recommended_at=(now - timedelta(hours=i)).isoformat(),
+        )
+        for i, row in enumerate(rows[:20])
+    ]
+
+    personas = []
+    for data in PERSONAS_DATA:
+        persona = PersonaBase.model_validate(data).model_dump()
+        persona["level"] = rng.randint(1, 10)
+        persona["stack_count"] = rng.randint(0, 5)
+        personas.append(persona)
+
+    missions = {
+        "missions": [
+            {
+                "id": f"mission_{i}",
+                "name": "デイリーログインボーナス",
+                "description": "毎日ログインしてポイントをゲット！",
+                "completed": False,
+                "claimable": True,
+                "reward": {"gacha_points": 10, "coupon": {"type": "shipping_discount", "discount_percent": 5, "hours": 3}},
+                "reset": "daily",
+                "progress": {"current": 0, "target": 1},
+            }
+            for i in range(6)
+        ],
+        "equipped_persona": {"id": 1, "name": PERSONAS_DATA[0]["name"], "avatar_url": PERSONAS_DATA[0]["avatar_url"]},
+        "memory_fragments": 12,
+        "gacha_points": 340,
+        "login_streak": 4,
+        "total_login_days": 31,
+    }
+
+    return {
+        "item_detail": (detail, typed(items.router, "/{item_id}"), lambda v: Response(
+            serializers.ITEM.dump_json(serializers.ITEM.validate_python(v)), media_type="application/json"
+        )),
+        "list_items": (summaries, typed(items.router, ""), lambda v: adapter_response(serializers.ITEM_SUMMARIES, v)),
+        "search_items": (search_items, typed(search.router, "/search/items"), lambda v: adapter_response(serializers.SEARCH_ITEMS, v)),
+        "search_items_facets": (
+            search_facets,
+            typed(search.router, "/search/items"),
+            lambda v: adapter_response(serializers.SEARCH_ITEMS_WITH_FACETS, v),
+        ),
+        "notifications": (
+            notifications,
+            typed(notification.router, "/notifications"),
+            lambda v: adapter_response(serializers.NOTIFICATION_LIST, v),
+        ),
+        "conversations": (
+            conversations,
+            typed(messages.router, "/conversations"),
+            lambda v: adapter_response(messages.CONVERSATION_PREVIEWS, v),
+        ),
+        "recommend_history": (
+            history,
+            typed(recommend.router, "/history"),
+            lambda v: adapter_response(serializers.RECOMMEND_HISTORY, v),
+        ),
+        "me_personas": (personas, untyped_response, FastJSONResponse),
+        "missions": (missions, untyped_response, FastJSONResponse),
+    }
+
+
+# --- 計測 ---
+
+
+def cpu_per_call_us(func, value, rounds: int) -> float:
+    """func(value) 1回あたりの CPU 時間（マイクロ秒）"""
+    for _ in range(min(rounds, 50)):
+        func(value)
+    start = time.process_time()
+    for _ in range(rounds):
+        func(value)
+    return (time.process_time() - start) / rounds * 1e6
+
+
+def run(rounds: int, page_size: int, comments: int, seed: int) -> dict:
+    endpoints = {}
+    for name, (value, before, after) in make_payloads(page_size, comments, seed).items():
+        before_body, after_body = before(value).body, after(value).body
+        before_us = cpu_per_call_us(before, value, rounds)
+        after_us = cpu_per_call_us(after, value, rounds)
+        endpoints[name] = {
+            "before_us": round(before_us, 1),
+            "after_us": round(after_us, 1),
+            "speedup": round(before_us / after_us, 2) if after_us > 0 else None,
+            "response_kb": round(len(after_body) / 1024, 1),
+            "same_json": json.loads(before_body) == json.loads(after_body),
+        }
+        print(f"[bench] {name}: {endpoints[name]}", file=sys.stderr)
+    return {"rounds": rounds, "page_size": page_size, "comments": comments, "endpoints": endpoints}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization CPU benchmark")
+    parser.add_argument("--rounds", type=int, default=2000, help="エンドポイントごとの繰り返し回数")
+    parser.add_argument("--page-size", type=int, default=50, help="商品一覧の1ページの件数")
+    parser.add_argument("--comments", type=int, default=10, help="商品詳細のコメント数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果の JSON を書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args()
+
+    result = run(args.rounds, args.page_size, args.comments, args.seed)
+    report = {"benchmark": "serialization", "environment": environment(), "results": [result]}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
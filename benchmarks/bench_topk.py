@@ -0,0 +1,97 @@
+# hackathon-backend/benchmarks/bench_topk.py
+"""
+類似商品 Top-k 計算のベンチマーク
+
+合成した TF-IDF 疎行列（10k / 100k / 1M 商品）に対して、
+recommend_service.top_k_similar のレイテンシとピークメモリを計測する。
+小さいサイズでは旧実装（全商品 x 全商品の cosine 行列 + 全件ソート）とも比較する。
+
+実行例:
+    python benchmarks/bench_topk.py
+    python benchmarks/bench_topk.py --sizes 10000 100000 --queries 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy import sparse
+
+# 自身の場所(benchmarks)から1つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from app.services.recommend_service import normalize_rows, top_k_similar
+
+
+def make_tfidf_matrix(n_items: int, n_terms: int = 50_000, terms_per_item: int = 30, seed: int = 0):
+    """単語の出現頻度がべき分布に従う、L2正規化済みの合成 TF-IDF 行列を作る"""
+    rng = np.random.default_rng(seed)
+    nnz = n_items * terms_per_item
+    # Zipf 分布で単語IDを選び、語彙数に収める
+    indices = (rng.zipf(1.3, size=nnz) - 1) % n_terms
+    data = rng.random(nnz, dtype=np.float32) + 0.1
+    indptr = np.arange(0, nnz + 1, terms_per_item, dtype=np.int64)
+    matrix = sparse.csr_matrix((data, indices.astype(np.int32), indptr), shape=(n_items, n_terms))
+    matrix.sum_duplicates()
+    return normalize_rows(matrix).astype(np.float32)
+
+
+def full_matrix_baseline(matrix, target_index: int, k: int):
+    """旧実装相当: 全商品 x 全商品の類似度行列を作り、ターゲット行を全件ソートする"""
+    cosine_sim = (matrix @ matrix.T).toarray()
+    sim_scores = sorted(enumerate(cosine_sim[target_index]), key=lambda x: x[1], reverse=True)
+    return [i for i, _ in sim_scores if i != target_index][:k]
+
+
+def measure(func, matrix, targets, k):
+    """レイテンシ（ミリ秒）のリストと、1クエリあたりのピーク確保メモリ（バイト）を返す"""
+    latencies = []
+    peak = 0
+    for target in targets:
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(matrix, int(target), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return latencies, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-k similarity benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--baseline-max",
+        type=int,
+        default=5_000,
+        help="旧実装（n x n 行列）を計測する最大商品数",
+    )
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'method':>10} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>10}")
+    for n_items in args.sizes:
+        matrix = make_tfidf_matrix(n_items)
+        targets = np.random.default_rng(1).integers(0, n_items, size=args.queries)
+
+        methods = [("top_k", top_k_similar)]
+        if n_items <= args.baseline_max:
+            methods.append(("full", full_matrix_baseline))
+
+        for name, func in methods:
+            latencies, peak = measure(func, matrix, targets, args.k)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f"{n_items:>10} {name:>10} {statistics.median(latencies):>10.2f} "
+                f"{p95:>10.2f} {peak / 1024 / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# hackathon-backend/benchmarks/catalog.py
+"""
+ベンチマーク用の合成カタログ
+
+app/db/data/items.py の REALISTIC_ITEMS をテンプレートにして、
+商品名の型番・色・サイズ、価格、状態、説明文の並びを変えた商品を任意の件数だけ作る。
+同じ seed なら同じカタログになる（リリース間で結果を比較するため）。
+"""
+
+import os
+import random
+import sys
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator
+
+# 自身の場所(benchmarks)から1つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.engine import Engine
+
+from app.db import models
+from app.db.database import Base
+from app.db.data.items import REALISTIC_ITEMS
+
+COLORS = ["ブラック", "ホワイト", "ネイビー", "グレー", "ベージュ", "レッド", "ブルー", "グリーン"]
+SIZES = ["S", "M", "L", "XL", "フリーサイズ", "24cm", "26cm", "28cm"]
+NOTES = ["美品", "箱付き", "送料込み", "即購入OK", "値下げしました", "早い者勝ち", "まとめ売り", "限定モデル"]
+CONDITIONS = sorted({item["condition"] for item in REALISTIC_ITEMS})
+EXTRA_SENTENCES = [
+    "ペットや喫煙者のいない環境で保管していました。",
+    "使用感は写真でご確認ください。",
+    "丁寧に梱包して発送します。",
+    "気になる点があればコメントでお気軽にどうぞ。",
+    "数回使用しただけなので状態は良好です。",
+    "付属品は写真に写っているものが全てです。",
+]
+
+BATCH_SIZE = 10_000
+
+
+def generate_items(n_items: int, seller_ids, seed: int = 0) -> Iterator[Dict]:
+    """REALISTIC_ITEMS を元に n_items 件の商品 (items テーブルの行) を生成する"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for i in range(n_items):
+        template = REALISTIC_ITEMS[i % len(REALISTIC_ITEMS)]
+
+        # 1. 商品名にバリエーションを付ける（型番・色・サイズ・一言）
+        name = template["name"]
+        if rng.random() < 0.5:
+            name += f" {rng.choice(COLORS)}"
+        if rng.random() < 0.3:
+            name += f" {rng.choice(SIZES)}"
+        if rng.random() < 0.4:
+            name += f" 【{rng.choice(NOTES)}】"
+        if rng.random() < 0.3:
+            name += f" #{rng.randint(100, 9999)}"
+
+        # 2. 説明文は元の文に定型文を混ぜる
+        sentences = [template["description"]] + rng.sample(EXTRA_SENTENCES, rng.randint(0, 3))
+        rng.shuffle(sentences)
+
+        yield {
+            "item_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": name,
+            "description": "".join(sentences),
+            "price": max(300, int(template["price"] * rng.uniform(0.6, 1.4)) // 100 * 100),
+            "category": template["category"],
+            "brand": template.get("brand"),
+            "condition": rng.choice(CONDITIONS),
+            "image_url": None,
+            "status": "on_sale" if rng.random() < 0.9 else "sold",
+            "is_instant_buy_ok": True,
+            "seller_id": rng.choice(seller_ids),
+            "created_at": now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+        }
+
+
+def build_catalog(
+    engine: Engine, n_items: int, n_users: int = None, seed: int = 0, comment_rate: float = 0.0
+) -> None:
+    """
+    テーブルを作り直して、ユーザー・商品・いいね（と comment_rate > 0 ならコメント）の合成データを投入する
+    既存のデータはすべて消えるので、ベンチマーク専用のDBにだけ使うこと
+    """
+    rng = random.Random(seed)
+    n_users = n_users or max(10, n_items // 20)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    user_ids = [f"bench_user_{i}" for i in range(n_users)]
+    item_ids = []
+    with engine.begin() as conn:
+        # 1. ユーザー
+        for start in range(0, n_users, BATCH_SIZE):
+            conn.execute(
+                insert(models.User),
+                [
+                    {"firebase_uid": uid, "username": uid, "email": f"{uid}@example.com"}
+                    for uid in user_ids[start : start + BATCH_SIZE]
+                ],
+            )
+
+        # 2. 商品
+        batch = []
+        for row in generate_items(n_items, user_ids, seed=seed):
+            batch.append(row)
+            item_ids.append(row["item_id"])
+            if len(batch) >= BATCH_SIZE:
+                conn.execute(insert(models.Item), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Item), batch)
+
+        # 3. いいね（ユーザーあたり平均5件）
+        #    各ユーザーは好みのテンプレート（似た商品群）を2つ持ち、7割はそこから選ぶ
+        #    残りは全体から人気商品に偏らせて選ぶ。いいねの日時は過去90日に散らす
+        now = datetime.now(timezone.utc)
+        n_templates = min(len(REALISTIC_ITEMS), n_items)
+        likes = {}
+        for uid in user_ids:
+            favorites = rng.sample(range(n_templates), min(2, n_templates))
+            for _ in range(rng.randint(0, 10)):
+                rank = int(rng.paretovariate(1.2)) - 1
+                if rng.random() < 0.7:
+                    template = rng.choice(favorites)
+                    copies = (n_items - template - 1) // n_templates + 1
+                    index = template + n_templates * (rank % copies)
+                else:
+                    index = (rank * 7919) % n_items
+                likes[(uid, item_ids[index])] = now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600))
+        likes = [
+            {"user_id": uid, "item_id": item_id, "created_at": created_at}
+            for (uid, item_id), created_at in likes.items()
+        ]
+        for start in range(0, len(likes), BATCH_SIZE):
+            conn.execute(insert(models.Like), likes[start : start + BATCH_SIZE])
+
+        # 4. 商品のいいね数カラム
+        counts = Counter(like["item_id"] for like in likes)
+        rows = [{"b_item_id": item_id, "b_like_count": n} for item_id, n in counts.items()]
+        statement = (
+            update(models.Item)
+            .where(models.Item.item_id == bindparam("b_item_id"))
+            .values(like_count=bindparam("b_like_count"))
+        )
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.execute(statement, rows[start : start + BATCH_SIZE])
+
+        # 5. コメント（いいねした商品のうち comment_rate の割合にコメントする）
+        #    いいねとは別の乱数列にして、comment_rate=0 のカタログと商品・いいねが変わらないようにする
+        comment_rng = random.Random(seed + 1)
+        comments = [
+            {
+                "user_id": like["user_id"],
+                "item_id": like["item_id"],
+                "content": comment_rng.choice(EXTRA_SENTENCES),
+                "created_at": like["created_at"],
+            }
+            for like in likes
+            if comment_rate > 0 and comment_rng.random() < comment_rate
+        ]
+        for start in range(0, len(comments), BATCH_SIZE):
+            conn.execute(insert(models.Comment), comments[start : start + BATCH_SIZE])
+        counts = Counter(comment["item_id"] for comment in comments)
+        rows = [{"b_item_id": item_id, "b_comment_count": n} for item_id, n in counts.items()]
+        statement = (
+            update(models.Item)
+            .where(models.Item.item_id == bindparam("b_item_id"))
+            .values(comment_count=bindparam("b_comment_count"))
+        )
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.execute(statement, rows[start : start + BATCH_SIZE])
+
+    print(
+        f"[catalog] built: items={n_items}, users={n_users}, likes={len(likes)}, comments={len(comments)}"
+    )
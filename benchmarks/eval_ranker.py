@@ -0,0 +1,123 @@
+# hackathon-backend/benchmarks/eval_ranker.py
+"""
+類似商品ランキングのオフライン評価（いいねの hold-out）
+
+いいねが2件以上あるユーザーごとに、最新のいいねを正解として隠し、
+その1つ前にいいねした商品を起点に類似商品を k 件おすすめして、正解が含まれるかを測る。
+- hit_rate@k: 正解が上位 k 件に入ったユーザーの割合
+- mrr@k: 正解の順位の逆数の平均（k 件に入らなければ 0）
+隠したいいねは、候補のいいね数の特徴量からも差し引く（答えの漏れを防ぐ）。
+
+実行例:
+    python -m benchmarks.eval_ranker --database-url sqlite:///benchmarks/.data/catalog_10000.sqlite
+    RANK_WEIGHT_LIKES=0.3 python -m benchmarks.eval_ranker --k 20
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from dataclasses import replace
+
+# 自身の場所(benchmarks)から1つ上(プロジェクトルート)に戻ってパスを通す
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+
+def evaluate(db, rankers: dict, k: int, candidate_factor: int) -> dict:
+    from app.db import models
+    from app.services.ranker import load_features, rank_candidates
+    from app.services.recommend_service import RecommendIndex
+
+    index = RecommendIndex(ann_dir="")
+    index.sync(db, force=True)
+
+    # 1. ユーザーごとのいいねを古い順に並べ、最新を正解・1つ前を起点にする
+    likes = defaultdict(list)
+    for user_id, item_id, _, _ in (
+        db.query(models.Like.user_id, models.Like.item_id, models.Like.created_at, models.Like.id)
+        .order_by(models.Like.created_at, models.Like.id)
+    ):
+        likes[user_id].append(item_id)
+    cases = [
+        (user_id, items[-2], items[-1])
+        for user_id, items in likes.items()
+        if len(items) >= 2 and items[-1] != items[-2]
+    ]
+
+    # 2. 起点ごとの候補を集め、特徴量はまとめて読む
+    candidates = {seed: index.neighbors(seed, k * candidate_factor) for _, seed, _ in cases}
+    features = load_features(
+        db, set(candidates) | {i for pairs in candidates.values() for i, _ in pairs}
+    )
+
+    # 3. ランカーごとに hit rate / MRR を計算
+    totals = {name: {"hits": 0, "rr": 0.0} for name in rankers}
+    evaluated = 0
+    for _, seed, held_out in cases:
+        if not candidates[seed]:
+            continue
+        evaluated += 1
+        case_features = features
+        if held_out in features:
+            # 隠したいいねはいいね数から除く
+            case_features = dict(features)
+            original = features[held_out]
+            case_features[held_out] = replace(original, like_count=max(0, original.like_count - 1))
+
+        for name, ranker in rankers.items():
+            ranked = [i for i, _ in rank_candidates(ranker, case_features, seed, candidates[seed], k)]
+            if held_out in ranked:
+                totals[name]["hits"] += 1
+                totals[name]["rr"] += 1.0 / (ranked.index(held_out) + 1)
+
+    return {
+        "k": k,
+        "users": len(likes),
+        "cases": evaluated,
+        "rankers": {
+            name: {
+                f"hit_rate@{k}": round(t["hits"] / evaluated, 4) if evaluated else None,
+                f"mrr@{k}": round(t["rr"] / evaluated, 4) if evaluated else None,
+            }
+            for name, t in totals.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ranker evaluation with held-out likes")
+    parser.add_argument("--database-url", help="評価に使うDB（省略時は DATABASE_URL / 通常の接続）")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidate-factor", type=int, default=None)
+    args = parser.parse_args()
+
+    # app の設定を読み込む前に接続先を差し替える
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.core.config import settings
+    from app.db.database import SessionLocal
+    from app.services.ranker import RANKERS
+
+    rankers = {name: cls() for name, cls in RANKERS.items()}
+    db = SessionLocal()
+    try:
+        report = evaluate(
+            db, rankers, args.k, args.candidate_factor or settings.RANK_CANDIDATE_FACTOR
+        )
+    finally:
+        db.close()
+    report["weights"] = {
+        "text": settings.RANK_WEIGHT_TEXT,
+        "likes": settings.RANK_WEIGHT_LIKES,
+        "comments": settings.RANK_WEIGHT_COMMENTS,
+        "recency": settings.RANK_WEIGHT_RECENCY,
+        "price": settings.RANK_WEIGHT_PRICE,
+        "recency_half_life_days": settings.RANK_RECENCY_HALF_LIFE_DAYS,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()